@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# A PEM certificate is about this big, so the generated ones make responses of a realistic size.
+CERTIFICATE_SIZE: int = 700
+
+
+def sync_response(metadata: Any) -> bytes:
+    """Encode a LXD sync response."""
+    return json.dumps(
+        {
+            "type": "sync",
+            "status": "Success",
+            "status_code": 200,
+            "operation": "",
+            "error_code": 0,
+            "error": "",
+            "metadata": metadata,
+        }
+    ).encode()
+
+
+def error_response(code: int, error: str) -> bytes:
+    """Encode a LXD error response."""
+    return json.dumps(
+        {
+            "type": "error",
+            "status": "",
+            "status_code": 0,
+            "operation": "",
+            "error_code": code,
+            "error": error,
+            "metadata": None,
+        }
+    ).encode()
+
+
+def fake_certificate(index: int) -> Dict[str, Any]:
+    """A certificate as returned by /1.0/certificates/{fingerprint}. The certificate itself is filler."""
+    fingerprint: str = hashlib.sha256(f"certificate-{index}".encode()).hexdigest()
+    filler: str = (fingerprint * (CERTIFICATE_SIZE // len(fingerprint) + 1))[:CERTIFICATE_SIZE]
+    return {
+        "certificate": f"-----BEGIN CERTIFICATE-----\n{filler}\n-----END CERTIFICATE-----\n",
+        "fingerprint": fingerprint,
+        "name": f"client-{index}",
+        "projects": ["default"],
+        "restricted": False,
+        "type": "client",
+    }
+
+
+class FakeLXD:
+    """A stand-in for the LXD daemon that serves canned responses on a Unix socket.
+
+    Every response is encoded once up front, so the server spends as little time as possible per request and the
+    numbers are dominated by the client.
+
+    Example:
+        with FakeLXD("/tmp/lxd.socket", certificates=1000, latency=0.001):
+            lxd = LXD(socket_path="/tmp/lxd.socket")
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        certificates: int = 100,
+        member_config: int = 10,
+        extensions: int = 300,
+        latency: float = 0.0,
+    ) -> None:
+        """Build the responses.
+
+        Args:
+            socket_path: Where to listen.
+            certificates: How many certificates are in the trust store.
+            member_config: How many entries /1.0/cluster has in member_config.
+            extensions: How many API extensions /1.0 lists.
+            latency: Seconds to wait before answering each request.
+        """
+        self.socket_path: str = socket_path
+        self.latency: float = latency
+
+        certificate_list: List[Dict[str, Any]] = [fake_certificate(i) for i in range(certificates)]
+        server: Dict[str, Any] = {
+            "api_extensions": [f"extension_{i}" for i in range(extensions)],
+            "api_status": "stable",
+            "api_version": "1.0",
+            "auth": "trusted",
+            "auth_methods": ["tls"],
+            "config": {"core.https_address": "[::]:8443"},
+            "environment": {"server_name": "fake", "server_version": "5.10", "kernel": "Linux"},
+            "public": False,
+        }
+        cluster: Dict[str, Any] = {
+            "enabled": False,
+            "server_name": "",
+            "member_config": [
+                {"entity": "storage-pool", "name": f"pool{i}", "key": "source", "value": "", "description": ""}
+                for i in range(member_config)
+            ],
+        }
+
+        self.etag: str = '"' + hashlib.sha256(sync_response(server)).hexdigest()[:16] + '"'
+        self.responses: Dict[str, bytes] = {
+            "/": sync_response(["/1.0"]),
+            "/1.0": sync_response(server),
+            "/1.0/cluster": sync_response(cluster),
+            "/1.0/certificates": sync_response([f"/1.0/certificates/{c['fingerprint']}" for c in certificate_list]),
+            "/1.0/certificates?recursion=1": sync_response(certificate_list),
+        }
+        for certificate in certificate_list:
+            self.responses[f"/1.0/certificates/{certificate['fingerprint']}"] = sync_response(certificate)
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def respond(self, method: str, path: str, if_none_match: Optional[str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """The status, body and extra headers to answer a request with."""
+        url = urlsplit(path)
+        recursion: str = parse_qs(url.query).get("recursion", ["0"])[0]
+        key: str = f"{url.path}?recursion=1" if recursion != "0" else url.path
+
+        if method != "GET":
+            return 200, sync_response({}), {}
+        if url.path == "/1.0":
+            if if_none_match == self.etag:
+                return 304, b"", {"ETag": self.etag}
+            return 200, self.responses[key], {"ETag": self.etag}
+        if key in self.responses:
+            return 200, self.responses[key], {}
+        return 404, error_response(404, "Not Found"), {}
+
+    def start(self) -> "FakeLXD":
+        """Start serving in a background thread."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = _UnixHTTPServer(self.socket_path, _handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-lxd", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread until interrupted."""
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __enter__(self) -> "FakeLXD":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _handler(fake: FakeLXD) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def address_string(self) -> str:
+            return "unix"
+
+        def _answer(self) -> None:
+            length: int = int(self.headers.get("Content-Length", 0))
+            if length:
+                self.rfile.read(length)
+            if fake.latency:
+                time.sleep(fake.latency)
+
+            status, body, headers = fake.respond(self.command, self.path, self.headers.get("If-None-Match"))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _answer
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake LXD daemon on a Unix socket.")
+    parser.add_argument("--socket", required=True, help="Where to listen.")
+    parser.add_argument("--certificates", type=int, default=100, help="Number of certificates in the trust store.")
+    parser.add_argument("--member-config", type=int, default=10, help="Number of member_config entries.")
+    parser.add_argument("--extensions", type=int, default=300, help="Number of API extensions.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds to wait before each response.")
+    args = parser.parse_args()
+
+    FakeLXD(
+        args.socket,
+        certificates=args.certificates,
+        member_config=args.member_config,
+        extensions=args.extensions,
+        latency=args.latency / 1000,
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_lxd import fake_certificate
+from lxd_python.cache import ResponseCache
+from lxd_python.certificates import get_all_certificates, get_certificate, get_certificate_views, get_certificates
+from lxd_python.cluster import get_cluster
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.server import get_server_environment_and_configuration, get_supported_api_endpoints
+
+
+@dataclass
+class Scenario:
+    """One thing to benchmark, called once per iteration with a client."""
+
+    name: str
+    call: Callable[[LXD], Any]
+
+    # Give the client a ResponseCache that revalidates every request, to measure the 304 path.
+    cache: bool = False
+
+
+@dataclass
+class Result:
+    """The numbers for one scenario."""
+
+    name: str
+    requests: int
+    requests_per_second: float
+
+    # Latency of one call, in milliseconds.
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+
+    # Bytes allocated by one call (the tracemalloc peak above the starting point, divided by the number of calls that
+    # ran in between) and the bytes one call left behind.
+    peak_bytes_per_call: float
+    retained_bytes_per_call: float
+
+    # Peak resident set size of the whole process after the scenario ran, in KiB.
+    max_rss_kib: int
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("LXD.get /", lambda lxd: lxd.get("/")),
+    Scenario("get_supported_api_endpoints", get_supported_api_endpoints),
+    Scenario(
+        "get_server_environment_and_configuration",
+        lambda lxd: get_server_environment_and_configuration(lxd, "", "default"),
+    ),
+    Scenario("get_cluster", get_cluster),
+    Scenario("get_certificates", get_certificates),
+    Scenario("get_certificate", lambda lxd: get_certificate(lxd, fake_certificate(0)["fingerprint"])),
+    Scenario("get_all_certificates", get_all_certificates),
+    Scenario("get_certificate_views", get_certificate_views),
+    Scenario("LXD.get /1.0 revalidated", lambda lxd: lxd.get("/1.0"), cache=True),
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """The q-th quantile (0 to 1) of already sorted values, without interpolation."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_scenario(scenario: Scenario, socket_path: str, requests: int, warmup: int, alloc_requests: int) -> Result:
+    """Time requests calls one after the other, then measure allocations over alloc_requests more."""
+    lxd = LXD(socket_path=socket_path, cache=ResponseCache(default_ttl=0) if scenario.cache else None)
+    for _ in range(warmup):
+        scenario.call(lxd)
+
+    latencies: List[float] = []
+    gc.collect()
+    start: float = time.perf_counter()
+    for _ in range(requests):
+        call_start: float = time.perf_counter()
+        scenario.call(lxd)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed: float = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(alloc_requests):
+        scenario.call(lxd)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lxd.close()
+
+    latencies.sort()
+    return Result(
+        name=scenario.name,
+        requests=requests,
+        requests_per_second=requests / elapsed,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        mean_ms=statistics.fmean(latencies) * 1000,
+        peak_bytes_per_call=(peak - baseline) / max(alloc_requests, 1),
+        retained_bytes_per_call=(current - baseline) / max(alloc_requests, 1),
+        max_rss_kib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    )
+
+
+def run_async(socket_path: str, requests: int, concurrency: int) -> Result:
+    """Time requests GET / calls from one event loop with up to concurrency in flight."""
+
+    async def run() -> List[float]:
+        latencies: List[float] = []
+        semaphore = asyncio.Semaphore(concurrency)
+        async with AsyncLXD(socket_path=socket_path) as lxd:
+
+            async def call() -> None:
+                async with semaphore:
+                    call_start: float = time.perf_counter()
+                    await lxd.get("/")
+                    latencies.append(time.perf_counter() - call_start)
+
+            await asyncio.gather(*(call() for _ in range(requests)))
+        return latencies
+
+    start: float = time.perf_counter()
+    latencies: List[float] = asyncio.run(run())
+    elapsed: float = time.perf_counter() - start
+    latencies.sort()
+    return Result(
+        name=f"AsyncLXD.get / x{concurrency}",
+        requests=requests,
+        requests_per_second=requests / elapsed,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        mean_ms=statistics.fmean(latencies) * 1000,
+        peak_bytes_per_call=0.0,
+        retained_bytes_per_call=0.0,
+        max_rss_kib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    )
+
+
+def start_fake_lxd(socket_path: str, args: argparse.Namespace) -> subprocess.Popen:
+    """Start the fake daemon in its own process, so it doesn't share the GIL or the allocator with the client."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_lxd",
+            "--socket",
+            socket_path,
+            "--certificates",
+            str(args.certificates),
+            "--member-config",
+            str(args.member_config),
+            "--latency",
+            str(args.latency),
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    deadline: float = time.monotonic() + 10
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("The fake LXD daemon did not start.")
+        time.sleep(0.01)
+    return process
+
+
+def compare(results: List[Result], baseline_path: str, max_regression: float) -> List[str]:
+    """Print the change against an earlier run and return the scenarios that got slower than max_regression %."""
+    with open(baseline_path) as baseline_file:
+        baseline: Dict[str, Dict[str, Any]] = {r["name"]: r for r in json.load(baseline_file)["results"]}
+
+    regressions: List[str] = []
+    print(f"\nCompared to {baseline_path}:")
+    for result in results:
+        old: Optional[Dict[str, Any]] = baseline.get(result.name)
+        if old is None:
+            continue
+        rps_change: float = (result.requests_per_second / old["requests_per_second"] - 1) * 100
+        p99_change: float = (result.p99_ms / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0.0
+        print(f"  {result.name:<45} req/s {rps_change:+6.1f}%  p99 {p99_change:+6.1f}%")
+        if -rps_change > max_regression:
+            regressions.append(result.name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the LXD client against a fake LXD daemon.")
+    parser.add_argument("--requests", type=int, default=2000, help="Timed calls per scenario.")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed calls before each scenario.")
+    parser.add_argument("--alloc-requests", type=int, default=200, help="Calls to measure allocations over.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight for the asyncio scenario.")
+    parser.add_argument("--certificates", type=int, default=100, help="Certificates in the fake trust store.")
+    parser.add_argument("--member-config", type=int, default=10, help="member_config entries in /1.0/cluster.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds the fake daemon waits per request.")
+    parser.add_argument("--only", action="append", help="Only run scenarios with this in their name.")
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    parser.add_argument("--compare", help="Compare with the results saved by an earlier run.")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Fail if req/s drops by more (%%).")
+    args = parser.parse_args()
+
+    scenarios: List[Scenario] = [s for s in SCENARIOS if not args.only or any(o in s.name for o in args.only)]
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "lxd.socket")
+        process: subprocess.Popen = start_fake_lxd(socket_path, args)
+        try:
+            for scenario in scenarios:
+                results.append(run_scenario(scenario, socket_path, args.requests, args.warmup, args.alloc_requests))
+            async_result: Result = run_async(socket_path, args.requests, args.concurrency)
+            if not args.only or any(o in async_result.name for o in args.only):
+                results.append(async_result)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{'scenario':<45} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'KiB/call':>9} {'RSS MiB':>8}")
+    for result in results:
+        print(
+            f"{result.name:<45} {result.requests_per_second:>9.0f} {result.p50_ms:>8.3f} {result.p99_ms:>8.3f} "
+            f"{result.peak_bytes_per_call / 1024:>9.1f} {result.max_rss_kib / 1024:>8.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "httpx": httpx.__version__,
+                    "options": vars(args),
+                    "results": [asdict(result) for result in results],
+                },
+                output_file,
+                indent=2,
+            )
+
+    if args.compare and (regressions := compare(results, args.compare, args.max_regression)):
+        print(f"\nSlower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
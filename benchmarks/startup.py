@@ -0,0 +1,86 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+# Modules the library can't do without. They are imported before the clock starts, so the numbers are the cost of this
+# library itself and don't move when httpx gets slower or faster to import.
+DEPENDENCIES: str = "import httpx, loguru"
+
+# Milliseconds each measurement may take at most.
+BUDGETS_MS: Dict[str, float] = {
+    "import lxd_python.models": 20.0,
+    "import lxd_python.lxd": 40.0,
+    "import lxd_python.certificates": 40.0,
+    "LXD()": 0.1,
+}
+
+# Modules that must not be imported by the measurement, because they are slow and only some callers need them.
+FORBIDDEN_MODULES: List[str] = ["cryptography"]
+
+MEASURE_IMPORT: str = """
+import sys, time
+{dependencies}
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+MEASURE_CLIENT: str = """
+import sys, time
+from lxd_python.lxd import LXD
+LXD()
+start = time.perf_counter()
+for _ in range(1000):
+    LXD()
+elapsed = (time.perf_counter() - start) / 1000
+print(elapsed, ",".join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+
+def measure(code: str, repeat: int) -> tuple[float, List[str]]:
+    """Run code in a fresh interpreter repeat times. Returns the fastest time in ms and the forbidden modules seen."""
+    times: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        output: str = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        times.append(float(output[0]) * 1000)
+        loaded = output[1].split(",") if len(output) > 1 else []
+    return min(times), loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import time and client construction time of lxd_python.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement, the fastest counts.")
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    failures: List[str] = []
+    for name, budget in BUDGETS_MS.items():
+        if name == "LXD()":
+            code: str = MEASURE_CLIENT.format(forbidden=FORBIDDEN_MODULES)
+        else:
+            code = MEASURE_IMPORT.format(dependencies=DEPENDENCIES, module=name.split()[1], forbidden=FORBIDDEN_MODULES)
+        elapsed, loaded = measure(code, args.repeat)
+        results[name] = elapsed
+        status: str = "ok" if elapsed <= budget else "OVER BUDGET"
+        print(f"{name:<35} {elapsed:8.3f} ms  (budget {budget} ms)  {status}")
+        if elapsed > budget:
+            failures.append(name)
+        if loaded:
+            print(f"{name:<35} imported {', '.join(loaded)}")
+            failures.append(name)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"budgets_ms": BUDGETS_MS, "results_ms": results}, output_file, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
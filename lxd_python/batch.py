@@ -0,0 +1,155 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import SyncResponse
+
+
+@dataclass
+class BatchRequest:
+    """One request of a batch."""
+
+    # The HTTP method.
+    # Example: GET
+    method: str
+
+    # The path to the resource.
+    # Example: /1.0/certificates/abc123
+    path: str
+
+    # The query parameters.
+    # Example: {"target": "lxd01"}
+    params: Optional[Dict[str, Any]] = None
+
+    # The JSON body.
+    data: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_tuple(cls, request: Tuple[Any, ...]) -> "BatchRequest":
+        """Build a request from (method, path) or (method, path, body).
+
+        The body is the query parameters of a GET and the JSON body of anything else.
+        """
+        method, path, body = (*request, None) if len(request) == 2 else request
+        if method.upper() == "GET":
+            return cls(method="GET", path=path, params=body)
+        return cls(method=method.upper(), path=path, data=body)
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one request of a batch."""
+
+    request: BatchRequest
+
+    # The response from LXD, None if the request failed before there was one.
+    response: Optional[SyncResponse] = None
+
+    # The error, None if it worked. Error responses from LXD count as errors too.
+    # Example: Certificate not found
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def metadata(self) -> Any:
+        """The metadata of the response, None if it failed."""
+        return self.response["metadata"] if self.ok and self.response is not None else None
+
+
+BatchItem = Union[BatchRequest, Tuple[Any, ...]]
+
+
+def run_batch(lxd: LXD, requests: Iterable[BatchItem]) -> List[BatchResult]:
+    """Send many independent requests at the same time, from the thread pool of the client.
+
+    A failing request does not stop the others, check the result of each one. Only LXDErrors become failed results,
+    anything else is a bug and is raised. GETs go through the cache of the client and writes invalidate it, like with
+    LXD.get() and friends.
+
+    Example:
+        urls = get_certificates(lxd)
+        results = run_batch(lxd, [("GET", url) for url in urls])
+        certificates = [Certificate(r.response) for r in results if r.ok]
+
+    Args:
+        lxd: The LXD client. At most lxd.max_workers requests are in flight.
+        requests: BatchRequests, or (method, path) and (method, path, body) tuples. See BatchRequest.from_tuple().
+
+    Returns:
+        List[BatchResult]: One result per request, in the same order.
+    """
+    batch: List[BatchRequest] = [_batch_request(request) for request in requests]
+    if not batch:
+        return []
+    return list(lxd.executor.map(lambda request: _run(lxd, request), batch))
+
+
+def _batch_request(request: BatchItem) -> BatchRequest:
+    return request if isinstance(request, BatchRequest) else BatchRequest.from_tuple(request)
+
+
+def _run(lxd: LXD, request: BatchRequest) -> BatchResult:
+    try:
+        if request.method == "GET":
+            response = lxd.get(request.path, params=request.params)
+        else:
+            raw = lxd.request(request.method, request.path, params=request.params, data=request.data)
+            response = lxd.codec.loads(raw.content)
+            if lxd.cache is not None:
+                lxd.cache.invalidate(request.path)
+    except LXDError as e:
+        return BatchResult(request=request, error=str(e) or type(e).__name__)
+    return BatchResult(request=request, response=response, error=response_error(response))
+
+
+def response_error(response: Any) -> Optional[str]:
+    """The error of a LXD response, None if it worked.
+
+    Args:
+        response: The decoded response.
+
+    Returns:
+        Optional[str]: The error message, or None.
+    """
+    if response is None:
+        return "No response from LXD"
+    if not isinstance(response, dict):
+        return "Invalid response from LXD"
+    if not response.get("error_code"):
+        return None
+    return response.get("error") or f"Error {response['error_code']}"
+
+
+async def async_run_batch(lxd: AsyncLXD, requests: Iterable[BatchItem], max_concurrency: int = 16) -> List[BatchResult]:
+    """Asyncio version of run_batch().
+
+    Args:
+        lxd: The asyncio LXD client.
+        requests: BatchRequests, or (method, path) and (method, path, body) tuples. See BatchRequest.from_tuple().
+        max_concurrency: How many requests to have in flight at the same time.
+
+    Returns:
+        List[BatchResult]: One result per request, in the same order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(request: BatchRequest) -> BatchResult:
+        async with semaphore:
+            try:
+                if request.method == "GET":
+                    response = await lxd.get(request.path, params=request.params)
+                else:
+                    raw = await lxd.request(request.method, request.path, params=request.params, data=request.data)
+                    response = lxd.codec.loads(raw.content)
+                    if lxd.cache is not None:
+                        lxd.cache.invalidate(request.path)
+            except LXDError as e:
+                return BatchResult(request=request, error=str(e) or type(e).__name__)
+            return BatchResult(request=request, response=response, error=response_error(response))
+
+    return list(await asyncio.gather(*(run(_batch_request(request)) for request in requests)))
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+
+@dataclass
+class CacheEntry:
+    """A cached GET response."""
+
+    # The path the response was fetched from.
+    # Example: /1.0/certificates
+    path: str
+
+    # The decoded JSON body.
+    body: Any
+
+    # The ETag header LXD sent with the response, if any.
+    # Example: "d7bc9b4d4f8b4b8b"
+    etag: Optional[str]
+
+    # time.monotonic() after which the entry has to be revalidated.
+    expires: float
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+
+class ResponseCache:
+    """Bounded LRU cache for GET responses.
+
+    Entries are served without asking the daemon until their TTL runs out. After that they are revalidated with
+    If-None-Match when LXD gave us an ETag, so an unchanged resource costs a 304 instead of the whole body.
+
+    Bodies are returned as-is, callers should not modify them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        default_ttl: float = 5.0,
+        ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """Create a response cache.
+
+        Args:
+            max_entries: The maximum number of responses to keep. The least recently used one is evicted first.
+            default_ttl: Seconds a response is fresh for when no prefix in ttls matches its path.
+            ttls: Seconds a response is fresh for, by path prefix. The longest matching prefix wins.
+                Example: {"/1.0/cluster": 30, "/1.0/certificates": 1}
+        """
+        self.max_entries: int = max_entries
+        self.default_ttl: float = default_ttl
+        # Longest prefix first so the first match is the most specific one.
+        self.ttls: Dict[str, float] = dict(sorted((ttls or {}).items(), key=lambda item: len(item[0]), reverse=True))
+
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._keys_by_path: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """The cache key for a path and its query parameters."""
+        return path, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    def ttl_for(self, path: str) -> float:
+        """Seconds a response for path is fresh for."""
+        for prefix, ttl in self.ttls.items():
+            if path.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Get an entry, fresh or not, and mark it as recently used."""
+        with self._lock:
+            entry: Optional[CacheEntry] = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: Hashable, path: str, body: Any, etag: Optional[str]) -> None:
+        """Store a response, evicting the least recently used one if the cache is full."""
+        entry = CacheEntry(path=path, body=body, etag=etag, expires=time.monotonic() + self.ttl_for(path))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._keys_by_path.setdefault(path, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._forget(old_key, old_entry.path)
+
+    def refresh(self, key: Hashable) -> None:
+        """Restart the TTL of an entry the server told us is still valid (304 Not Modified)."""
+        with self._lock:
+            entry: Optional[CacheEntry] = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl_for(entry.path)
+
+    def invalidate(self, path: str) -> None:
+        """Drop everything cached for path and for the collection it belongs to.
+
+        A write to /1.0/certificates/abc also changes the /1.0/certificates listing.
+        """
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        parent: str = path.rsplit("/", 1)[0] or "/"
+        with self._lock:
+            for invalid_path in {path, parent}:
+                for key in self._keys_by_path.pop(invalid_path, set()):
+                    self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+
+    def after_fork(self) -> None:
+        """Replace the lock in a forked child and drop the entries.
+
+        Another thread of the parent may have held the lock during the fork, halfway through changing the entries.
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_path = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _forget(self, key: Hashable, path: str) -> None:
+        keys: Optional[Set[Hashable]] = self._keys_by_path.get(path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[path]
@@ -0,0 +1,136 @@
+import weakref
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Union
+
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Server, SyncResponse
+
+# API extensions the library picks a faster way of doing things with.
+# https://linuxcontainers.org/lxd/docs/master/api-extensions/
+ETAG: str = "etag"
+PATCH: str = "patch"
+API_FILTERING: str = "api_filtering"
+CONTAINER_FULL: str = "container_full"
+INSTANCES: str = "instances"
+CLUSTERING: str = "clustering"
+METRICS: str = "metrics"
+ALL_PROJECTS: str = "instance_all_projects"
+
+
+@dataclass(frozen=True)
+class Capabilities:
+    """What a LXD server supports, for picking the cheapest way to talk to it.
+
+    Checking for an extension is a set lookup, so it can be done on every call.
+    """
+
+    # API version number.
+    # Example: 1.0
+    api_version: str
+
+    # Support status of the API (one of "devel", "stable" or "deprecated").
+    # Example: stable
+    api_status: str
+
+    # The API extensions of the server.
+    # Example: frozenset({"etag", "patch", "api_filtering"})
+    extensions: FrozenSet[str]
+
+    @classmethod
+    def from_server(cls, server: Server) -> "Capabilities":
+        return cls(
+            api_version=server.api_version,
+            api_status=server.api_status,
+            extensions=frozenset(server.api_extensions or ()),
+        )
+
+    def has(self, extension: str) -> bool:
+        """Whether the server has an API extension."""
+        return extension in self.extensions
+
+    def has_all(self, extensions: Iterable[str]) -> bool:
+        """Whether the server has every one of the API extensions."""
+        return self.extensions.issuperset(extensions)
+
+    def __contains__(self, extension: str) -> bool:
+        return extension in self.extensions
+
+    @property
+    def etag(self) -> bool:
+        """GETs return an ETag, and writes accept If-Match."""
+        return ETAG in self.extensions
+
+    @property
+    def patch(self) -> bool:
+        """Objects can be changed with PATCH instead of a PUT of the whole object."""
+        return PATCH in self.extensions
+
+    @property
+    def filtering(self) -> bool:
+        """Collections can be filtered by the server with filter=."""
+        return API_FILTERING in self.extensions
+
+    @property
+    def full_recursion(self) -> bool:
+        """recursion=2 returns instances with their state, snapshots and backups in one request."""
+        return CONTAINER_FULL in self.extensions
+
+    @property
+    def instances(self) -> bool:
+        """Instances are at /1.0/instances. Older servers only have /1.0/containers."""
+        return INSTANCES in self.extensions
+
+    @property
+    def all_projects(self) -> bool:
+        """Instances of all projects can be listed with one request."""
+        return ALL_PROJECTS in self.extensions
+
+
+# A client connects to one server, so its capabilities only have to be fetched once.
+_snapshots: "weakref.WeakKeyDictionary[Union[LXD, AsyncLXD], Capabilities]" = weakref.WeakKeyDictionary()
+
+
+def get_capabilities(lxd: LXD, refresh: bool = False) -> Capabilities:
+    """Get what the server supports. Fetched once per client and then served from memory.
+
+    Args:
+        lxd: The LXD client.
+        refresh: Fetch them again, for example after the server was upgraded.
+
+    Raises:
+        LXDError: If the server did not return them. Nothing is kept then, the next call asks again.
+
+    Returns:
+        Capabilities: The capabilities of the server.
+    """
+    capabilities = _snapshots.get(lxd)
+    if capabilities is None or refresh:
+        capabilities = _snapshots[lxd] = _capabilities(lxd.get("/1.0"))
+    return capabilities
+
+
+def _capabilities(response: SyncResponse) -> Capabilities:
+    # Never fall back to no capabilities, they would be kept and make every call take the slowest way.
+    if response["error_code"]:
+        raise LXDError(f"{response['error_code']} - Could not get the capabilities of the server: {response['error']}")
+    return Capabilities.from_server(Server(response["metadata"]))
+
+
+async def async_get_capabilities(lxd: AsyncLXD, refresh: bool = False) -> Capabilities:
+    """Asyncio version of get_capabilities().
+
+    Args:
+        lxd: The asyncio LXD client.
+        refresh: Fetch them again, for example after the server was upgraded.
+
+    Raises:
+        LXDError: If the server did not return them. Nothing is kept then, the next call asks again.
+
+    Returns:
+        Capabilities: The capabilities of the server.
+    """
+    capabilities = _snapshots.get(lxd)
+    if capabilities is None or refresh:
+        capabilities = _snapshots[lxd] = _capabilities(await lxd.get("/1.0"))
+    return capabilities
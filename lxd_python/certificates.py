@@ -1,8 +1,13 @@
-from typing import List
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from lxd_python.batch import BatchResult, async_run_batch, run_batch
 from lxd_python.exceptions import CertNotFoundError, LXDError
-from lxd_python.lxd import LXD
-from lxd_python.models import Certificate, CertificatesPost, SyncResponse
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Certificate, CertificatesPost, CertificateView, SyncResponse
+
+if TYPE_CHECKING:
+    from cryptography import x509
 
 
 def get_certificates(lxd: LXD) -> List[str]:
@@ -25,21 +30,81 @@ def get_certificate(lxd: LXD, fingerprint: str) -> Certificate:
         lxd: The LXD client.
         fingerprint: Fingerprint of the certificate to get.
 
+    Raises:
+        CertNotFoundError: If there is no certificate with that fingerprint.
+
     Returns:
-        str: The certificate.
+        Certificate: The certificate.
     """
-    # Get all certificates for the error message.
-    certs: List[str] = get_certificates(lxd)
-
     # Remove /1.0/certificates/ from the fingerprint if it was provided.
     clean_fingerprint: str = fingerprint.replace("/1.0/certificates/", "")
 
     certificate = lxd.get(f"/1.0/certificates/{clean_fingerprint}")
     if certificate["error_code"] == 404:
-        raise CertNotFoundError(fingerprint, certs)
+        # Only list the certificates for the error message when we actually need it.
+        raise CertNotFoundError(fingerprint, get_certificates(lxd))
     return Certificate(certificate)
 
 
+def get_all_certificates(lxd: LXD) -> List[Certificate]:
+    """Get all certificates with their details in a single request.
+
+    Uses recursion=1 so the server returns the full certificate objects instead of their URLs. Servers that ignore it
+    get asked for each certificate instead, all at the same time.
+
+    Args:
+        lxd: The LXD client.
+
+    Raises:
+        LXDError: If a certificate could not be fetched.
+
+    Returns:
+        List[Certificate]: List of certificates.
+    """
+    # Certificate expects a whole response, recursion gives us a list of metadata.
+    return [Certificate({"metadata": metadata}) for metadata in _all_certificate_metadata(lxd)]
+
+
+def get_certificate_views(lxd: LXD) -> List[CertificateView]:
+    """Get all certificates in a single request, as compact views.
+
+    Like get_all_certificates(), but the fields of each certificate are only parsed when they are read. Use this when
+    keeping a lot of certificates around.
+
+    Args:
+        lxd: The LXD client.
+
+    Raises:
+        LXDError: If a certificate could not be fetched.
+
+    Returns:
+        List[CertificateView]: List of certificates.
+    """
+    return [CertificateView(metadata) for metadata in _all_certificate_metadata(lxd)]
+
+
+def _all_certificate_metadata(lxd: LXD) -> List[Dict[str, Any]]:
+    certificates = lxd.get("/1.0/certificates", params={"recursion": 1})
+    metadata: List[Any] = certificates["metadata"] or []
+    urls: List[str] = [item for item in metadata if isinstance(item, str)]
+    if not urls:
+        return metadata
+    # The server returned URLs, it doesn't do recursion here.
+    return _fetched_metadata(run_batch(lxd, [("GET", url) for url in urls]))
+
+
+def _fetched_metadata(results: List[BatchResult]) -> List[Dict[str, Any]]:
+    """The certificates fetched one at a time, without the ones deleted since they were listed."""
+    metadata: List[Dict[str, Any]] = []
+    for result in results:
+        if result.response is not None and result.response["error_code"] == 404:
+            continue
+        if not result.ok:
+            raise LXDError(f"Could not get {result.request.path}: {result.error}")
+        metadata.append(result.metadata)
+    return metadata
+
+
 def add_certificate(lxd: LXD, certificate: CertificatesPost, exist_ok: bool = False) -> SyncResponse | None:
     """Add certificate.
 
@@ -53,18 +118,22 @@ def add_certificate(lxd: LXD, certificate: CertificatesPost, exist_ok: bool = Fa
 
     Raises:
         ValueError: If the certificate already exists and exist_ok is False.
+        LXDError: If the request failed.
 
     Returns:
         SyncResponse: Response from LXD or None if the certificate already exists and exist_ok is True.
     """
-    response: SyncResponse | None = None
-    try:
-        response = lxd.post("/1.0/certificates", data=certificate.dict())
-    except LXDError as e:
+    response: SyncResponse = lxd.post("/1.0/certificates", data=certificate.dict())
+    if _already_exists(response):
         if not exist_ok:
-            raise ValueError(f"Certificate already exists: {certificate.name}") from e
+            raise ValueError(f"Certificate already exists: {certificate.name}")
+        return None
+    return response
 
-    return response or None
+
+def _already_exists(response: SyncResponse) -> bool:
+    """Whether LXD refused to add a certificate because it is already trusted."""
+    return bool(response["error_code"]) and "already" in (response["error"] or "").lower()
 
 
 def delete_certificate(lxd: LXD, fingerprint: str) -> SyncResponse:
@@ -82,3 +151,225 @@ def delete_certificate(lxd: LXD, fingerprint: str) -> SyncResponse:
         SyncResponse: Response from LXD.
     """
     return lxd.delete(f"{fingerprint}")
+
+
+def parse_pem_bundle(pem: str | bytes) -> List["x509.Certificate"]:
+    """Parse every certificate in a PEM bundle.
+
+    Args:
+        pem: One or more PEM encoded X509 certificates.
+
+    Raises:
+        ValueError: If the bundle has no valid certificates.
+
+    Returns:
+        List[x509.Certificate]: The certificates, in the order of the bundle.
+    """
+    from cryptography import x509
+
+    return x509.load_pem_x509_certificates(pem.encode() if isinstance(pem, str) else pem)
+
+
+def certificate_fingerprint(cert: "x509.Certificate") -> str:
+    """The fingerprint LXD uses for a certificate, the SHA-256 of its DER encoding as hex.
+
+    Args:
+        cert: The certificate.
+
+    Returns:
+        str: The fingerprint.
+    """
+    from cryptography.hazmat.primitives import hashes
+
+    return cert.fingerprint(hashes.SHA256()).hex()
+
+
+def _default_certificate_name(cert: "x509.Certificate", fingerprint: str) -> str:
+    """The common name of the certificate, or the start of its fingerprint if it has none."""
+    from cryptography.x509.oid import NameOID
+
+    common_names = cert.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return str(common_names[0].value) if common_names else fingerprint[:12]
+
+
+@dataclass
+class CertificateImportResult:
+    """What import_certificates() did with each certificate."""
+
+    # Fingerprints of the certificates that were added.
+    added: List[str] = field(default_factory=list)
+
+    # Fingerprints of the certificates that were already in the trust store.
+    skipped: List[str] = field(default_factory=list)
+
+    # Fingerprints of the certificates that could not be added, with the error from LXD.
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+def import_certificates(
+    lxd: LXD,
+    bundles: Iterable[str | bytes],
+    name: Optional[str] = None,
+    cert_type: str = "client",
+    restricted: bool = False,
+    projects: Optional[List[str]] = None,
+) -> CertificateImportResult:
+    """Add every certificate in the PEM bundles that is not in the trust store yet.
+
+    The certificates are fingerprinted locally and compared with one listing of the trust store, so certificates that
+    are already trusted cost nothing. The missing ones are added at the same time with run_batch(), so at most
+    lxd.max_workers at a time.
+
+    Args:
+        lxd: The LXD client.
+        bundles: PEM bundles, each with one or more certificates.
+        name: Name for the added certificates. Defaults to the common name of each certificate.
+        cert_type: Usage type for the certificates. For example, client.
+        restricted: Whether to limit the certificates to the listed projects.
+        projects: List of allowed projects (applies when restricted).
+
+    Raises:
+        ValueError: If a bundle has no valid certificates.
+
+    Returns:
+        CertificateImportResult: What was added, skipped and what failed.
+    """
+    wanted: Dict[str, "x509.Certificate"] = {}
+    for bundle in bundles:
+        for cert in parse_pem_bundle(bundle):
+            wanted.setdefault(certificate_fingerprint(cert), cert)
+
+    trusted: Set[str] = {url.replace("/1.0/certificates/", "") for url in get_certificates(lxd)}
+    result = CertificateImportResult(skipped=[fingerprint for fingerprint in wanted if fingerprint in trusted])
+
+    def post(fingerprint: str) -> Tuple[str, str, Dict[str, Any]]:
+        cert: "x509.Certificate" = wanted[fingerprint]
+        certificate: CertificatesPost = CertificatesPost.from_x509(
+            cert,
+            name=name or _default_certificate_name(cert, fingerprint),
+            cert_type=cert_type,
+            restricted=restricted,
+            projects=projects,
+        )
+        return ("POST", "/1.0/certificates", certificate.dict())
+
+    missing: List[str] = [fingerprint for fingerprint in wanted if fingerprint not in trusted]
+    for fingerprint, added in zip(missing, run_batch(lxd, [post(fingerprint) for fingerprint in missing])):
+        if added.ok:
+            result.added.append(fingerprint)
+        elif "already" in added.error.lower():
+            # Someone else added it after we listed the trust store.
+            result.skipped.append(fingerprint)
+        else:
+            result.failed[fingerprint] = added.error
+    return result
+
+
+async def async_get_certificates(lxd: AsyncLXD) -> List[str]:
+    """Asyncio version of get_certificates().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Returns:
+        List[str]: List of certificates.
+    """
+    certificates = await lxd.get("/1.0/certificates")
+    return certificates["metadata"]
+
+
+async def async_get_certificate(lxd: AsyncLXD, fingerprint: str) -> Certificate:
+    """Asyncio version of get_certificate().
+
+    Args:
+        lxd: The asyncio LXD client.
+        fingerprint: Fingerprint of the certificate to get.
+
+    Returns:
+        Certificate: The certificate.
+    """
+    # Remove /1.0/certificates/ from the fingerprint if it was provided.
+    clean_fingerprint: str = fingerprint.replace("/1.0/certificates/", "")
+
+    certificate = await lxd.get(f"/1.0/certificates/{clean_fingerprint}")
+    if certificate["error_code"] == 404:
+        # Only list the certificates for the error message when we actually need it.
+        raise CertNotFoundError(fingerprint, await async_get_certificates(lxd))
+    return Certificate(certificate)
+
+
+async def async_get_all_certificates(lxd: AsyncLXD) -> List[Certificate]:
+    """Asyncio version of get_all_certificates().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Raises:
+        LXDError: If a certificate could not be fetched.
+
+    Returns:
+        List[Certificate]: List of certificates.
+    """
+    return [Certificate({"metadata": metadata}) for metadata in await _async_all_certificate_metadata(lxd)]
+
+
+async def async_get_certificate_views(lxd: AsyncLXD) -> List[CertificateView]:
+    """Asyncio version of get_certificate_views().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Raises:
+        LXDError: If a certificate could not be fetched.
+
+    Returns:
+        List[CertificateView]: List of certificates.
+    """
+    return [CertificateView(metadata) for metadata in await _async_all_certificate_metadata(lxd)]
+
+
+async def _async_all_certificate_metadata(lxd: AsyncLXD) -> List[Dict[str, Any]]:
+    certificates = await lxd.get("/1.0/certificates", params={"recursion": 1})
+    metadata: List[Any] = certificates["metadata"] or []
+    urls: List[str] = [item for item in metadata if isinstance(item, str)]
+    if not urls:
+        return metadata
+    return _fetched_metadata(await async_run_batch(lxd, [("GET", url) for url in urls]))
+
+
+async def async_add_certificate(
+    lxd: AsyncLXD, certificate: CertificatesPost, exist_ok: bool = False
+) -> SyncResponse | None:
+    """Asyncio version of add_certificate().
+
+    Args:
+        lxd: The asyncio LXD client.
+        certificate (CertificatesPost): Certificate to add.
+        exist_ok (bool): If True, do not raise an exception if the certificate already exists.
+
+    Raises:
+        ValueError: If the certificate already exists and exist_ok is False.
+        LXDError: If the request failed.
+
+    Returns:
+        SyncResponse: Response from LXD or None if the certificate already exists and exist_ok is True.
+    """
+    response: SyncResponse = await lxd.post("/1.0/certificates", data=certificate.dict())
+    if _already_exists(response):
+        if not exist_ok:
+            raise ValueError(f"Certificate already exists: {certificate.name}")
+        return None
+    return response
+
+
+async def async_delete_certificate(lxd: AsyncLXD, fingerprint: str) -> SyncResponse:
+    """Asyncio version of delete_certificate().
+
+    Args:
+        lxd: The asyncio LXD client.
+        fingerprint (str): Fingerprint of certificate to delete.
+
+    Returns:
+        SyncResponse: Response from LXD.
+    """
+    return await lxd.delete(f"{fingerprint}")
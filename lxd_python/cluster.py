@@ -1,7 +1,44 @@
-from lxd_python.lxd import LXD
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from lxd_python.batch import response_error
+from lxd_python.exceptions import LXDError, LXDTimeoutError
+from lxd_python.lxd import LXD, AsyncLXD
 from lxd_python.models import Cluster, SyncResponse
 
 
+@dataclass
+class MemberResult:
+    """The response of one cluster member to a fan_out() request."""
+
+    # Name of the cluster member.
+    # Example: lxd01
+    member: str
+
+    # The response from the member, None if there was none.
+    response: Optional[SyncResponse] = None
+
+    # The error, None if it worked.
+    # Example: Timed out after 5.0 seconds
+    error: Optional[str] = None
+
+    # Seconds the member took to answer or fail.
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def metadata(self) -> Any:
+        """The metadata of the response, None if it failed."""
+        return self.response["metadata"] if self.ok and self.response is not None else None
+
+
 def get_cluster(lxd: LXD) -> Cluster:
     """Gets the current cluster configuration.
 
@@ -13,3 +50,139 @@ def get_cluster(lxd: LXD) -> Cluster:
     """
     cluster: SyncResponse = lxd.get("/1.0/cluster")
     return Cluster(cluster)
+
+
+def get_cluster_members(lxd: LXD) -> List[str]:
+    """Gets the names of the cluster members.
+
+    Args:
+        lxd: The LXD client.
+
+    Returns:
+        List[str]: The names of the members. Empty if the server is not clustered.
+    """
+    members: SyncResponse = lxd.get("/1.0/cluster/members")
+    return [url.rsplit("/", 1)[-1] for url in members["metadata"] or []]
+
+
+def fan_out(
+    lxd: LXD,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    members: Optional[List[str]] = None,
+    timeout: float = 10.0,
+) -> Dict[str, MemberResult]:
+    """Send the same GET request to every cluster member at the same time, using target=.
+
+    The members are asked from the thread pool of the client. A member that fails or is too slow does not hold up the
+    others, it gets a MemberResult with an error. Anything other than a failed request is a bug and is raised.
+
+    Example:
+        results = fan_out(lxd, "/1.0/resources", timeout=5)
+        unhealthy = [member for member, result in results.items() if not result.ok]
+
+    Args:
+        lxd: The LXD client. At most lxd.max_workers members are asked at the same time.
+        path: The path to get. For example, /1.0.
+        params: Extra query parameters. Defaults to None.
+        members: The members to ask. Defaults to every member of the cluster.
+        timeout: Seconds each member gets to answer, retries included.
+
+    Returns:
+        Dict[str, MemberResult]: The result of each member, in the order of members.
+    """
+    if members is None:
+        members = get_cluster_members(lxd)
+    if not members:
+        return {}
+
+    def ask(member: str) -> MemberResult:
+        start: float = time.perf_counter()
+        try:
+            response = lxd.request(
+                "GET", path, params={**(params or {}), "target": member}, timeout=timeout, deadline=timeout
+            )
+            body: SyncResponse = lxd.codec.loads(response.content)
+            error: Optional[str] = response_error(body)
+        except LXDTimeoutError:
+            body, error = None, f"Timed out after {timeout} seconds"
+        except (LXDError, httpx.HTTPError) as e:
+            body, error = None, str(e) or type(e).__name__
+        return MemberResult(member=member, response=body, error=error, duration=time.perf_counter() - start)
+
+    return {result.member: result for result in lxd.executor.map(ask, members)}
+
+
+async def async_get_cluster(lxd: AsyncLXD) -> Cluster:
+    """Asyncio version of get_cluster().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Returns:
+        Cluster: The cluster configuration.
+    """
+    cluster: SyncResponse = await lxd.get("/1.0/cluster")
+    return Cluster(cluster)
+
+
+async def async_get_cluster_members(lxd: AsyncLXD) -> List[str]:
+    """Asyncio version of get_cluster_members().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Returns:
+        List[str]: The names of the members. Empty if the server is not clustered.
+    """
+    members: SyncResponse = await lxd.get("/1.0/cluster/members")
+    return [url.rsplit("/", 1)[-1] for url in members["metadata"] or []]
+
+
+async def async_fan_out(
+    lxd: AsyncLXD,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    members: Optional[List[str]] = None,
+    timeout: float = 10.0,
+    max_concurrency: int = 32,
+) -> Dict[str, MemberResult]:
+    """Asyncio version of fan_out().
+
+    timeout is a hard limit on the whole request of each member here, not only on each network operation.
+
+    Args:
+        lxd: The asyncio LXD client.
+        path: The path to get. For example, /1.0.
+        params: Extra query parameters. Defaults to None.
+        members: The members to ask. Defaults to every member of the cluster.
+        timeout: Seconds each member gets to answer.
+        max_concurrency: How many members to ask at the same time.
+
+    Returns:
+        Dict[str, MemberResult]: The result of each member, in the order of members.
+    """
+    if members is None:
+        members = await async_get_cluster_members(lxd)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def ask(member: str) -> MemberResult:
+        async with semaphore:
+            start: float = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    lxd.request(
+                        "GET", path, params={**(params or {}), "target": member}, timeout=timeout, deadline=timeout
+                    ),
+                    timeout,
+                )
+                body: SyncResponse = lxd.codec.loads(response.content)
+                error: Optional[str] = response_error(body)
+            except (asyncio.TimeoutError, LXDTimeoutError):
+                body, error = None, f"Timed out after {timeout} seconds"
+            except (LXDError, httpx.HTTPError) as e:
+                body, error = None, str(e) or type(e).__name__
+            return MemberResult(member=member, response=body, error=error, duration=time.perf_counter() - start)
+
+    results: List[MemberResult] = await asyncio.gather(*(ask(member) for member in members))
+    return {result.member: result for result in results}
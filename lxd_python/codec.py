@@ -0,0 +1,72 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class JSONCodec(ABC):
+    """Encodes request bodies and decodes response bodies.
+
+    Bodies are decoded straight from the raw bytes of the response, without decoding them to a str first. Subclasses
+    must implement both dumps() and loads(), or they can't be created.
+    """
+
+    # Name of the JSON library.
+    # Example: orjson
+    name: str = ""
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Encode obj as JSON."""
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Decode JSON."""
+
+
+class StdlibJSONCodec(JSONCodec):
+    """JSON codec using the json module from the standard library."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        # json.loads() detects the encoding of bytes itself.
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using orjson, which is several times faster than the json module on big responses.
+
+    Raises:
+        ImportError: If orjson is not installed.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self._loads(data)
+
+
+def default_codec() -> JSONCodec:
+    """The fastest JSON codec that is installed.
+
+    orjson is used when it is installed (pip install orjson), otherwise the json module.
+
+    Returns:
+        JSONCodec: The codec.
+    """
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibJSONCodec()
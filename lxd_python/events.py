@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from loguru import logger
+
+from lxd_python.exceptions import WebSocketError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Event
+from lxd_python.websocket import OPCODE_TEXT, async_connect, connect
+
+EVENT_TYPES: Tuple[str, ...] = ("lifecycle", "operation", "logging")
+
+
+def events_path(types: Optional[Iterable[str]] = None, project: Optional[str] = None) -> str:
+    """Build the /1.0/events path with its query string.
+
+    Args:
+        types: Only receive these event types. Defaults to all of them.
+        project: Only receive events from this project. Defaults to the default project.
+
+    Raises:
+        ValueError: If an event type is not one of EVENT_TYPES.
+
+    Returns:
+        str: The path. For example, /1.0/events?type=lifecycle%2Coperation.
+    """
+    params: Dict[str, str] = {}
+    if types:
+        types = list(types)
+        unknown: List[str] = [t for t in types if t not in EVENT_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown event types: {', '.join(unknown)}. Valid types: {', '.join(EVENT_TYPES)}")
+        params["type"] = ",".join(types)
+    if project:
+        params["project"] = project
+    return f"/1.0/events?{urlencode(params)}" if params else "/1.0/events"
+
+
+def iter_events(
+    lxd: LXD,
+    types: Optional[Iterable[str]] = None,
+    project: Optional[str] = None,
+    reconnect: bool = True,
+    reconnect_delay: float = 1.0,
+    max_reconnect_delay: float = 30.0,
+) -> Iterator[Event]:
+    """Subscribe to the event stream and yield events one at a time.
+
+    The socket is only read when the next event is asked for, so a slow consumer makes LXD wait instead of events
+    piling up in memory.
+
+    Events sent while reconnecting are lost. Consumers that keep state should reload it after a reconnect.
+
+    Args:
+        lxd: The LXD client.
+        types: Only receive these event types ("lifecycle", "operation" or "logging"). Defaults to all of them.
+        project: Only receive events from this project. Defaults to the default project.
+        reconnect: Reconnect when the connection drops. If False, the generator stops instead.
+        reconnect_delay: Seconds to wait before the first reconnect. Doubled for every failed attempt.
+        max_reconnect_delay: The longest to wait between two reconnects.
+
+    Yields:
+        Event: The events.
+    """
+    path: str = events_path(types, project)
+    delay: float = reconnect_delay
+    while True:
+        try:
+            with connect(lxd, path) as websocket:
+                delay = reconnect_delay
+                while (message := websocket.recv()) is not None:
+                    opcode, payload = message
+                    if opcode == OPCODE_TEXT:
+                        yield Event(lxd.codec.loads(payload))
+        except (OSError, WebSocketError) as e:
+            if not reconnect:
+                raise
+            logger.warning(f"Event stream disconnected: {e}. Reconnecting in {delay} seconds.")
+        else:
+            if not reconnect:
+                return
+
+        time.sleep(delay)
+        delay = min(delay * 2, max_reconnect_delay)
+
+
+async def async_iter_events(
+    lxd: AsyncLXD,
+    types: Optional[Iterable[str]] = None,
+    project: Optional[str] = None,
+    reconnect: bool = True,
+    reconnect_delay: float = 1.0,
+    max_reconnect_delay: float = 30.0,
+) -> AsyncIterator[Event]:
+    """Asyncio version of iter_events().
+
+    Args:
+        lxd: The asyncio LXD client.
+        types: Only receive these event types ("lifecycle", "operation" or "logging"). Defaults to all of them.
+        project: Only receive events from this project. Defaults to the default project.
+        reconnect: Reconnect when the connection drops. If False, the iterator stops instead.
+        reconnect_delay: Seconds to wait before the first reconnect. Doubled for every failed attempt.
+        max_reconnect_delay: The longest to wait between two reconnects.
+
+    Yields:
+        Event: The events.
+    """
+    path: str = events_path(types, project)
+    delay: float = reconnect_delay
+    while True:
+        try:
+            async with await async_connect(lxd, path) as websocket:
+                delay = reconnect_delay
+                while (message := await websocket.recv()) is not None:
+                    opcode, payload = message
+                    if opcode == OPCODE_TEXT:
+                        yield Event(lxd.codec.loads(payload))
+        except (OSError, WebSocketError) as e:
+            if not reconnect:
+                raise
+            logger.warning(f"Event stream disconnected: {e}. Reconnecting in {delay} seconds.")
+        else:
+            if not reconnect:
+                return
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_reconnect_delay)
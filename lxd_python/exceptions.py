@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class LXDError(Exception):
     """The resource was not found."""
 
@@ -13,3 +16,49 @@ class CertNotFoundError(LXDError):
         super().__init__(
             f"404 - Certificate not found\n\nThe certificate with fingerprint '{fingerprint}' was not found. Available certificates:\n{certs_str}"  # noqa: E501
         )
+
+
+class WebSocketError(LXDError):
+    """The websocket could not be opened or was closed unexpectedly."""
+
+
+class LXDTimeoutError(LXDError):
+    """The request or its deadline timed out."""
+
+
+class LXDConnectionError(LXDError):
+    """The LXD server could not be reached, or the connection broke."""
+
+
+class CircuitOpenError(LXDError):
+    """Requests to this endpoint kept failing, so the circuit breaker is not sending any for a while."""
+
+
+class PreconditionFailedError(LXDError):
+    """The object changed on the server since it was read, so the update was not applied."""
+
+    def __init__(self, path: str, etag: Optional[str]) -> None:
+        super().__init__(
+            f"412 - Precondition failed\n\n'{path}' changed on the server since it was read (ETag {etag}). Read it again and redo the change."  # noqa: E501
+        )
+        self.path: str = path
+        self.etag: Optional[str] = etag
+
+
+class OperationFailedError(LXDError):
+    """A background operation failed or was cancelled."""
+
+    def __init__(self, operation_id: str, status: str, err: str) -> None:
+        super().__init__(f"Operation {operation_id} {status.lower()}: {err}")
+        self.operation_id: str = operation_id
+        self.status: str = status
+        self.err: str = err
+
+
+class InstanceNotFoundError(LXDError):
+    """The instance was not found."""
+
+    def __init__(self, name: str, project: Optional[str] = None) -> None:
+        self.name: str = name
+        self.project: str = project or "default"
+        super().__init__(f"404 - Instance not found\n\nThere is no instance '{name}' in project '{self.project}'.")
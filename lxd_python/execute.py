@@ -0,0 +1,775 @@
+import asyncio
+import json
+import selectors
+import shlex
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from lxd_python.exceptions import InstanceNotFoundError, LXDError, LXDTimeoutError, WebSocketError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import InstanceView, Operation
+from lxd_python.operations import async_wait_operation, operation_id, wait_operation, websocket_path
+from lxd_python.websocket import OPCODE_TEXT, AsyncWebSocket, WebSocket, async_connect, connect
+
+# File descriptor numbers of the output, as passed to output callbacks.
+STDOUT: int = 1
+STDERR: int = 2
+
+# Called with the file descriptor (STDOUT or STDERR) and a chunk of output as soon as it arrives.
+OutputCallback = Callable[[int, bytes], None]
+
+# A command, as a list of arguments or as a string that is split like a shell would (but not run by one).
+Command = Union[str, Sequence[str]]
+
+# An instance, by name or as returned by iter_instances().
+Target = Union[str, InstanceView]
+
+# Input for the command, all at once or in chunks.
+Stdin = Union[bytes, Iterable[bytes]]
+
+# Sent to commands that run past their timeout.
+SIGKILL: int = 9
+
+
+@dataclass
+class ExecResult:
+    """The outcome of a command run in an instance."""
+
+    # Name of the instance.
+    # Example: web1
+    instance: str
+
+    # Project of the instance.
+    # Example: default
+    project: str = "default"
+
+    # Exit code of the command, None if it could not be run.
+    # Example: 0
+    exit_code: Optional[int] = None
+
+    # What the command wrote to stdout, empty when it was not captured.
+    stdout: bytes = b""
+
+    # What the command wrote to stderr, empty when it was not captured. Interactive commands only have stdout.
+    stderr: bytes = b""
+
+    # Why the command could not be run, None if it was. A non-zero exit code is not an error.
+    # Example: Instance is not running
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the command ran and exited with 0."""
+        return self.error is None and self.exit_code == 0
+
+
+def exec_path(instance: str) -> str:
+    """The API path to run commands in an instance."""
+    return f"/1.0/instances/{instance}/exec"
+
+
+def _target(instance: Target, project: Optional[str]) -> Tuple[str, Optional[str]]:
+    """The name and project of an instance. Views carry their own project."""
+    if isinstance(instance, InstanceView):
+        return instance.name, instance.project
+    return instance, project
+
+
+def _exec_body(
+    command: Command,
+    environment: Optional[Dict[str, str]],
+    cwd: Optional[str],
+    user: Optional[int],
+    group: Optional[int],
+    interactive: bool,
+    width: Optional[int],
+    height: Optional[int],
+) -> Dict[str, Any]:
+    body: Dict[str, Any] = {
+        "command": shlex.split(command) if isinstance(command, str) else list(command),
+        "environment": environment or {},
+        "interactive": interactive,
+        "wait-for-websocket": True,
+        "record-output": False,
+    }
+    if cwd:
+        body["cwd"] = cwd
+    if user is not None:
+        body["user"] = user
+    if group is not None:
+        body["group"] = group
+    if interactive and width and height:
+        body["width"], body["height"] = width, height
+    return body
+
+
+def _started(response: Dict[str, Any], instance: str, project: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """The operation of a started exec and the secrets of its websockets."""
+    if response["error_code"] == 404:
+        raise InstanceNotFoundError(instance, project)
+    if response["error_code"]:
+        raise LXDError(f"{response['error_code']} - Could not run a command in {instance}: {response['error']}")
+    return response["operation"], response["metadata"]["metadata"]["fds"]
+
+
+def _eof(message: Optional[Tuple[int, bytes]]) -> bool:
+    """LXD ends a stream by closing its websocket, or with an empty text message."""
+    return message is None or (message[0] == OPCODE_TEXT and not message[1])
+
+
+def _signal_message(signal: int) -> str:
+    return json.dumps({"command": "signal", "signal": signal})
+
+
+def _resize_message(width: int, height: int) -> str:
+    return json.dumps({"command": "window-resize", "args": {"width": str(width), "height": str(height)}})
+
+
+def _exit_code(metadata: Optional[Dict[str, Any]]) -> int:
+    return int((metadata or {}).get("return", -1))
+
+
+def _remaining(expires: Optional[float]) -> Optional[float]:
+    return None if expires is None else max(0.0, expires - time.monotonic())
+
+
+class ExecSession:
+    """A command running in an instance, with its stdin, stdout, stderr and control websockets.
+
+    Returned by start_exec(). Write input with write() and close_stdin(), read output with output() and get the exit
+    code with wait(). Interactive commands run in a terminal, so stdin and the output share one websocket.
+    """
+
+    def __init__(
+        self, lxd: LXD, instance: str, project: str, operation: str, websockets: Dict[str, WebSocket], interactive: bool
+    ) -> None:
+        self.lxd: LXD = lxd
+        self.instance: str = instance
+        self.project: str = project
+        self.operation: str = operation
+        self.interactive: bool = interactive
+        self.stdin: WebSocket = websockets["0"]
+        self.stdout: Optional[WebSocket] = websockets.get("1")
+        self.stderr: Optional[WebSocket] = websockets.get("2")
+        self.control: WebSocket = websockets["control"]
+        self._websockets: List[WebSocket] = list(websockets.values())
+
+    def write(self, data: bytes) -> None:
+        """Send input to the command."""
+        self.stdin.send(bytes(data))
+
+    def close_stdin(self) -> None:
+        """Tell the command there is no more input."""
+        self.stdin.send("")
+
+    def signal(self, signal: int) -> None:
+        """Send a signal to the command. For example, signal.SIGTERM."""
+        self.control.send(_signal_message(signal))
+
+    def resize(self, width: int, height: int) -> None:
+        """Change the size of the terminal of an interactive command."""
+        self.control.send(_resize_message(width, height))
+
+    def output(self, timeout: Optional[float] = None) -> Iterator[Tuple[int, bytes]]:
+        """Read the output as it arrives, from stdout and stderr at the same time, until the command closes both.
+
+        Args:
+            timeout: Seconds to wait for all of the output. Defaults to waiting forever.
+
+        Raises:
+            LXDTimeoutError: If the output did not end in time.
+            WebSocketError: If a connection broke.
+
+        Yields:
+            Tuple[int, bytes]: STDOUT or STDERR, and a chunk of output.
+        """
+        expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        streams: Dict[WebSocket, int] = {}
+        if self.interactive:
+            streams[self.stdin] = STDOUT
+        else:
+            streams.update(
+                {websocket: fd for websocket, fd in ((self.stdout, STDOUT), (self.stderr, STDERR)) if websocket}
+            )
+
+        with selectors.DefaultSelector() as selector:
+            for websocket in streams:
+                selector.register(websocket, selectors.EVENT_READ)
+            while streams:
+                # Frames already in a buffer don't make the socket readable again.
+                ready: List[Any] = [websocket for websocket in streams if websocket.pending]
+                if not ready:
+                    remaining: Optional[float] = _remaining(expires)
+                    if remaining == 0:
+                        raise LXDTimeoutError(f"The command in {self.instance} did not finish in time.")
+                    ready = [key.fileobj for key, _ in selector.select(remaining)]
+
+                for websocket in ready:
+                    message: Optional[Tuple[int, bytes]] = websocket.recv()
+                    if _eof(message):
+                        selector.unregister(websocket)
+                        del streams[websocket]
+                    elif message[1]:
+                        yield streams[websocket], message[1]
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the command to exit, and close the websockets.
+
+        When it times out, the websockets stay open, so the command can still be signalled or killed.
+
+        Args:
+            timeout: Seconds to wait. Defaults to waiting forever.
+
+        Raises:
+            LXDTimeoutError: If the command is still running after timeout seconds.
+            OperationFailedError: If LXD could not run the command.
+
+        Returns:
+            int: The exit code of the command.
+        """
+        try:
+            finished: Operation = wait_operation(self.lxd, self.operation, timeout)
+        except LXDTimeoutError:
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self.close()
+        return _exit_code(finished.metadata)
+
+    def kill(self) -> None:
+        """Send SIGKILL to the command, if the control websocket still works."""
+        try:
+            self.signal(SIGKILL)
+        except (OSError, WebSocketError):
+            pass
+
+    def close(self) -> None:
+        """Close the websockets. The command keeps running if it has not exited yet."""
+        for websocket in self._websockets:
+            websocket.close()
+
+    def __enter__(self) -> "ExecSession":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def start_exec(
+    lxd: LXD,
+    instance: Target,
+    command: Command,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    interactive: bool = False,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    project: Optional[str] = None,
+) -> ExecSession:
+    """Start a command in an instance and attach to its websockets.
+
+    LXD waits for all the websockets to be connected before it starts the command, so no output is lost.
+
+    Example:
+        with start_exec(lxd, "web1", ["tail", "-f", "/var/log/nginx/access.log"]) as session:
+            session.close_stdin()
+            for fd, chunk in session.output():
+                print(chunk.decode(), end="")
+
+    Args:
+        lxd: The LXD client.
+        instance: Name of the instance, or the instance.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        interactive: Run the command in a terminal.
+        width: Width of the terminal of an interactive command.
+        height: Height of the terminal of an interactive command.
+        project: Project of the instance. Defaults to the default project, or the project of an InstanceView.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDError: If the command could not be started, for example because the instance is stopped.
+        WebSocketError: If a websocket could not be opened.
+
+    Returns:
+        ExecSession: The running command.
+    """
+    name, project = _target(instance, project)
+    body: Dict[str, Any] = _exec_body(command, environment, cwd, user, group, interactive, width, height)
+    response = lxd.request("POST", exec_path(name), params={"project": project} if project else None, data=body)
+    operation, fds = _started(lxd.codec.loads(response.content), name, project)
+
+    websockets: Dict[str, WebSocket] = {}
+    try:
+        for fd, secret in fds.items():
+            websockets[fd] = connect(lxd, websocket_path(operation, secret), timeout=lxd.timeout)
+    except BaseException:
+        for websocket in websockets.values():
+            websocket.close()
+        raise
+    # Writing input waits for the command to read it, which can take longer than the client timeout.
+    websockets["0"].sock.settimeout(None)
+    return ExecSession(lxd, name, project or "default", operation_id(operation), websockets, interactive)
+
+
+def _write_stdin(session: ExecSession, stdin: Optional[Stdin]) -> None:
+    try:
+        for chunk in [stdin] if isinstance(stdin, (bytes, bytearray, memoryview)) else stdin or ():
+            session.write(chunk)
+        session.close_stdin()
+    except (OSError, WebSocketError):
+        # The command exited without reading all of its input.
+        pass
+
+
+def exec_command(
+    lxd: LXD,
+    instance: Target,
+    command: Command,
+    stdin: Optional[Stdin] = None,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    project: Optional[str] = None,
+    timeout: Optional[float] = None,
+    output: Optional[OutputCallback] = None,
+    capture: bool = True,
+) -> ExecResult:
+    """Run a command in an instance and wait for it to exit.
+
+    stdout and stderr are read as they arrive, in one thread with selectors. Pass output= to handle them as they
+    come, and capture=False to not keep them in memory.
+
+    Example:
+        result = exec_command(lxd, "web1", "systemctl is-active nginx", timeout=10)
+        if not result.ok:
+            print(result.stderr.decode())
+
+    Args:
+        lxd: The LXD client.
+        instance: Name of the instance, or the instance.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        stdin: Input for the command, bytes or an iterable of chunks. Defaults to no input.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        project: Project of the instance. Defaults to the default project, or the project of an InstanceView.
+        timeout: Seconds the command may run. It is killed after that. Defaults to waiting forever.
+        output: Called with STDOUT or STDERR and each chunk of output as it arrives.
+        capture: Keep the output in the result.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDTimeoutError: If the command did not finish in time.
+        LXDError: If the command could not be run.
+
+    Returns:
+        ExecResult: The exit code and output of the command.
+    """
+    expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+    captured: Dict[int, List[bytes]] = {STDOUT: [], STDERR: []}
+    with start_exec(lxd, instance, command, environment, cwd, user, group, project=project) as session:
+        writer: Optional[threading.Thread] = None
+        if stdin is None:
+            session.close_stdin()
+        else:
+            # From another thread, so a command that writes a lot before reading its input can't deadlock.
+            writer = threading.Thread(target=_write_stdin, args=(session, stdin), daemon=True)
+            writer.start()
+        try:
+            for fd, chunk in session.output(_remaining(expires)):
+                if output is not None:
+                    output(fd, chunk)
+                if capture:
+                    captured[fd].append(chunk)
+            exit_code: int = session.wait(_remaining(expires))
+        except LXDTimeoutError:
+            session.kill()
+            raise
+        if writer is not None:
+            writer.join()
+
+    return ExecResult(
+        instance=session.instance,
+        project=session.project,
+        exit_code=exit_code,
+        stdout=b"".join(captured[STDOUT]),
+        stderr=b"".join(captured[STDERR]),
+    )
+
+
+def exec_many(
+    lxd: LXD,
+    instances: Iterable[Target],
+    command: Command,
+    stdin: Optional[bytes] = None,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    project: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> List[ExecResult]:
+    """Run the same command in many instances at the same time, from the thread pool of the client.
+
+    A failing instance does not stop the others, check the result of each one. For thousands of instances,
+    async_exec_many() runs many more commands at once than there are threads.
+
+    Example:
+        running = iter_instances(lxd, filter="status eq Running", all_projects=True)
+        failed = [r.instance for r in exec_many(lxd, running, "systemctl is-system-running", timeout=10) if not r.ok]
+
+    Args:
+        lxd: The LXD client. At most lxd.max_workers commands run at the same time.
+        instances: Names of the instances, or the instances.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        stdin: Input for every command. Defaults to no input.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        project: Project of instances given by name. Defaults to the default project.
+        timeout: Seconds each command may run. It is killed after that. Defaults to waiting forever.
+
+    Returns:
+        List[ExecResult]: One result per instance, in the same order.
+    """
+
+    def run(target: Tuple[str, Optional[str]]) -> ExecResult:
+        name, target_project = target
+        try:
+            return exec_command(
+                lxd, name, command, stdin, environment, cwd, user, group, target_project, timeout=timeout
+            )
+        except Exception as e:
+            return ExecResult(instance=name, project=target_project or "default", error=str(e) or type(e).__name__)
+
+    targets: List[Tuple[str, Optional[str]]] = [_target(instance, project) for instance in instances]
+    if not targets:
+        return []
+    return list(lxd.executor.map(run, targets))
+
+
+class AsyncExecSession:
+    """Asyncio version of ExecSession."""
+
+    def __init__(
+        self,
+        lxd: AsyncLXD,
+        instance: str,
+        project: str,
+        operation: str,
+        websockets: Dict[str, AsyncWebSocket],
+        interactive: bool,
+    ) -> None:
+        self.lxd: AsyncLXD = lxd
+        self.instance: str = instance
+        self.project: str = project
+        self.operation: str = operation
+        self.interactive: bool = interactive
+        self.stdin: AsyncWebSocket = websockets["0"]
+        self.stdout: Optional[AsyncWebSocket] = websockets.get("1")
+        self.stderr: Optional[AsyncWebSocket] = websockets.get("2")
+        self.control: AsyncWebSocket = websockets["control"]
+        self._websockets: List[AsyncWebSocket] = list(websockets.values())
+
+    async def write(self, data: bytes) -> None:
+        """Asyncio version of ExecSession.write()."""
+        await self.stdin.send(bytes(data))
+
+    async def close_stdin(self) -> None:
+        """Asyncio version of ExecSession.close_stdin()."""
+        await self.stdin.send("")
+
+    async def signal(self, signal: int) -> None:
+        """Asyncio version of ExecSession.signal()."""
+        await self.control.send(_signal_message(signal))
+
+    async def resize(self, width: int, height: int) -> None:
+        """Asyncio version of ExecSession.resize()."""
+        await self.control.send(_resize_message(width, height))
+
+    async def output(self, timeout: Optional[float] = None) -> AsyncIterator[Tuple[int, bytes]]:
+        """Asyncio version of ExecSession.output().
+
+        Args:
+            timeout: Seconds to wait for all of the output. Defaults to waiting forever.
+
+        Raises:
+            LXDTimeoutError: If the output did not end in time.
+            WebSocketError: If a connection broke.
+
+        Yields:
+            Tuple[int, bytes]: STDOUT or STDERR, and a chunk of output.
+        """
+        expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        streams: List[Tuple[int, AsyncWebSocket]]
+        if self.interactive:
+            streams = [(STDOUT, self.stdin)]
+        else:
+            streams = [(fd, websocket) for fd, websocket in ((STDOUT, self.stdout), (STDERR, self.stderr)) if websocket]
+
+        # Small, so a slow consumer makes LXD wait instead of output piling up in memory.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+
+        async def read(fd: int, websocket: AsyncWebSocket) -> None:
+            try:
+                while not _eof(message := await websocket.recv()):
+                    if message[1]:
+                        await queue.put((fd, message[1]))
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        readers: List[asyncio.Task] = [asyncio.create_task(read(fd, websocket)) for fd, websocket in streams]
+        try:
+            open_streams: int = len(readers)
+            while open_streams:
+                try:
+                    item: Any = await asyncio.wait_for(queue.get(), _remaining(expires))
+                except asyncio.TimeoutError:
+                    raise LXDTimeoutError(f"The command in {self.instance} did not finish in time.") from None
+                if item is None:
+                    open_streams -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for reader in readers:
+                reader.cancel()
+
+    async def wait(self, timeout: Optional[float] = None) -> int:
+        """Asyncio version of ExecSession.wait().
+
+        Args:
+            timeout: Seconds to wait. Defaults to waiting forever.
+
+        Raises:
+            LXDTimeoutError: If the command is still running after timeout seconds.
+            OperationFailedError: If LXD could not run the command.
+
+        Returns:
+            int: The exit code of the command.
+        """
+        try:
+            finished: Operation = await async_wait_operation(self.lxd, self.operation, timeout)
+        except LXDTimeoutError:
+            raise
+        except BaseException:
+            await self.close()
+            raise
+        await self.close()
+        return _exit_code(finished.metadata)
+
+    async def kill(self) -> None:
+        """Asyncio version of ExecSession.kill()."""
+        try:
+            await self.signal(SIGKILL)
+        except (OSError, WebSocketError):
+            pass
+
+    async def close(self) -> None:
+        """Asyncio version of ExecSession.close()."""
+        for websocket in self._websockets:
+            await websocket.close()
+
+    async def __aenter__(self) -> "AsyncExecSession":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+async def async_start_exec(
+    lxd: AsyncLXD,
+    instance: Target,
+    command: Command,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    interactive: bool = False,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    project: Optional[str] = None,
+) -> AsyncExecSession:
+    """Asyncio version of start_exec(). The websockets are connected at the same time.
+
+    Args:
+        lxd: The asyncio LXD client.
+        instance: Name of the instance, or the instance.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        interactive: Run the command in a terminal.
+        width: Width of the terminal of an interactive command.
+        height: Height of the terminal of an interactive command.
+        project: Project of the instance. Defaults to the default project, or the project of an InstanceView.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDError: If the command could not be started, for example because the instance is stopped.
+        WebSocketError: If a websocket could not be opened.
+
+    Returns:
+        AsyncExecSession: The running command.
+    """
+    name, project = _target(instance, project)
+    body: Dict[str, Any] = _exec_body(command, environment, cwd, user, group, interactive, width, height)
+    response = await lxd.request("POST", exec_path(name), params={"project": project} if project else None, data=body)
+    operation, fds = _started(lxd.codec.loads(response.content), name, project)
+
+    connecting: List[Any] = await asyncio.gather(
+        *(
+            asyncio.wait_for(async_connect(lxd, websocket_path(operation, secret)), lxd.timeout)
+            for secret in fds.values()
+        ),
+        return_exceptions=True,
+    )
+    websockets: Dict[str, AsyncWebSocket] = {
+        fd: websocket for fd, websocket in zip(fds, connecting) if isinstance(websocket, AsyncWebSocket)
+    }
+    failed: List[BaseException] = [error for error in connecting if isinstance(error, BaseException)]
+    if failed:
+        for websocket in websockets.values():
+            await websocket.close()
+        if isinstance(failed[0], asyncio.TimeoutError):
+            raise LXDTimeoutError(f"Could not connect to the command in {name} in time.")
+        raise failed[0]
+    return AsyncExecSession(lxd, name, project or "default", operation_id(operation), websockets, interactive)
+
+
+async def _async_write_stdin(session: AsyncExecSession, stdin: Optional[Stdin]) -> None:
+    try:
+        for chunk in [stdin] if isinstance(stdin, (bytes, bytearray, memoryview)) else stdin or ():
+            await session.write(chunk)
+        await session.close_stdin()
+    except (OSError, WebSocketError):
+        pass
+
+
+async def async_exec_command(
+    lxd: AsyncLXD,
+    instance: Target,
+    command: Command,
+    stdin: Optional[Stdin] = None,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    project: Optional[str] = None,
+    timeout: Optional[float] = None,
+    output: Optional[OutputCallback] = None,
+    capture: bool = True,
+) -> ExecResult:
+    """Asyncio version of exec_command().
+
+    Args:
+        lxd: The asyncio LXD client.
+        instance: Name of the instance, or the instance.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        stdin: Input for the command, bytes or an iterable of chunks. Defaults to no input.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        project: Project of the instance. Defaults to the default project, or the project of an InstanceView.
+        timeout: Seconds the command may run. It is killed after that. Defaults to waiting forever.
+        output: Called with STDOUT or STDERR and each chunk of output as it arrives.
+        capture: Keep the output in the result.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDTimeoutError: If the command did not finish in time.
+        LXDError: If the command could not be run.
+
+    Returns:
+        ExecResult: The exit code and output of the command.
+    """
+    expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+    captured: Dict[int, List[bytes]] = {STDOUT: [], STDERR: []}
+    session: AsyncExecSession = await async_start_exec(
+        lxd, instance, command, environment, cwd, user, group, project=project
+    )
+    async with session:
+        writer: asyncio.Task = asyncio.create_task(_async_write_stdin(session, stdin))
+        try:
+            async for fd, chunk in session.output(_remaining(expires)):
+                if output is not None:
+                    output(fd, chunk)
+                if capture:
+                    captured[fd].append(chunk)
+            exit_code: int = await session.wait(_remaining(expires))
+        except LXDTimeoutError:
+            await session.kill()
+            raise
+        finally:
+            writer.cancel()
+
+    return ExecResult(
+        instance=session.instance,
+        project=session.project,
+        exit_code=exit_code,
+        stdout=b"".join(captured[STDOUT]),
+        stderr=b"".join(captured[STDERR]),
+    )
+
+
+async def async_exec_many(
+    lxd: AsyncLXD,
+    instances: Iterable[Target],
+    command: Command,
+    stdin: Optional[bytes] = None,
+    environment: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    user: Optional[int] = None,
+    group: Optional[int] = None,
+    project: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_concurrency: int = 64,
+) -> List[ExecResult]:
+    """Asyncio version of exec_many().
+
+    Every command holds four connections while it runs, keep max_concurrency below what the server allows.
+
+    Args:
+        lxd: The asyncio LXD client.
+        instances: Names of the instances, or the instances.
+        command: The command and its arguments. A string is split like a shell would, but not run by one.
+        stdin: Input for every command. Defaults to no input.
+        environment: Environment variables of the command.
+        cwd: The working directory. Defaults to the home directory of the user.
+        user: The user ID to run the command as. Defaults to root.
+        group: The group ID to run the command as. Defaults to root.
+        project: Project of instances given by name. Defaults to the default project.
+        timeout: Seconds each command may run. It is killed after that. Defaults to waiting forever.
+        max_concurrency: How many commands to run at the same time.
+
+    Returns:
+        List[ExecResult]: One result per instance, in the same order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(name: str, target_project: Optional[str]) -> ExecResult:
+        async with semaphore:
+            try:
+                return await async_exec_command(
+                    lxd, name, command, stdin, environment, cwd, user, group, target_project, timeout=timeout
+                )
+            except Exception as e:
+                return ExecResult(instance=name, project=target_project or "default", error=str(e) or type(e).__name__)
+
+    return list(await asyncio.gather(*(run(*_target(instance, project)) for instance in instances)))
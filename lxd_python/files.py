@@ -0,0 +1,391 @@
+import asyncio
+import io
+import os
+import stat
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from httpx import Headers, Response
+
+from lxd_python.codec import JSONCodec
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD, AsyncLXD, RequestContent
+from lxd_python.models import SyncResponse
+
+# Bytes read from or written to a file at a time. Pushing or pulling a file of any size uses about this much memory.
+CHUNK_SIZE: int = 256 * 1024
+
+# What to push: the content as bytes, the path of a local file, a binary file object or an iterator of chunks.
+FileSource = Union[bytes, bytearray, memoryview, str, "os.PathLike[str]", BinaryIO, Iterable[bytes]]
+
+# What to push from asyncio: the same as FileSource, or an async iterator of chunks.
+AsyncFileSource = Union[FileSource, AsyncIterable[bytes]]
+
+
+@dataclass
+class FileInfo:
+    """The owner, permissions and type of a file in an instance."""
+
+    # User ID of the owner.
+    # Example: 1000
+    uid: int
+
+    # Group ID of the owner.
+    # Example: 1000
+    gid: int
+
+    # Permission bits.
+    # Example: 0o644
+    mode: int
+
+    # Type of the file (one of "file", "directory" or "symlink").
+    # Example: file
+    file_type: str
+
+    @classmethod
+    def from_headers(cls, headers: Headers) -> "FileInfo":
+        """Read the X-LXD-* headers LXD sends with a file."""
+        return cls(
+            uid=int(headers.get("X-LXD-uid", 0)),
+            gid=int(headers.get("X-LXD-gid", 0)),
+            mode=int(headers.get("X-LXD-mode", "0"), 8),
+            file_type=headers.get("X-LXD-type", "file"),
+        )
+
+
+class FileDownload:
+    """A file being pulled from an instance.
+
+    Iterate over it to get the content in chunks, only one of which is in memory at a time. The connection goes back
+    to the pool when the iteration ends or close() is called, so use a with block if you might stop early.
+
+    Example:
+        with pull_file(lxd, "web", "/var/log/syslog") as download:
+            for chunk in download:
+                ...
+    """
+
+    def __init__(self, response: Response, chunk_size: int = CHUNK_SIZE) -> None:
+        self.response: Response = response
+        self.info: FileInfo = FileInfo.from_headers(response.headers)
+        self.chunk_size: int = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from self.response.iter_bytes(self.chunk_size)
+        finally:
+            self.close()
+
+    def save(self, destination: Union[str, "os.PathLike[str]"]) -> int:
+        """Write the file to a local path.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written: int = 0
+        with open(destination, "wb") as f:
+            for chunk in self:
+                written += f.write(chunk)
+        return written
+
+    def close(self) -> None:
+        """Stop downloading and release the connection."""
+        self.response.close()
+
+    def __enter__(self) -> "FileDownload":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class AsyncFileDownload:
+    """Asyncio version of FileDownload.
+
+    Example:
+        async with await async_pull_file(lxd, "web", "/var/log/syslog") as download:
+            async for chunk in download:
+                ...
+    """
+
+    def __init__(self, response: Response, chunk_size: int = CHUNK_SIZE) -> None:
+        self.response: Response = response
+        self.info: FileInfo = FileInfo.from_headers(response.headers)
+        self.chunk_size: int = chunk_size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self.response.aiter_bytes(self.chunk_size):
+                yield chunk
+        finally:
+            await self.close()
+
+    async def save(self, destination: Union[str, "os.PathLike[str]"]) -> int:
+        """Write the file to a local path. The writes happen in a thread so they don't block the event loop.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written: int = 0
+        with open(destination, "wb") as f:
+            async for chunk in self:
+                written += await asyncio.to_thread(f.write, chunk)
+        return written
+
+    async def close(self) -> None:
+        """Stop downloading and release the connection."""
+        await self.response.aclose()
+
+    async def __aenter__(self) -> "AsyncFileDownload":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+
+def push_file(
+    lxd: LXD,
+    instance: str,
+    path: str,
+    source: FileSource,
+    uid: Optional[int] = None,
+    gid: Optional[int] = None,
+    mode: Optional[int] = None,
+    project: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> SyncResponse:
+    """Create or overwrite a file in an instance.
+
+    Files are streamed chunk_size bytes at a time, read into one reused buffer, so memory use does not depend on the
+    size of the file. The size of local files is sent up front, other sources are sent with chunked encoding.
+
+    Args:
+        lxd: The LXD client.
+        instance: Name of the instance.
+        path: Path of the file in the instance.
+        source: The content as bytes, the path of a local file, a binary file object or an iterator of bytes.
+        uid: User ID of the owner. Defaults to the server's default.
+        gid: Group ID of the owner. Defaults to the server's default.
+        mode: Permission bits, for example 0o644. Defaults to the server's default.
+        project: Project of the instance. Defaults to the default project.
+        chunk_size: Bytes to read and send at a time.
+
+    Raises:
+        LXDError: If the request failed. See LXD.request().
+
+    Returns:
+        SyncResponse: The response from the LXD server.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return push_file(lxd, instance, path, f, uid, gid, mode, project, chunk_size)
+
+    content, size = _content(source, chunk_size)
+    response: Response = lxd.request(
+        "POST",
+        files_path(instance),
+        params=_params(path, project),
+        headers=_push_headers(uid, gid, mode, size),
+        content=content,
+    )
+    return lxd.codec.loads(response.content)
+
+
+def pull_file(
+    lxd: LXD, instance: str, path: str, project: Optional[str] = None, chunk_size: int = CHUNK_SIZE
+) -> FileDownload:
+    """Start downloading a file from an instance.
+
+    Nothing but the headers is read until the download is iterated over or saved.
+
+    Args:
+        lxd: The LXD client.
+        instance: Name of the instance.
+        path: Path of the file in the instance.
+        project: Project of the instance. Defaults to the default project.
+        chunk_size: Bytes to return at a time.
+
+    Raises:
+        LXDError: If the file could not be read, for example because it does not exist.
+
+    Returns:
+        FileDownload: The download.
+    """
+    response: Response = lxd.request("GET", files_path(instance), params=_params(path, project), stream=True)
+    if response.status_code != 200:
+        response.read()
+        response.close()
+        raise LXDError(_pull_error(lxd.codec, response, instance, path))
+    return FileDownload(response, chunk_size)
+
+
+def files_path(instance: str) -> str:
+    """The API path of the files of an instance."""
+    return f"/1.0/instances/{instance}/files"
+
+
+def _params(path: str, project: Optional[str]) -> Dict[str, str]:
+    params: Dict[str, str] = {"path": path}
+    if project:
+        params["project"] = project
+    return params
+
+
+def _push_headers(uid: Optional[int], gid: Optional[int], mode: Optional[int], size: Optional[int]) -> Dict[str, str]:
+    headers: Dict[str, str] = {"Content-Type": "application/octet-stream", "X-LXD-type": "file"}
+    if uid is not None:
+        headers["X-LXD-uid"] = str(uid)
+    if gid is not None:
+        headers["X-LXD-gid"] = str(gid)
+    if mode is not None:
+        headers["X-LXD-mode"] = f"{mode:04o}"
+    if size is not None:
+        # A known size is sent as Content-Length instead of chunked encoding.
+        headers["Content-Length"] = str(size)
+    return headers
+
+
+def _pull_error(codec: JSONCodec, response: Response, instance: str, path: str) -> str:
+    try:
+        error: str = codec.loads(response.content)["error"]
+    except (ValueError, KeyError, TypeError):
+        error = response.text
+    return f"{response.status_code} - Could not pull '{path}' from instance '{instance}': {error}"
+
+
+def _content(source: FileSource, chunk_size: int) -> Tuple[RequestContent, Optional[int]]:
+    """The request body for a source and its size, if it is known without reading it."""
+    if isinstance(source, bytes):
+        return source, len(source)
+    if isinstance(source, (bytearray, memoryview)):
+        view = memoryview(source).cast("B")
+        return _slices(view, chunk_size), view.nbytes
+    if hasattr(source, "readinto"):
+        return _read_chunks(source, chunk_size), _remaining_size(source)
+    if hasattr(source, "read"):
+        return iter(lambda: source.read(chunk_size), b""), None
+    return source, None
+
+
+def _slices(view: memoryview, chunk_size: int) -> Iterator[memoryview]:
+    """Send a buffer in chunks without copying it."""
+    for start in range(0, view.nbytes, chunk_size):
+        yield view[start : start + chunk_size]
+
+
+def _read_chunks(file: BinaryIO, chunk_size: int) -> Iterator[memoryview]:
+    """Read a file into one reused buffer. Each chunk is sent before the next one is read over it."""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while read := file.readinto(buffer):  # type: ignore[attr-defined]
+        yield view[:read]
+
+
+def _remaining_size(file: BinaryIO) -> Optional[int]:
+    """The bytes left to read in a regular file, None for pipes, sockets and other streams."""
+    try:
+        status: os.stat_result = os.fstat(file.fileno())
+        if not stat.S_ISREG(status.st_mode):
+            return None
+        return status.st_size - file.tell()
+    except (AttributeError, OSError, TypeError, io.UnsupportedOperation):
+        return None
+
+
+async def async_push_file(
+    lxd: AsyncLXD,
+    instance: str,
+    path: str,
+    source: AsyncFileSource,
+    uid: Optional[int] = None,
+    gid: Optional[int] = None,
+    mode: Optional[int] = None,
+    project: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> SyncResponse:
+    """Asyncio version of push_file().
+
+    Local files are read in a thread so reading them doesn't block the event loop.
+
+    Args:
+        lxd: The asyncio LXD client.
+        instance: Name of the instance.
+        path: Path of the file in the instance.
+        source: The content as bytes, the path of a local file, a binary file object or a (async) iterator of bytes.
+        uid: User ID of the owner. Defaults to the server's default.
+        gid: Group ID of the owner. Defaults to the server's default.
+        mode: Permission bits, for example 0o644. Defaults to the server's default.
+        project: Project of the instance. Defaults to the default project.
+        chunk_size: Bytes to read and send at a time.
+
+    Raises:
+        LXDError: If the request failed. See AsyncLXD.request().
+
+    Returns:
+        SyncResponse: The response from the LXD server.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return await async_push_file(lxd, instance, path, f, uid, gid, mode, project, chunk_size)
+
+    content: RequestContent
+    size: Optional[int] = None
+    if isinstance(source, bytes):
+        content, size = source, len(source)
+    elif hasattr(source, "__aiter__"):
+        content = source  # type: ignore[assignment]
+    else:
+        if hasattr(source, "readinto"):
+            size = _remaining_size(source)  # type: ignore[arg-type]
+        # The async client can only stream async iterators.
+        content = _async_chunks(source, chunk_size)  # type: ignore[arg-type]
+
+    response: Response = await lxd.request(
+        "POST",
+        files_path(instance),
+        params=_params(path, project),
+        headers=_push_headers(uid, gid, mode, size),
+        content=content,
+    )
+    return lxd.codec.loads(response.content)
+
+
+async def async_pull_file(
+    lxd: AsyncLXD, instance: str, path: str, project: Optional[str] = None, chunk_size: int = CHUNK_SIZE
+) -> AsyncFileDownload:
+    """Asyncio version of pull_file().
+
+    Args:
+        lxd: The asyncio LXD client.
+        instance: Name of the instance.
+        path: Path of the file in the instance.
+        project: Project of the instance. Defaults to the default project.
+        chunk_size: Bytes to return at a time.
+
+    Raises:
+        LXDError: If the file could not be read, for example because it does not exist.
+
+    Returns:
+        AsyncFileDownload: The download.
+    """
+    response: Response = await lxd.request("GET", files_path(instance), params=_params(path, project), stream=True)
+    if response.status_code != 200:
+        await response.aread()
+        await response.aclose()
+        raise LXDError(_pull_error(lxd.codec, response, instance, path))
+    return AsyncFileDownload(response, chunk_size)
+
+
+async def _async_chunks(source: Union[BinaryIO, Iterable[bytes]], chunk_size: int) -> AsyncIterator[bytes]:
+    """Turn a file object or an iterator into an async iterator, reading files in a thread."""
+    if hasattr(source, "readinto"):
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while read := await asyncio.to_thread(source.readinto, buffer):  # type: ignore[union-attr]
+            yield view[:read]  # type: ignore[misc]
+    elif hasattr(source, "read"):
+        while chunk := await asyncio.to_thread(source.read, chunk_size):  # type: ignore[union-attr]
+            yield chunk
+    else:
+        for chunk in _content(source, chunk_size)[0]:  # type: ignore[union-attr]
+            yield chunk
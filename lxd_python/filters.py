@@ -0,0 +1,111 @@
+import shlex
+from typing import Any, Callable, List, Mapping
+
+# Tests an object from the API, as the mapping of its JSON fields.
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+
+def compile_filter(expression: str) -> Predicate:
+    """Compile a filter= expression, to filter objects the way the server does when it can't.
+
+    Supports what LXD supports: "field eq value" and "field ne value", combined with "and", "or" and "not". Fields are
+    JSON names, with dots for nested fields and config keys, like "config.image.os". Values with spaces are quoted.
+    "not" binds tighter than "and", which binds tighter than "or".
+
+    Example:
+        compile_filter("status eq Running and config.image.os eq ubuntu")
+
+    Args:
+        expression: The filter.
+
+    Raises:
+        ValueError: If the expression is not a valid filter.
+
+    Returns:
+        Predicate: A function that returns whether an object matches.
+    """
+    tokens: List[str] = shlex.split(expression)
+    parser = _FilterParser(tokens, expression)
+    predicate: Predicate = parser.parse_or()
+    if parser.position != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[parser.position]}' in filter '{expression}'")
+    return predicate
+
+
+def lookup(obj: Mapping[str, Any], field: str) -> Any:
+    """Get a field by its dotted path. Keys with dots in them, like those of config, are found too.
+
+    Example:
+        lookup({"config": {"image.os": "ubuntu"}}, "config.image.os") == "ubuntu"
+    """
+    value: Any = obj
+    parts: List[str] = field.split(".")
+    for index, part in enumerate(parts):
+        if not isinstance(value, Mapping):
+            return None
+        if part in value:
+            value = value[part]
+            continue
+        return value.get(".".join(parts[index:]))
+    return value
+
+
+def _text(value: Any) -> str:
+    """The value as the server compares it."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+class _FilterParser:
+    """A recursive descent parser for filter expressions."""
+
+    def __init__(self, tokens: List[str], expression: str) -> None:
+        self.tokens: List[str] = tokens
+        self.expression: str = expression
+        self.position: int = 0
+
+    def _peek(self) -> str:
+        return self.tokens[self.position].lower() if self.position < len(self.tokens) else ""
+
+    def _take(self) -> str:
+        if self.position >= len(self.tokens):
+            raise ValueError(f"Filter '{self.expression}' ends too early")
+        token: str = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse_or(self) -> Predicate:
+        predicates: List[Predicate] = [self.parse_and()]
+        while self._peek() == "or":
+            self.position += 1
+            predicates.append(self.parse_and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda obj: any(predicate(obj) for predicate in predicates)
+
+    def parse_and(self) -> Predicate:
+        predicates: List[Predicate] = [self.parse_not()]
+        while self._peek() == "and":
+            self.position += 1
+            predicates.append(self.parse_not())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda obj: all(predicate(obj) for predicate in predicates)
+
+    def parse_not(self) -> Predicate:
+        if self._peek() == "not":
+            self.position += 1
+            inner: Predicate = self.parse_not()
+            return lambda obj: not inner(obj)
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Predicate:
+        field: str = self._take()
+        operator: str = self._take().lower()
+        value: str = self._take()
+        if operator == "eq":
+            return lambda obj: _text(lookup(obj, field)) == value
+        if operator == "ne":
+            return lambda obj: _text(lookup(obj, field)) != value
+        raise ValueError(f"Unknown operator '{operator}' in filter '{self.expression}', use eq or ne")
@@ -0,0 +1,491 @@
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from httpx import Response
+
+from lxd_python.codec import JSONCodec
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Operation
+from lxd_python.operations import async_wait_operation, wait_operation
+
+# Bytes read from disk and sent at a time. Images are big, so larger chunks than for instance files.
+CHUNK_SIZE: int = 1024 * 1024
+
+# Called with the bytes transferred so far and the total, None if the server did not say how much is coming.
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+@dataclass
+class ImageExport:
+    """An image exported to local files."""
+
+    # Fingerprint of the image, computed while it was downloaded.
+    # Example: 06b86454720d36b20f94e31c6812e05ec51c1b568cf3a8abd273769d213394bb
+    fingerprint: str
+
+    # The files written: the unified tarball, or the metadata tarball and the rootfs of a split image.
+    # Example: ["alpine.tar.xz"]
+    paths: List[str] = field(default_factory=list)
+
+    # Total bytes written.
+    # Example: 3145728
+    size: int = 0
+
+
+class _Upload:
+    """The body of an image upload, read from disk a chunk at a time and hashed as it is sent.
+
+    Unified images are sent as they are. Split images are sent as multipart/form-data with a metadata part and a rootfs
+    part. The fingerprint of both kinds is the SHA-256 of the image files in that order, so hashing what is sent gives
+    the fingerprint without reading the files a second time.
+    """
+
+    def __init__(
+        self,
+        metadata: Path,
+        rootfs: Optional[Path],
+        rootfs_part: str,
+        progress: Optional[ProgressCallback],
+        chunk_size: int,
+    ) -> None:
+        self.sha256 = hashlib.sha256()
+        self.progress: Optional[ProgressCallback] = progress
+        self.chunk_size: int = chunk_size
+        self.sent: int = 0
+
+        files: List[Tuple[str, Path]] = [("metadata", metadata)]
+        if rootfs is not None:
+            files.append((rootfs_part, rootfs))
+        self.total: int = sum(os.path.getsize(path) for _, path in files)
+
+        # What is sent before each file and after the last one.
+        self.boundary: Optional[str] = None
+        self.parts: List[Tuple[bytes, Path]] = [(b"", metadata)]
+        self.epilogue: bytes = b""
+        if rootfs is not None:
+            self.boundary = uuid.uuid4().hex
+            self.parts = [
+                (self._part_header(name, path, first=index == 0), path) for index, (name, path) in enumerate(files)
+            ]
+            self.epilogue = f"\r\n--{self.boundary}--\r\n".encode()
+
+    def _part_header(self, name: str, path: Path, first: bool) -> bytes:
+        separator: str = "" if first else "\r\n"
+        return (
+            f"{separator}--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"; filename="{os.path.basename(path)}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+
+    @property
+    def content_type(self) -> str:
+        if self.boundary is None:
+            return "application/octet-stream"
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> int:
+        return self.total + sum(len(header) for header, _ in self.parts) + len(self.epilogue)
+
+    def _sent(self, chunk: memoryview) -> memoryview:
+        self.sha256.update(chunk)
+        self.sent += len(chunk)
+        if self.progress is not None:
+            self.progress(self.sent, self.total)
+        return chunk
+
+    def __iter__(self) -> Iterator[Union[bytes, memoryview]]:
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        for header, path in self.parts:
+            if header:
+                yield header
+            with open(path, "rb") as f:
+                while read := f.readinto(buffer):
+                    yield self._sent(view[:read])
+        if self.epilogue:
+            yield self.epilogue
+
+    async def aiter_chunks(self) -> AsyncIterator[Union[bytes, memoryview]]:
+        """The body for the asyncio client, which can't take the object itself because it is also a sync iterable."""
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        for header, path in self.parts:
+            if header:
+                yield header
+            with open(path, "rb") as f:
+                while read := await asyncio.to_thread(f.readinto, buffer):
+                    yield self._sent(view[:read])
+        if self.epilogue:
+            yield self.epilogue
+
+
+def _upload_headers(
+    upload: _Upload, public: bool, filename: Optional[str], properties: Optional[Dict[str, str]]
+) -> Dict[str, str]:
+    headers: Dict[str, str] = {
+        "Content-Type": upload.content_type,
+        "Content-Length": str(upload.content_length),
+        "X-LXD-public": "true" if public else "false",
+    }
+    if filename:
+        headers["X-LXD-filename"] = filename
+    if properties:
+        headers["X-LXD-properties"] = urlencode(properties)
+    return headers
+
+
+def _imported_fingerprint(response: Dict[str, Any], operation: Optional[Operation], upload: _Upload) -> str:
+    """The fingerprint of the uploaded image, checked against the one computed while it was sent."""
+    fingerprint: str = upload.sha256.hexdigest()
+    if operation is None:
+        raise LXDError(f"{response['error_code']} - Could not import the image: {response['error']}")
+    if operation.metadata.get("fingerprint", fingerprint) != fingerprint:
+        raise LXDError(
+            f"The server stored the image as {operation.metadata['fingerprint']}, but {fingerprint} was sent."
+        )
+    return fingerprint
+
+
+def import_image(
+    lxd: LXD,
+    metadata: Path,
+    rootfs: Optional[Path] = None,
+    image_type: str = "container",
+    public: bool = False,
+    filename: Optional[str] = None,
+    properties: Optional[Dict[str, str]] = None,
+    progress: Optional[ProgressCallback] = None,
+    timeout: Optional[float] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """Upload an image from local files and wait until the server has imported it.
+
+    The files are streamed from disk and hashed while they are sent, so they are only read once and memory use does not
+    depend on their size.
+
+    Args:
+        lxd: The LXD client.
+        metadata: Path of a unified image tarball, or of the metadata tarball of a split image.
+        rootfs: Path of the rootfs of a split image. Defaults to None for a unified image.
+        image_type: Type of a split image (one of "container" or "virtual-machine").
+        public: Whether untrusted clients can use the image.
+        filename: Original filename to store with the image. Defaults to None.
+        properties: Image properties, for example {"os": "Alpine"}. Defaults to None.
+        progress: Called after every chunk with the bytes sent and the total. Defaults to None.
+        timeout: Seconds to wait for the import after the upload. Defaults to waiting until it is done.
+        chunk_size: Bytes to read and send at a time.
+
+    Raises:
+        LXDError: If the upload was refused, or the server computed another fingerprint.
+        OperationFailedError: If the import failed.
+
+    Returns:
+        str: The fingerprint of the image.
+    """
+    upload = _Upload(metadata, rootfs, _rootfs_part(image_type), progress, chunk_size)
+    response = lxd.codec.loads(
+        lxd.request(
+            "POST", "/1.0/images", headers=_upload_headers(upload, public, filename, properties), content=upload
+        ).content
+    )
+    operation: Optional[Operation] = None
+    if response.get("operation") and not response["error_code"]:
+        operation = wait_operation(lxd, response["operation"], timeout=timeout)
+    return _imported_fingerprint(response, operation, upload)
+
+
+def _rootfs_part(image_type: str) -> str:
+    return "rootfs.img" if image_type == "virtual-machine" else "rootfs"
+
+
+def export_image(
+    lxd: LXD,
+    fingerprint: str,
+    destination: Path,
+    rootfs_destination: Optional[Path] = None,
+    progress: Optional[ProgressCallback] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> ImageExport:
+    """Download an image to local files.
+
+    The image is hashed while it is written, and checked against the fingerprint without reading the files again.
+
+    Args:
+        lxd: The LXD client.
+        fingerprint: Fingerprint of the image. A unique prefix is enough.
+        destination: Where to write a unified image, or the metadata tarball of a split image.
+        rootfs_destination: Where to write the rootfs of a split image. Defaults to destination + ".rootfs".
+        progress: Called after every chunk with the bytes received and the total. Defaults to None.
+        chunk_size: Bytes to receive and write at a time.
+
+    Raises:
+        LXDError: If the image could not be exported, or the download does not match the fingerprint. The files are
+            removed in that case, and when the download fails halfway.
+
+    Returns:
+        ImageExport: The fingerprint, the files written and their size.
+    """
+    response: Response = lxd.request("GET", f"/1.0/images/{fingerprint}/export", stream=True)
+    try:
+        if response.status_code != 200:
+            response.read()
+            raise LXDError(_export_error(lxd.codec, response, fingerprint))
+        writer = _ExportWriter(response, fingerprint, destination, rootfs_destination, progress)
+        try:
+            for chunk in response.iter_raw(chunk_size):
+                writer.write(chunk)
+                writer.advance(len(chunk))
+        except BaseException:
+            # Don't leave a truncated image behind that looks like a finished export.
+            writer.remove()
+            raise
+        writer.close()
+        return writer.result()
+    finally:
+        response.close()
+
+
+def _export_error(codec: JSONCodec, response: Response, fingerprint: str) -> str:
+    try:
+        body: Any = codec.loads(response.content)
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        # Not from LXD itself, a proxy in between for example.
+        return f"{response.status_code} - Could not export image {fingerprint}"
+    return f"{body.get('error_code')} - Could not export image {fingerprint}: {body.get('error')}"
+
+
+class _ExportWriter:
+    """Writes an export to its files as it arrives, hashing it on the way."""
+
+    def __init__(
+        self,
+        response: Response,
+        fingerprint: str,
+        destination: Path,
+        rootfs_destination: Optional[Path],
+        progress: Optional[ProgressCallback],
+    ) -> None:
+        self.fingerprint: str = fingerprint
+        self.destinations: Dict[str, str] = {
+            "metadata": os.fspath(destination),
+            "rootfs": os.fspath(rootfs_destination or f"{os.fspath(destination)}.rootfs"),
+        }
+        self.progress: Optional[ProgressCallback] = progress
+        length: Optional[str] = response.headers.get("Content-Length")
+        self.total: Optional[int] = int(length) if length else None
+        self.received: int = 0
+        self.sha256 = hashlib.sha256()
+        self.paths: List[str] = []
+        self.file: Optional[Any] = None
+
+        boundary: Optional[str] = _boundary(response.headers.get("Content-Type", ""))
+        self.parser: Optional[_MultipartParser] = None
+        if boundary is None:
+            self._open("metadata")
+        else:
+            self.parser = _MultipartParser(boundary.encode(), self._open, self._write_part)
+
+    def _open(self, name: str) -> None:
+        if self.file is not None:
+            self.file.close()
+        path: str = self.destinations["metadata" if name == "metadata" else "rootfs"]
+        self.file = open(path, "wb")
+        self.paths.append(path)
+
+    def _write_part(self, data: bytes) -> None:
+        self.sha256.update(data)
+        self.file.write(data)  # type: ignore[union-attr]
+
+    def write(self, chunk: bytes) -> None:
+        if self.parser is None:
+            self._write_part(chunk)
+        else:
+            self.parser.feed(chunk)
+
+    def advance(self, size: int) -> None:
+        """Count bytes as received and report the progress."""
+        self.received += size
+        if self.progress is not None:
+            self.progress(self.received, self.total)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self) -> None:
+        """Close and delete the files written so far."""
+        self.close()
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def result(self) -> ImageExport:
+        fingerprint: str = self.sha256.hexdigest()
+        if not fingerprint.startswith(self.fingerprint):
+            self.remove()
+            raise LXDError(f"The export of image {self.fingerprint} has fingerprint {fingerprint}, it was corrupted.")
+        return ImageExport(
+            fingerprint=fingerprint, paths=self.paths, size=sum(os.path.getsize(path) for path in self.paths)
+        )
+
+
+def _boundary(content_type: str) -> Optional[str]:
+    if not content_type.startswith("multipart/"):
+        return None
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    return match.group(1) if match else None
+
+
+class _MultipartParser:
+    """Splits a streamed multipart body into its parts, keeping no more than a chunk of it in memory."""
+
+    def __init__(self, boundary: bytes, on_part: Callable[[str], None], on_data: Callable[[bytes], None]) -> None:
+        self.delimiter: bytes = b"\r\n--" + boundary
+        self.on_part: Callable[[str], None] = on_part
+        self.on_data: Callable[[bytes], None] = on_data
+        # The body starts with the delimiter without the CRLF in front, add it so every delimiter looks the same.
+        self.buffer = bytearray(b"\r\n")
+        self.state: str = "preamble"
+
+    def feed(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        while self.state != "done":
+            if self.state in ("preamble", "body"):
+                index: int = self.buffer.find(self.delimiter)
+                if index < 0:
+                    # Keep what could be the start of a delimiter that is cut in half.
+                    keep: int = len(self.delimiter) - 1
+                    if len(self.buffer) > keep:
+                        if self.state == "body":
+                            self.on_data(bytes(self.buffer[:-keep]))
+                        del self.buffer[:-keep]
+                    return
+                if self.state == "body":
+                    self.on_data(bytes(self.buffer[:index]))
+                del self.buffer[: index + len(self.delimiter)]
+                self.state = "delimiter"
+
+            if self.state == "delimiter":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer[:2] == b"--":
+                    self.state = "done"
+                    self.buffer.clear()
+                    return
+                del self.buffer[:2]
+                self.state = "headers"
+
+            if self.state == "headers":
+                end: int = self.buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    return
+                headers: str = self.buffer[:end].decode("latin-1")
+                del self.buffer[: end + 4]
+                match = re.search(r'name="([^"]*)"', headers)
+                self.on_part(match.group(1) if match else "")
+                self.state = "body"
+
+
+async def async_import_image(
+    lxd: AsyncLXD,
+    metadata: Path,
+    rootfs: Optional[Path] = None,
+    image_type: str = "container",
+    public: bool = False,
+    filename: Optional[str] = None,
+    properties: Optional[Dict[str, str]] = None,
+    progress: Optional[ProgressCallback] = None,
+    timeout: Optional[float] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """Asyncio version of import_image(). The files are read in a thread so reading them doesn't block the event loop.
+
+    Args:
+        lxd: The asyncio LXD client.
+        metadata: Path of a unified image tarball, or of the metadata tarball of a split image.
+        rootfs: Path of the rootfs of a split image. Defaults to None for a unified image.
+        image_type: Type of a split image (one of "container" or "virtual-machine").
+        public: Whether untrusted clients can use the image.
+        filename: Original filename to store with the image. Defaults to None.
+        properties: Image properties, for example {"os": "Alpine"}. Defaults to None.
+        progress: Called after every chunk with the bytes sent and the total. Defaults to None.
+        timeout: Seconds to wait for the import after the upload. Defaults to waiting until it is done.
+        chunk_size: Bytes to read and send at a time.
+
+    Raises:
+        LXDError: If the upload was refused, or the server computed another fingerprint.
+        OperationFailedError: If the import failed.
+
+    Returns:
+        str: The fingerprint of the image.
+    """
+    upload = _Upload(metadata, rootfs, _rootfs_part(image_type), progress, chunk_size)
+    response = await lxd.request(
+        "POST",
+        "/1.0/images",
+        headers=_upload_headers(upload, public, filename, properties),
+        content=upload.aiter_chunks(),
+    )
+    body = lxd.codec.loads(response.content)
+    operation: Optional[Operation] = None
+    if body.get("operation") and not body["error_code"]:
+        operation = await async_wait_operation(lxd, body["operation"], timeout=timeout)
+    return _imported_fingerprint(body, operation, upload)
+
+
+async def async_export_image(
+    lxd: AsyncLXD,
+    fingerprint: str,
+    destination: Path,
+    rootfs_destination: Optional[Path] = None,
+    progress: Optional[ProgressCallback] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> ImageExport:
+    """Asyncio version of export_image(). The files are written in a thread so writing doesn't block the event loop.
+
+    Args:
+        lxd: The asyncio LXD client.
+        fingerprint: Fingerprint of the image. A unique prefix is enough.
+        destination: Where to write a unified image, or the metadata tarball of a split image.
+        rootfs_destination: Where to write the rootfs of a split image. Defaults to destination + ".rootfs".
+        progress: Called after every chunk with the bytes received and the total. Defaults to None.
+        chunk_size: Bytes to receive and write at a time.
+
+    Raises:
+        LXDError: If the image could not be exported, or the download does not match the fingerprint.
+
+    Returns:
+        ImageExport: The fingerprint, the files written and their size.
+    """
+    response: Response = await lxd.request("GET", f"/1.0/images/{fingerprint}/export", stream=True)
+    try:
+        if response.status_code != 200:
+            await response.aread()
+            raise LXDError(_export_error(lxd.codec, response, fingerprint))
+        writer = _ExportWriter(response, fingerprint, destination, rootfs_destination, progress)
+        try:
+            async for chunk in response.aiter_raw(chunk_size):
+                await asyncio.to_thread(writer.write, chunk)
+                writer.advance(len(chunk))
+        except BaseException:
+            writer.remove()
+            raise
+        writer.close()
+        return writer.result()
+    finally:
+        await response.aclose()
@@ -0,0 +1,265 @@
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from lxd_python.events import events_path
+from lxd_python.exceptions import LXDError, WebSocketError
+from lxd_python.lxd import LXD
+from lxd_python.models import Certificate, Cluster, Event, Server, SyncResponse
+from lxd_python.websocket import OPCODE_TEXT, WebSocket, connect
+
+# Called with the kind of object ("certificate", "server" or "cluster"), its key, the old object and the new object.
+# The old object is None for new objects and the new object is None for deleted ones.
+ChangeCallback = Callable[[str, str, Any, Any], None]
+
+
+class Informer:
+    """An in-memory mirror of the certificates, server and cluster of a LXD server.
+
+    The mirror is loaded with one recursion listing and then kept up to date with lifecycle events, so lookups never
+    have to ask the daemon. It is reloaded every resync_interval seconds and after the event stream reconnects,
+    because events can be missed while disconnected.
+
+    Example:
+        informer = Informer(lxd, on_change=print)
+        informer.start()
+        certificate = informer.get_certificate("abc123")
+    """
+
+    def __init__(
+        self,
+        lxd: LXD,
+        resync_interval: float = 300.0,
+        on_change: Optional[ChangeCallback] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ) -> None:
+        """Create an informer. Nothing is loaded until start() is called.
+
+        Args:
+            lxd: The LXD client.
+            resync_interval: Seconds between full reloads. 0 disables them.
+            on_change: Called for every change to the mirror. See ChangeCallback.
+            reconnect_delay: Seconds to wait before reconnecting to the event stream. Doubled for every failed attempt.
+            max_reconnect_delay: The longest to wait between two reconnects.
+        """
+        self.lxd: LXD = lxd
+        self.resync_interval: float = resync_interval
+        self.reconnect_delay: float = reconnect_delay
+        self.max_reconnect_delay: float = max_reconnect_delay
+        self._callbacks: List[ChangeCallback] = [on_change] if on_change else []
+
+        self._certificates: Dict[str, Certificate] = {}
+        self._certificates_by_name: Dict[str, Certificate] = {}
+        self._server: Optional[Server] = None
+        self._cluster: Optional[Cluster] = None
+
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._websocket: Optional[WebSocket] = None
+        self._threads: List[threading.Thread] = []
+
+    def add_listener(self, callback: ChangeCallback) -> None:
+        """Call callback for every change to the mirror."""
+        self._callbacks.append(callback)
+
+    def start(self) -> None:
+        """Subscribe to events, load everything and start keeping it up to date in the background.
+
+        Subscribing before loading means no change can slip in between the two.
+        """
+        self._stopped.clear()
+        self._websocket = self._connect()
+        try:
+            self.resync()
+        except BaseException:
+            # Nothing would ever read from it.
+            self._websocket.close()
+            self._websocket = None
+            raise
+
+        self._threads = [threading.Thread(target=self._watch, name="lxd-informer-events", daemon=True)]
+        if self.resync_interval > 0:
+            self._threads.append(threading.Thread(target=self._resync_loop, name="lxd-informer-resync", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop watching for changes. The mirror keeps the last known state."""
+        self._stopped.set()
+        websocket: Optional[WebSocket] = self._websocket
+        if websocket is not None:
+            # Wake up the thread blocked reading from the socket.
+            try:
+                websocket.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self) -> "Informer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_certificate(self, fingerprint: str) -> Optional[Certificate]:
+        """Get a certificate by fingerprint, or None if there is no such certificate."""
+        return self._certificates.get(fingerprint.replace("/1.0/certificates/", ""))
+
+    def get_certificate_by_name(self, name: str) -> Optional[Certificate]:
+        """Get a certificate by name, or None if there is no such certificate."""
+        return self._certificates_by_name.get(name)
+
+    def certificates(self) -> List[Certificate]:
+        """All certificates."""
+        return list(self._certificates.values())
+
+    @property
+    def server(self) -> Optional[Server]:
+        """The server environment and configuration. None until start() is called."""
+        return self._server
+
+    @property
+    def cluster(self) -> Optional[Cluster]:
+        """The cluster configuration. None until start() is called."""
+        return self._cluster
+
+    def resync(self) -> None:
+        """Reload everything from the server and report what changed."""
+        certificates: Dict[str, Certificate] = self._get_certificates()
+        server = Server(self._get("/1.0")["metadata"])
+        cluster = Cluster(self._get("/1.0/cluster"))
+
+        with self._lock:
+            old_certificates: Dict[str, Certificate] = self._certificates
+            old_server, old_cluster = self._server, self._cluster
+
+            # Swap in new dicts so readers never see a half-loaded mirror.
+            self._certificates = certificates
+            self._certificates_by_name = {c.name: c for c in certificates.values()}
+            self._server, self._cluster = server, cluster
+
+        for fingerprint in old_certificates.keys() | certificates.keys():
+            old, new = old_certificates.get(fingerprint), certificates.get(fingerprint)
+            if old != new:
+                self._notify("certificate", fingerprint, old, new)
+        if old_server != server:
+            self._notify("server", "", old_server, server)
+        if old_cluster != cluster:
+            self._notify("cluster", "", old_cluster, cluster)
+
+    def handle_event(self, event: Event) -> None:
+        """Apply a lifecycle event to the mirror."""
+        action: str = event.metadata.get("action", "")
+        source: str = event.metadata.get("source", "")
+
+        if action.startswith("certificate-"):
+            self._update_certificate(source.replace("/1.0/certificates/", ""), deleted=action == "certificate-deleted")
+        elif action == "config-updated":
+            self._update_server()
+        elif action.startswith("cluster-"):
+            self._update_cluster()
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> SyncResponse:
+        # Not through lxd.get(), a response from the cache could be older than the event that asked for it.
+        return self.lxd.codec.loads(self.lxd.request("GET", path, params=params).content)
+
+    def _get_certificates(self) -> Dict[str, Certificate]:
+        metadata: List[Any] = self._get("/1.0/certificates", params={"recursion": 1})["metadata"] or []
+        urls: List[str] = [item for item in metadata if isinstance(item, str)]
+        if not urls:
+            return {c.fingerprint: c for c in (Certificate({"metadata": item}) for item in metadata)}
+        # The server returned URLs, it doesn't do recursion here.
+        fetched = self.lxd.executor.map(self._get_certificate, urls)
+        return {c.fingerprint: c for c in fetched if c is not None}
+
+    def _get_certificate(self, fingerprint: str) -> Optional[Certificate]:
+        """Get a certificate, None if there is no such certificate."""
+        path: str = f"/1.0/certificates/{fingerprint.replace('/1.0/certificates/', '')}"
+        response: SyncResponse = self._get(path)
+        if response["error_code"] == 404:
+            return None
+        if response["error_code"]:
+            raise LXDError(f"{response['error_code']} - Could not get {path}: {response['error']}")
+        return Certificate(response)
+
+    def _update_certificate(self, fingerprint: str, deleted: bool) -> None:
+        # None when it was deleted again before we got to it, the certificate-deleted event is on its way.
+        new: Optional[Certificate] = None if deleted else self._get_certificate(fingerprint)
+
+        with self._lock:
+            old: Optional[Certificate] = self._certificates.pop(fingerprint, None)
+            if old is not None and self._certificates_by_name.get(old.name) is old:
+                del self._certificates_by_name[old.name]
+            if new is not None:
+                self._certificates[fingerprint] = new
+                self._certificates_by_name[new.name] = new
+
+        if old != new:
+            self._notify("certificate", fingerprint, old, new)
+
+    def _update_server(self) -> None:
+        server = Server(self._get("/1.0")["metadata"])
+        with self._lock:
+            old, self._server = self._server, server
+        if old != server:
+            self._notify("server", "", old, server)
+
+    def _update_cluster(self) -> None:
+        cluster = Cluster(self._get("/1.0/cluster"))
+        with self._lock:
+            old, self._cluster = self._cluster, cluster
+        if old != cluster:
+            self._notify("cluster", "", old, cluster)
+
+    def _notify(self, kind: str, key: str, old: Any, new: Any) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(kind, key, old, new)
+            except Exception:
+                logger.exception(f"Informer change callback failed for {kind} {key}")
+
+    def _connect(self) -> WebSocket:
+        return connect(self.lxd, events_path(["lifecycle"]))
+
+    def _watch(self) -> None:
+        delay: float = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                if self._websocket is None:
+                    self._websocket = self._connect()
+                    self.resync()
+                delay = self.reconnect_delay
+
+                while (message := self._websocket.recv()) is not None:
+                    opcode, payload = message
+                    if opcode == OPCODE_TEXT:
+                        self.handle_event(Event(self.lxd.codec.loads(payload)))
+            except (OSError, WebSocketError) as e:
+                if self._stopped.is_set():
+                    break
+                logger.warning(f"Informer lost the event stream: {e}. Reconnecting in {delay} seconds.")
+            except Exception:
+                logger.exception("Informer failed to apply an event, resyncing.")
+
+            if self._websocket is not None:
+                self._websocket.close()
+                self._websocket = None
+            self._stopped.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+        if self._websocket is not None:
+            self._websocket.close()
+            self._websocket = None
+
+    def _resync_loop(self) -> None:
+        while not self._stopped.wait(self.resync_interval):
+            try:
+                self.resync()
+            except Exception:
+                logger.exception("Informer resync failed.")
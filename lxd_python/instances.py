@@ -0,0 +1,370 @@
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from lxd_python.batch import BatchResult, async_run_batch, run_batch
+from lxd_python.capabilities import Capabilities, async_get_capabilities, get_capabilities
+from lxd_python.exceptions import InstanceNotFoundError, LXDError
+from lxd_python.filters import Predicate, compile_filter
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import InstanceView
+
+
+@dataclass
+class _Query:
+    """How to list instances from a server, given what it supports."""
+
+    # The collection to list.
+    # Example: /1.0/instances
+    path: str
+
+    # Query parameters of each listing, one listing per project when the server can't list all projects at once.
+    params: List[Dict[str, Any]]
+
+    # The filter to apply here, when the server can't.
+    predicate: Optional[Predicate]
+
+    # Whether the states have to be fetched separately, because the server has no recursion=2.
+    fetch_states: bool
+
+    # Instances to fetch at a time. None to fetch them all with the listing.
+    page_size: Optional[int]
+
+
+def _query(
+    capabilities: Capabilities,
+    recursion: int,
+    filter: Optional[str],
+    project: Optional[str],
+    all_projects: bool,
+    page_size: Optional[int],
+    projects: Optional[List[str]] = None,
+) -> _Query:
+    if recursion not in (1, 2):
+        raise ValueError(f"recursion must be 1 or 2, not {recursion}")
+    predicate: Optional[Predicate] = compile_filter(filter) if filter else None
+
+    params: Dict[str, Any] = {}
+    if predicate is not None and capabilities.filtering:
+        params["filter"] = filter
+        predicate = None
+    # Without filtering on the server, everything has to be fetched anyway, so paging would only add requests.
+    if predicate is not None:
+        page_size = None
+    full: bool = recursion == 2 and capabilities.full_recursion
+    params["recursion"] = 0 if page_size else (2 if full else 1)
+
+    listings: List[Dict[str, Any]]
+    if all_projects and capabilities.all_projects:
+        listings = [{**params, "all-projects": "true"}]
+    elif all_projects:
+        listings = [{**params, "project": name} for name in projects or ["default"]]
+    else:
+        listings = [{**params, "project": project} if project else params]
+
+    return _Query(
+        path=_collection(capabilities),
+        params=listings,
+        predicate=predicate,
+        fetch_states=recursion == 2 and (not full or bool(page_size)),
+        page_size=page_size,
+    )
+
+
+def _collection(capabilities: Capabilities) -> str:
+    return "/1.0/instances" if capabilities.instances else "/1.0/containers"
+
+
+def _needs_projects(capabilities: Capabilities, all_projects: bool) -> bool:
+    return all_projects and not capabilities.all_projects
+
+
+def _project_names(response: Dict[str, Any]) -> List[str]:
+    return [url.rsplit("/", 1)[-1] for url in _metadata(response, "projects")]
+
+
+def _metadata(response: Dict[str, Any], what: str) -> Any:
+    if response["error_code"]:
+        raise LXDError(f"{response['error_code']} - Could not get {what}: {response['error']}")
+    return response["metadata"] or []
+
+
+def _instance_metadata(response: Dict[str, Any], name: str, project: Optional[str], what: str) -> Dict[str, Any]:
+    """The metadata of one instance, or of its state."""
+    if response["error_code"] == 404:
+        raise InstanceNotFoundError(name, project)
+    return _metadata(response, what)
+
+
+def _state_url(url: str) -> str:
+    """The state of an instance URL, which may have a ?project= query."""
+    path, separator, query = url.partition("?")
+    return f"{path}/state{separator}{query}"
+
+
+def _instance_url(query: _Query, instance: Dict[str, Any]) -> str:
+    project: str = instance.get("project") or "default"
+    suffix: str = "" if project == "default" else f"?project={project}"
+    return f"{query.path}/{instance['name']}{suffix}"
+
+
+def _page_requests(urls: List[str], fetch_states: bool) -> List[tuple]:
+    requests: List[tuple] = [("GET", url) for url in urls]
+    if fetch_states:
+        requests += [("GET", _state_url(url)) for url in urls]
+    return requests
+
+
+def _deleted(result: BatchResult) -> bool:
+    """Whether the instance was deleted since it was listed."""
+    return result.response is not None and result.response["error_code"] == 404
+
+
+def _page_instances(urls: List[str], results: List[BatchResult], fetch_states: bool) -> List[Dict[str, Any]]:
+    """The instances of a page, with their states if they were fetched."""
+    instances: List[Dict[str, Any]] = []
+    for index in range(len(urls)):
+        result: BatchResult = results[index]
+        if _deleted(result):
+            continue
+        if not result.ok:
+            raise LXDError(f"Could not get {urls[index]}: {result.error}")
+        instance: Optional[Dict[str, Any]] = result.metadata
+        if fetch_states:
+            instance = _with_state(urls[index], result.metadata, results[len(urls) + index])
+        if instance is not None:
+            instances.append(instance)
+    return instances
+
+
+def _with_state(url: str, instance: Dict[str, Any], state: BatchResult) -> Optional[Dict[str, Any]]:
+    """The instance with its state, None if it was deleted since it was listed."""
+    if _deleted(state):
+        return None
+    if not state.ok:
+        raise LXDError(f"Could not get {_state_url(url)}: {state.error}")
+    return {**instance, "state": state.metadata}
+
+
+def _with_states(urls: List[str], instances: List[Dict[str, Any]], states: List[BatchResult]) -> List[Dict[str, Any]]:
+    with_states = (_with_state(url, instance, state) for url, instance, state in zip(urls, instances, states))
+    return [instance for instance in with_states if instance is not None]
+
+
+def _pages(items: List[Any], page_size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), page_size):
+        yield items[start : start + page_size]
+
+
+def iter_instances(
+    lxd: LXD,
+    recursion: int = 1,
+    filter: Optional[str] = None,
+    project: Optional[str] = None,
+    all_projects: bool = False,
+    page_size: Optional[int] = None,
+) -> Iterator[InstanceView]:
+    """Go over instances one at a time, as lightweight views that only parse a field when it is read.
+
+    The filter is sent to the server when it supports filtering, otherwise instances are filtered here. With a
+    page_size, only the names are listed up front, and the instances are fetched page_size at a time in parallel as the
+    iteration gets to them, so memory use does not grow with the number of instances.
+
+    Example:
+        for instance in iter_instances(lxd, recursion=2, filter="status eq Running", all_projects=True):
+            print(instance.name, instance.state.memory["usage"])
+
+    Args:
+        lxd: The LXD client.
+        recursion: 1 for the instances, 2 to also get their state, snapshots and backups.
+        filter: Only get instances that match, for example "status eq Running". See compile_filter().
+        project: Project of the instances. Defaults to the default project.
+        all_projects: Get the instances of all projects.
+        page_size: Fetch this many instances at a time. Defaults to fetching all of them with one request.
+
+    Raises:
+        ValueError: If recursion is not 1 or 2, or the filter is not valid.
+        LXDError: If the instances could not be listed or fetched.
+
+    Yields:
+        InstanceView: The instances.
+    """
+    capabilities: Capabilities = get_capabilities(lxd)
+    projects: Optional[List[str]] = None
+    if _needs_projects(capabilities, all_projects):
+        projects = _project_names(lxd.get("/1.0/projects"))
+    query: _Query = _query(capabilities, recursion, filter, project, all_projects, page_size, projects)
+
+    for params in query.params:
+        listed: List[Any] = _metadata(lxd.get(query.path, params=params), "instances")
+        if query.page_size:
+            for urls in _pages(listed, query.page_size):
+                results: List[BatchResult] = run_batch(lxd, _page_requests(urls, query.fetch_states))
+                for instance in _page_instances(urls, results, query.fetch_states):
+                    yield InstanceView(instance)
+            continue
+
+        if query.predicate is not None:
+            listed = [instance for instance in listed if query.predicate(instance)]
+        if query.fetch_states:
+            # Old servers without recursion=2, get the states separately.
+            urls: List[str] = [_instance_url(query, instance) for instance in listed]
+            states: List[BatchResult] = run_batch(lxd, [("GET", _state_url(url)) for url in urls])
+            listed = _with_states(urls, listed, states)
+        for instance in listed:
+            yield InstanceView(instance)
+
+
+def get_instances(
+    lxd: LXD,
+    recursion: int = 1,
+    filter: Optional[str] = None,
+    project: Optional[str] = None,
+    all_projects: bool = False,
+) -> List[InstanceView]:
+    """Get instances. See iter_instances().
+
+    Args:
+        lxd: The LXD client.
+        recursion: 1 for the instances, 2 to also get their state, snapshots and backups.
+        filter: Only get instances that match, for example "status eq Running". See compile_filter().
+        project: Project of the instances. Defaults to the default project.
+        all_projects: Get the instances of all projects.
+
+    Raises:
+        ValueError: If recursion is not 1 or 2, or the filter is not valid.
+        LXDError: If the instances could not be listed or fetched.
+
+    Returns:
+        List[InstanceView]: The instances.
+    """
+    return list(iter_instances(lxd, recursion, filter, project, all_projects))
+
+
+def get_instance(lxd: LXD, name: str, project: Optional[str] = None, state: bool = False) -> InstanceView:
+    """Get one instance.
+
+    Args:
+        lxd: The LXD client.
+        name: Name of the instance.
+        project: Project of the instance. Defaults to the default project.
+        state: Also get its state.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDError: If the instance or its state could not be fetched.
+
+    Returns:
+        InstanceView: The instance.
+    """
+    path: str = f"{_collection(get_capabilities(lxd))}/{name}"
+    params: Optional[Dict[str, str]] = {"project": project} if project else None
+    instance = lxd.get(path, params=params)
+    metadata: Dict[str, Any] = _instance_metadata(instance, name, project, f"instance {name}")
+    if state:
+        state_response = lxd.get(f"{path}/state", params=params)
+        metadata = {**metadata, "state": _instance_metadata(state_response, name, project, f"the state of {name}")}
+    return InstanceView(metadata)
+
+
+async def async_iter_instances(
+    lxd: AsyncLXD,
+    recursion: int = 1,
+    filter: Optional[str] = None,
+    project: Optional[str] = None,
+    all_projects: bool = False,
+    page_size: Optional[int] = None,
+) -> AsyncIterator[InstanceView]:
+    """Asyncio version of iter_instances().
+
+    Args:
+        lxd: The asyncio LXD client.
+        recursion: 1 for the instances, 2 to also get their state, snapshots and backups.
+        filter: Only get instances that match, for example "status eq Running". See compile_filter().
+        project: Project of the instances. Defaults to the default project.
+        all_projects: Get the instances of all projects.
+        page_size: Fetch this many instances at a time. Defaults to fetching all of them with one request.
+
+    Raises:
+        ValueError: If recursion is not 1 or 2, or the filter is not valid.
+        LXDError: If the instances could not be listed or fetched.
+
+    Yields:
+        InstanceView: The instances.
+    """
+    capabilities: Capabilities = await async_get_capabilities(lxd)
+    projects: Optional[List[str]] = None
+    if _needs_projects(capabilities, all_projects):
+        projects = _project_names(await lxd.get("/1.0/projects"))
+    query: _Query = _query(capabilities, recursion, filter, project, all_projects, page_size, projects)
+
+    for params in query.params:
+        listed: List[Any] = _metadata(await lxd.get(query.path, params=params), "instances")
+        if query.page_size:
+            for urls in _pages(listed, query.page_size):
+                results: List[BatchResult] = await async_run_batch(lxd, _page_requests(urls, query.fetch_states))
+                for instance in _page_instances(urls, results, query.fetch_states):
+                    yield InstanceView(instance)
+            continue
+
+        if query.predicate is not None:
+            listed = [instance for instance in listed if query.predicate(instance)]
+        if query.fetch_states:
+            urls: List[str] = [_instance_url(query, instance) for instance in listed]
+            states: List[BatchResult] = await async_run_batch(lxd, [("GET", _state_url(url)) for url in urls])
+            listed = _with_states(urls, listed, states)
+        for instance in listed:
+            yield InstanceView(instance)
+
+
+async def async_get_instances(
+    lxd: AsyncLXD,
+    recursion: int = 1,
+    filter: Optional[str] = None,
+    project: Optional[str] = None,
+    all_projects: bool = False,
+) -> List[InstanceView]:
+    """Asyncio version of get_instances().
+
+    Args:
+        lxd: The asyncio LXD client.
+        recursion: 1 for the instances, 2 to also get their state, snapshots and backups.
+        filter: Only get instances that match, for example "status eq Running". See compile_filter().
+        project: Project of the instances. Defaults to the default project.
+        all_projects: Get the instances of all projects.
+
+    Raises:
+        ValueError: If recursion is not 1 or 2, or the filter is not valid.
+        LXDError: If the instances could not be listed or fetched.
+
+    Returns:
+        List[InstanceView]: The instances.
+    """
+    return [instance async for instance in async_iter_instances(lxd, recursion, filter, project, all_projects)]
+
+
+async def async_get_instance(
+    lxd: AsyncLXD, name: str, project: Optional[str] = None, state: bool = False
+) -> InstanceView:
+    """Asyncio version of get_instance().
+
+    Args:
+        lxd: The asyncio LXD client.
+        name: Name of the instance.
+        project: Project of the instance. Defaults to the default project.
+        state: Also get its state.
+
+    Raises:
+        InstanceNotFoundError: If there is no such instance.
+        LXDError: If the instance or its state could not be fetched.
+
+    Returns:
+        InstanceView: The instance.
+    """
+    path: str = f"{_collection(await async_get_capabilities(lxd))}/{name}"
+    params: Optional[Dict[str, str]] = {"project": project} if project else None
+    instance = await lxd.get(path, params=params)
+    metadata: Dict[str, Any] = _instance_metadata(instance, name, project, f"instance {name}")
+    if state:
+        state_response = await lxd.get(f"{path}/state", params=params)
+        metadata = {**metadata, "state": _instance_metadata(state_response, name, project, f"the state of {name}")}
+    return InstanceView(metadata)
@@ -0,0 +1,295 @@
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from httpx import Request, Response
+
+# Upper bounds of the latency histogram buckets, in seconds. The last bucket catches everything slower.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# What to call the item that follows a collection when normalizing a path. Everything else is {name}.
+_ITEM_PLACEHOLDERS: Dict[str, str] = {
+    "certificates": "{fingerprint}",
+    "images": "{fingerprint}",
+    "operations": "{id}",
+    "warnings": "{uuid}",
+}
+
+# Resources that are a single object, not a collection, so the segment after them is not an item.
+# /1.0/cluster/members/lxd01 becomes /1.0/cluster/members/{name}.
+_SINGLETONS: FrozenSet[str] = frozenset({"cluster", "events", "metrics", "resources", "state", "exec", "console"})
+
+# Collections that are followed by more than one item. /1.0/storage-pools/default/volumes/custom/data becomes
+# /1.0/storage-pools/{name}/volumes/{type}/{name}.
+_MULTI_ITEM_COLLECTIONS: Dict[str, Tuple[str, ...]] = {"volumes": ("{type}", "{name}")}
+
+# Sub-collections that share a path with the items of their parent. /1.0/images/aliases is not an image.
+_FIXED_SEGMENTS: Dict[str, FrozenSet[str]] = {"images": frozenset({"aliases"})}
+
+
+def normalize_path(path: str) -> str:
+    """Replace the names, fingerprints and IDs in a path with placeholders.
+
+    Metrics are kept per normalized path, so the number of series stays bounded however many objects there are.
+
+    Args:
+        path: The path of a request. For example, /1.0/certificates/abc123.
+
+    Returns:
+        str: The normalized path. For example, /1.0/certificates/{fingerprint}.
+    """
+    segments: List[str] = path.split("?", 1)[0].strip("/").split("/")
+    if not segments[0]:
+        return "/"
+
+    # The API version is never a placeholder.
+    normalized: List[str] = segments[:1]
+    pending: Tuple[str, ...] = ()
+    collection: str = ""
+    for segment in segments[1:]:
+        if pending:
+            normalized.append(pending[0])
+            pending = pending[1:]
+        elif collection and segment not in _FIXED_SEGMENTS.get(collection, ()):
+            normalized.append(_ITEM_PLACEHOLDERS.get(collection, "{name}"))
+            collection = ""
+        else:
+            normalized.append(segment)
+            if segment in _MULTI_ITEM_COLLECTIONS:
+                pending = _MULTI_ITEM_COLLECTIONS[segment]
+            else:
+                collection = "" if segment in _SINGLETONS else segment
+    return "/" + "/".join(normalized)
+
+
+@dataclass
+class RequestInfo:
+    """What happened to a request, passed to RequestHook.after_request()."""
+
+    # The HTTP method.
+    # Example: GET
+    method: str
+
+    # The path that was requested.
+    # Example: /1.0/certificates/abc123
+    path: str
+
+    # The path with names, fingerprints and IDs replaced by placeholders, see normalize_path().
+    # Example: /1.0/certificates/{fingerprint}
+    template: str
+
+    # The HTTP status code, None if no response was received.
+    # Example: 200
+    status_code: Optional[int]
+
+    # Size of the request body in bytes.
+    request_bytes: int
+
+    # Size of the response body in bytes, as far as it was read.
+    response_bytes: int
+
+    # Seconds from sending the request until the response headers arrived.
+    duration: float
+
+    # Seconds spent waiting for a connection from the pool, including connecting.
+    pool_wait: float
+
+    # The exception that was raised, if any.
+    error: Optional[BaseException] = None
+
+
+class RequestHook:
+    """Called around every request a LXD client sends.
+
+    Subclass it and override what you need, then pass it to the client with hooks=[...]. Hooks run in the thread or
+    task that sends the request, so they should be quick.
+    """
+
+    def before_request(self, method: str, path: str) -> None:
+        """Called before the request is sent."""
+
+    def after_request(self, info: RequestInfo) -> None:
+        """Called when the response headers arrived or the request failed."""
+
+    def after_fork(self) -> None:
+        """Called in the child process after a fork. Replace locks here, the parent may have held them."""
+
+
+class PoolWaitTimer:
+    """Measures how long a request waited for a connection, using the httpcore trace extension.
+
+    A request has its connection, new or from the pool, once its headers start being sent.
+    """
+
+    def __init__(self) -> None:
+        self.start: float = time.perf_counter()
+        self.acquired: Optional[float] = None
+
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if self.acquired is None and event_name.endswith(".started") and "send_request_headers" in event_name:
+            self.acquired = time.perf_counter()
+
+    async def async_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.trace(event_name, info)
+
+    @property
+    def pool_wait(self) -> float:
+        return (self.acquired or self.start) - self.start
+
+
+def request_info(
+    request: Request,
+    path: str,
+    response: Optional[Response],
+    timer: PoolWaitTimer,
+    error: Optional[BaseException],
+) -> RequestInfo:
+    """Build the RequestInfo for a finished request."""
+    response_bytes: int = 0
+    if response is not None:
+        if response.is_stream_consumed:
+            response_bytes = len(response.content)
+        else:
+            response_bytes = int(response.headers.get("Content-Length", 0))
+
+    return RequestInfo(
+        method=request.method,
+        path=path,
+        template=normalize_path(path),
+        status_code=response.status_code if response is not None else None,
+        request_bytes=int(request.headers.get("Content-Length", 0)),
+        response_bytes=response_bytes,
+        duration=time.perf_counter() - timer.start,
+        pool_wait=timer.pool_wait,
+        error=error,
+    )
+
+
+@dataclass
+class EndpointStats:
+    """Metrics for one method and path template."""
+
+    method: str
+    template: str
+
+    # Number of requests per LATENCY_BUCKETS bucket, plus one for everything slower.
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    errors: int = 0
+    duration_sum: float = 0.0
+    pool_wait_sum: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+
+    def quantile(self, q: float) -> float:
+        """Estimate a latency quantile from the histogram. Returns the upper bound of the bucket it falls in.
+
+        Args:
+            q: The quantile, between 0 and 1. For example, 0.99.
+
+        Returns:
+            float: Seconds. inf if it falls in the last bucket, 0 if there were no requests.
+        """
+        if not self.count:
+            return 0.0
+        rank: float = q * self.count
+        seen: int = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsCollector(RequestHook):
+    """Collects latency histograms, byte counts, error counts and pool wait time per endpoint.
+
+    Example:
+        metrics = MetricsCollector()
+        lxd = LXD(hooks=[metrics])
+        ...
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[Tuple[str, str], EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def after_request(self, info: RequestInfo) -> None:
+        key: Tuple[str, str] = (info.method, info.template)
+        bucket: int = bisect.bisect_left(LATENCY_BUCKETS, info.duration)
+        is_error: bool = info.error is not None or (info.status_code or 0) >= 400
+        with self._lock:
+            stats: Optional[EndpointStats] = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats(method=info.method, template=info.template)
+            stats.buckets[bucket] += 1
+            stats.count += 1
+            stats.errors += is_error
+            stats.duration_sum += info.duration
+            stats.pool_wait_sum += info.pool_wait
+            stats.request_bytes += info.request_bytes
+            stats.response_bytes += info.response_bytes
+
+    def snapshot(self) -> List[EndpointStats]:
+        """A copy of the current metrics, one entry per method and path template."""
+        with self._lock:
+            return [
+                EndpointStats(
+                    method=stats.method,
+                    template=stats.template,
+                    buckets=list(stats.buckets),
+                    count=stats.count,
+                    errors=stats.errors,
+                    duration_sum=stats.duration_sum,
+                    pool_wait_sum=stats.pool_wait_sum,
+                    request_bytes=stats.request_bytes,
+                    response_bytes=stats.response_bytes,
+                )
+                for stats in self._stats.values()
+            ]
+
+    def reset(self) -> None:
+        """Forget everything collected so far."""
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, prefix: str = "lxd_client") -> str:
+        """Export the metrics in the Prometheus text format.
+
+        Args:
+            prefix: Prefix for the metric names.
+
+        Returns:
+            str: The metrics.
+        """
+        snapshot: List[EndpointStats] = self.snapshot()
+        lines: List[str] = [f"# TYPE {prefix}_request_duration_seconds histogram"]
+        for stats in snapshot:
+            labels: str = f'method="{stats.method}",path="{stats.template}"'
+            cumulative: int = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {stats.duration_sum}")
+            lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+        counters: Dict[str, str] = {
+            "requests_total": "count",
+            "errors_total": "errors",
+            "pool_wait_seconds_total": "pool_wait_sum",
+            "request_bytes_total": "request_bytes",
+            "response_bytes_total": "response_bytes",
+        }
+        for name, attribute in counters.items():
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for stats in snapshot:
+                labels = f'method="{stats.method}",path="{stats.template}"'
+                lines.append(f"{prefix}_{name}{{{labels}}} {getattr(stats, attribute)}")
+        return "\n".join(lines) + "\n"
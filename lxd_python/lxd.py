@@ -1,13 +1,37 @@
+import asyncio
 import os
-import sys
+import ssl
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 import httpx
-from httpx import Client, HTTPTransport, Response
+from httpx import AsyncClient, AsyncHTTPTransport, Client, HTTPTransport, Limits, Request, Response
 from loguru import logger
 
+from lxd_python.cache import CacheEntry, ResponseCache
+from lxd_python.codec import JSONCodec, default_codec
+from lxd_python.exceptions import CircuitOpenError, LXDConnectionError, LXDTimeoutError
+from lxd_python.instrumentation import PoolWaitTimer, RequestHook, normalize_path, request_info
 from lxd_python.models import SyncResponse
+from lxd_python.retry import CircuitBreaker, RetryBudget, RetryPolicy
+
+# "off" logs nothing, "summary" logs the method, path, status, size and duration of every request and "full" also logs
+# the response body.
+LogMode = Literal["off", "summary", "full"]
+
+# Seconds to wait for each of connecting, sending and receiving, unless the client is given another timeout.
+DEFAULT_TIMEOUT: float = 5.0
+
+# Remote connections are kept alive this long, so most requests reuse an open TLS connection instead of doing a new
+# handshake.
+KEEPALIVE_EXPIRY: float = 60.0
+
+# A raw request body: bytes, or chunks of bytes that are streamed as they are produced.
+RequestContent = Union[bytes, Iterable[bytes], AsyncIterable[bytes]]
 
 
 @lru_cache(maxsize=1)
@@ -29,107 +53,826 @@ def get_socket_location() -> str:
 
 
 class LXD:
-    def __init__(self) -> None:
-        # TODO: Add a way to configure logging.
-        log_format: str = (
-            "<green>{time:YYYY-MM-DD at HH:mm:ss}</green>"
-            " <level>{level: <5}</level>"
-            " <magenta>{extra[method]}</magenta>"
-            " <cyan>{extra[path]}</cyan>"
-            " <white>{message}</white>"
-            " <dim>{extra[response]}</dim>"
+    """Client for the LXD REST API.
+
+    A client can be shared between threads: the connection pool, the cache, the retry budget, the circuit breaker and
+    the metrics hooks are all thread-safe. Use one client per process and size its pool with limits=.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        log_mode: LogMode = "off",
+        hooks: Optional[List[RequestHook]] = None,
+        codec: Optional[JSONCodec] = None,
+        endpoint: Optional[str] = None,
+        cert: Optional[Tuple[str, str]] = None,
+        verify: Union[bool, str] = True,
+        http2: bool = False,
+        limits: Optional[Limits] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 16,
+    ) -> None:
+        """Create a LXD client.
+
+        The client talks to the local Unix socket, or to a remote server over HTTPS if an endpoint is given.
+
+        The client never configures loguru itself. Requests are logged at DEBUG level, add a handler to see them.
+
+        Args:
+            socket_path: The path to the LXD socket. Defaults to get_socket_location().
+            cache: Cache GET responses in this cache. Writes to a path invalidate it. Defaults to no caching.
+            log_mode: How much to log about each request. See LogMode. Defaults to nothing.
+            hooks: Called before and after every request, for example a MetricsCollector. Defaults to none.
+            codec: Encodes and decodes the JSON bodies. Defaults to orjson if it is installed, else the json module.
+            endpoint: URL of a remote LXD server. For example, https://lxd01:8443. Defaults to the Unix socket.
+            cert: Client certificate and key files to authenticate to the remote server with.
+            verify: Verify the certificate of the remote server. Either a bool or the path of the CA bundle or of
+                the (self-signed) server certificate to trust.
+            http2: Multiplex requests to the remote server over HTTP/2. Needs the h2 package (pip install h2).
+            limits: Connection pool limits. Defaults to 100 connections, 20 of them kept alive.
+            timeout: Seconds to wait for each of connecting, sending and receiving, per attempt.
+            deadline: Seconds a call may take, retries included. Defaults to no limit besides the attempts.
+            retry: When to retry requests. Defaults to RetryPolicy(), pass RetryPolicy(max_attempts=1) to disable.
+            retry_budget: Limits how many requests are retried. Share one between clients to limit them together.
+                Defaults to a RetryBudget() for this client.
+            circuit_breaker: Fail fast on endpoints that keep failing. Defaults to none.
+            max_workers: Threads of the pool run_batch() sends requests from. Keep it below the connection limit.
+        """
+        self.endpoint: Optional[str] = endpoint.rstrip("/") if endpoint else None
+        self.socket_path: Optional[str] = None if endpoint else socket_path or get_socket_location()
+        self.base_url: str = self.endpoint or "http://localhost"
+        self._tls: Tuple[Optional[Tuple[str, str]], Union[bool, str], bool] = (cert, verify, http2)
+        self._limits: Optional[Limits] = limits
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.cache: Optional[ResponseCache] = cache
+        self.log_mode: LogMode = log_mode
+        self.hooks: List[RequestHook] = list(hooks or [])
+        self.codec: JSONCodec = codec or default_codec()
+        self.timeout: float = timeout
+        self.deadline: Optional[float] = deadline
+        self.retry: RetryPolicy = retry or RetryPolicy()
+        self.retry_budget: RetryBudget = retry_budget or RetryBudget()
+        self.circuit_breaker: Optional[CircuitBreaker] = circuit_breaker
+        self.max_workers: int = max_workers
+        # The client and the thread pool are only built when they are first used, so creating an LXD is cheap.
+        self._client: Optional[Client] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    @property
+    def ssl_context(self) -> Optional[ssl.SSLContext]:
+        """The one SSL context all connections to the remote server share. None for the Unix socket."""
+        if self._ssl_context is None and self.endpoint is not None:
+            with self._lock:
+                if self._ssl_context is None:
+                    self._ssl_context = _ssl_context(self.endpoint, *self._tls)
+        return self._ssl_context
+
+    @property
+    def client(self) -> Client:
+        """The httpx client all requests are sent with. Built on first use."""
+        client: Optional[Client] = self._client
+        if client is None:
+            ssl_context: Optional[ssl.SSLContext] = self.ssl_context
+            with self._lock:
+                if self._client is None:
+                    transport: HTTPTransport = httpx.HTTPTransport(
+                        **_transport_options(self.socket_path, ssl_context, self._tls[2], self._limits)
+                    )
+                    self._client = Client(transport=transport, timeout=self.timeout)
+                client = self._client
+        return client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The thread pool for sending requests concurrently. Started on first use and shut down by close()."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="lxd")
+            return self._executor
+
+    def _after_fork(self) -> None:
+        """Forget the connections, threads and locks inherited from the parent process, they belong to it.
+
+        The inherited client is dropped, not closed, so nothing is sent on the parent's connections.
+        """
+        self._lock = threading.Lock()
+        self._client = None
+        self._executor = None
+        _after_fork_of(self.retry_budget, self.circuit_breaker, self.cache, *self.hooks)
+
+    def close(self) -> None:
+        """Close the client."""
+        self._close()
+
+    def _close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        # Not under the lock, a worker that is still running may need it to build the client.
+        if executor is not None:
+            executor.shutdown()
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        content: Optional[RequestContent] = None,
+        stream: bool = False,
+    ) -> Response:
+        """Send a request and return the raw response.
+
+        Idempotent requests that could not connect, timed out or got a 502, 503 or 504 are retried as the retry policy
+        says, as long as the retry budget and the deadline allow it.
+
+        Args:
+            method: The HTTP method. For example, GET.
+            path: The path to the resource. For example, /1.0/containers.
+            params: The query parameters. Defaults to None.
+            data: The JSON body. Defaults to None.
+            headers: Extra request headers. Defaults to None.
+            timeout: Seconds to wait for each of connecting, sending and receiving. Defaults to the client's timeout.
+            deadline: Seconds the whole call may take, retries included. Defaults to the client's deadline.
+            content: A raw body to send instead of data. An iterator of bytes is streamed, and never retried because it
+                can only be read once. Defaults to None.
+            stream: Return as soon as the headers arrived. Read the body with Response.iter_bytes() and close the
+                response when done. Defaults to False.
+
+        Raises:
+            LXDTimeoutError: If the request timed out or the deadline passed.
+            LXDConnectionError: If the server could not be reached.
+            CircuitOpenError: If the circuit breaker stopped requests to this endpoint.
+
+        Returns:
+            Response: The response from the LXD server.
+        """
+        retryable: bool = content is None or isinstance(content, bytes)
+        if content is None:
+            content, headers = _encode_body(self.codec, data, headers)
+        call = _Call(self, method, path, timeout, deadline, retryable)
+        while True:
+            attempt_timeout: float = call.next_timeout()
+            try:
+                response: Response = self._send(method, path, params, content, headers, attempt_timeout, stream)
+            except httpx.TransportError as e:
+                delay: Optional[float] = call.on_error(e)
+            else:
+                delay = call.on_response(response)
+                if delay is None:
+                    return response
+                if stream:
+                    response.close()
+            time.sleep(delay)
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        content: Optional[RequestContent],
+        headers: Optional[Dict[str, str]],
+        timeout: float,
+        stream: bool = False,
+    ) -> Response:
+        """Send one attempt of a request, logging it and calling the hooks."""
+        if self.log_mode == "off" and not self.hooks and not stream:
+            return self.client.request(
+                method,
+                f"{self.base_url}{path}",
+                params=params,
+                content=content,
+                headers=headers,
+                timeout=timeout,
+            )
+
+        timer = PoolWaitTimer()
+        request: Request = self.client.build_request(
+            method,
+            f"{self.base_url}{path}",
+            params=params,
+            content=content,
+            headers=headers,
+            timeout=timeout,
+            extensions={"trace": timer.trace} if self.hooks else None,
         )
-        logger.configure(extra={"method": "", "path": "", "response": ""})
-        logger.remove()
-        logger.add(
-            sys.stderr,
-            format=log_format,
-            level="DEBUG",
-            colorize=True,
-            backtrace=False,
-            diagnose=False,
-            catch=True,
+        for hook in self.hooks:
+            hook.before_request(method, path)
+
+        response: Optional[Response] = None
+        error: Optional[BaseException] = None
+        try:
+            response = self.client.send(request, stream=stream)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if response is not None and self.log_mode != "off":
+                _log_response(self.log_mode, method, path, response, time.perf_counter() - timer.start)
+            if self.hooks:
+                info = request_info(request, path, response, timer, error)
+                for hook in self.hooks:
+                    hook.after_request(info)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None):
+        """Get a resource.
+
+        Args:
+            path: The path to the resource. For example, /1.0/containers.
+            params: The query parameters. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
+
+        Returns:
+            SyncResponse: The response from the LXD server.
+        """
+        if self.cache is None:
+            return self.codec.loads(self.request("GET", path, params=params, deadline=deadline).content)
+
+        key = self.cache.key(path, params)
+        entry: Optional[CacheEntry] = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            return entry.body
+
+        response: Response = self.request(
+            "GET", path, params=params, headers=_revalidation_headers(entry), deadline=deadline
         )
+        return _cached_body(self.cache, self.codec, key, path, entry, response)
 
-        transport: HTTPTransport = httpx.HTTPTransport(uds=get_socket_location())
-        self.client: Client = Client(transport=transport)
+    def post(self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None) -> SyncResponse:
+        """Post a resource.
 
-    @logger.catch
-    def close(self) -> None:
+        Args:
+            path: The path to the resource. For example, /1.0/containers.
+            data: The data to post. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
+
+        Returns:
+            SyncResponse: The response from the LXD server.
+        """
+        response = self.codec.loads(self.request("POST", path, data=data, deadline=deadline).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
+        return response
+
+    def delete(self, path: str, deadline: Optional[float] = None) -> SyncResponse:
+        """Delete a resource.
+
+        Args:
+            path: The path to the resource.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
+
+        Returns:
+            SyncResponse: The response from the LXD server.
+        """
+        response = self.codec.loads(self.request("DELETE", path, deadline=deadline).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
+        return response
+
+    def put(self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None) -> SyncResponse:
+        """Put a resource.
+
+        Args:
+            path: The path to the resource.
+            data: The data to put. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
+
+        Returns:
+            SyncResponse: The response from the LXD server.
+        """
+        response = self.codec.loads(self.request("PUT", path, data=data, deadline=deadline).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
+        return response
+
+    def patch(self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None) -> SyncResponse:
+        """Patch a resource.
+
+        Args:
+            path: The path to the resource.
+            data: The data to patch. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
+
+        Returns:
+            SyncResponse: The response from the LXD server.
+        """
+        response = self.codec.loads(self.request("PATCH", path, data=data, deadline=deadline).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
+        return response
+
+
+class AsyncLXD:
+    """Asyncio version of LXD.
+
+    Every request goes over a single pooled httpx.AsyncClient, so many requests can be in flight at once from
+    one event loop.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        limits: Optional[Limits] = None,
+        cache: Optional[ResponseCache] = None,
+        log_mode: LogMode = "off",
+        hooks: Optional[List[RequestHook]] = None,
+        codec: Optional[JSONCodec] = None,
+        endpoint: Optional[str] = None,
+        cert: Optional[Tuple[str, str]] = None,
+        verify: Union[bool, str] = True,
+        http2: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """Create an asyncio LXD client.
+
+        Args:
+            socket_path: The path to the LXD socket. Defaults to get_socket_location().
+            limits: Connection pool limits. Defaults to 100 connections, 20 of them kept alive.
+            cache: Cache GET responses in this cache. Writes to a path invalidate it. Defaults to no caching.
+            log_mode: How much to log about each request. See LogMode. Defaults to nothing.
+            hooks: Called before and after every request, for example a MetricsCollector. Defaults to none.
+            codec: Encodes and decodes the JSON bodies. Defaults to orjson if it is installed, else the json module.
+            endpoint: URL of a remote LXD server. For example, https://lxd01:8443. Defaults to the Unix socket.
+            cert: Client certificate and key files to authenticate to the remote server with.
+            verify: Verify the certificate of the remote server. Either a bool or the path of the CA bundle or of
+                the (self-signed) server certificate to trust.
+            http2: Multiplex requests to the remote server over HTTP/2. Needs the h2 package (pip install h2).
+            timeout: Seconds to wait for each of connecting, sending and receiving, per attempt.
+            deadline: Seconds a call may take, retries included. Defaults to no limit besides the attempts.
+            retry: When to retry requests. Defaults to RetryPolicy(), pass RetryPolicy(max_attempts=1) to disable.
+            retry_budget: Limits how many requests are retried. Share one between clients to limit them together.
+                Defaults to a RetryBudget() for this client.
+            circuit_breaker: Fail fast on endpoints that keep failing. Defaults to none.
+        """
+        self.endpoint: Optional[str] = endpoint.rstrip("/") if endpoint else None
+        self.socket_path: Optional[str] = None if endpoint else socket_path or get_socket_location()
+        self.base_url: str = self.endpoint or "http://localhost"
+        self._tls: Tuple[Optional[Tuple[str, str]], Union[bool, str], bool] = (cert, verify, http2)
+        self._limits: Optional[Limits] = limits
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.cache: Optional[ResponseCache] = cache
+        self.log_mode: LogMode = log_mode
+        self.hooks: List[RequestHook] = list(hooks or [])
+        self.codec: JSONCodec = codec or default_codec()
+        self.timeout: float = timeout
+        self.deadline: Optional[float] = deadline
+        self.retry: RetryPolicy = retry or RetryPolicy()
+        self.retry_budget: RetryBudget = retry_budget or RetryBudget()
+        self.circuit_breaker: Optional[CircuitBreaker] = circuit_breaker
+        # Built when it is first used, so creating an AsyncLXD is cheap.
+        self._client: Optional[AsyncClient] = None
+        _instances.add(self)
+
+    @property
+    def ssl_context(self) -> Optional[ssl.SSLContext]:
+        """The one SSL context all connections to the remote server share. None for the Unix socket."""
+        if self._ssl_context is None:
+            self._ssl_context = _ssl_context(self.endpoint, *self._tls)
+        return self._ssl_context
+
+    @property
+    def client(self) -> AsyncClient:
+        """The httpx client all requests are sent with. Built on first use."""
+        if self._client is None:
+            transport: AsyncHTTPTransport = httpx.AsyncHTTPTransport(
+                **_transport_options(self.socket_path, self.ssl_context, self._tls[2], self._limits)
+            )
+            self._client = AsyncClient(transport=transport, timeout=self.timeout)
+        return self._client
+
+    async def __aenter__(self) -> "AsyncLXD":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    def _after_fork(self) -> None:
+        """Forget the connections inherited from the parent process, they belong to it."""
+        self._client = None
+        _after_fork_of(self.retry_budget, self.circuit_breaker, self.cache, *self.hooks)
+
+    async def close(self) -> None:
         """Close the client."""
-        logger.info("Closing client.")
-        self.client.close()
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        content: Optional[RequestContent] = None,
+        stream: bool = False,
+    ) -> Response:
+        """Asyncio version of LXD.request().
+
+        Args:
+            method: The HTTP method. For example, GET.
+            path: The path to the resource. For example, /1.0/containers.
+            params: The query parameters. Defaults to None.
+            data: The JSON body. Defaults to None.
+            headers: Extra request headers. Defaults to None.
+            timeout: Seconds to wait for each of connecting, sending and receiving. Defaults to the client's timeout.
+            deadline: Seconds the whole call may take, retries included. Defaults to the client's deadline.
+            content: A raw body to send instead of data. An iterator of bytes is streamed, and never retried because it
+                can only be read once. Defaults to None.
+            stream: Return as soon as the headers arrived. Read the body with Response.iter_bytes() and close the
+                response when done. Defaults to False.
+
+        Raises:
+            LXDTimeoutError: If the request timed out or the deadline passed.
+            LXDConnectionError: If the server could not be reached.
+            CircuitOpenError: If the circuit breaker stopped requests to this endpoint.
 
-    @logger.catch
-    def get(self, path: str, params: Optional[Dict[str, Any]] = None):
+        Returns:
+            Response: The response from the LXD server.
+        """
+        retryable: bool = content is None or isinstance(content, bytes)
+        if content is None:
+            content, headers = _encode_body(self.codec, data, headers)
+        call = _Call(self, method, path, timeout, deadline, retryable)
+        while True:
+            attempt_timeout: float = call.next_timeout()
+            try:
+                response: Response = await self._send(method, path, params, content, headers, attempt_timeout, stream)
+            except httpx.TransportError as e:
+                delay: Optional[float] = call.on_error(e)
+            else:
+                delay = call.on_response(response)
+                if delay is None:
+                    return response
+                if stream:
+                    await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        content: Optional[RequestContent],
+        headers: Optional[Dict[str, str]],
+        timeout: float,
+        stream: bool = False,
+    ) -> Response:
+        """Send one attempt of a request, logging it and calling the hooks."""
+        if self.log_mode == "off" and not self.hooks and not stream:
+            return await self.client.request(
+                method,
+                f"{self.base_url}{path}",
+                params=params,
+                content=content,
+                headers=headers,
+                timeout=timeout,
+            )
+
+        timer = PoolWaitTimer()
+        request: Request = self.client.build_request(
+            method,
+            f"{self.base_url}{path}",
+            params=params,
+            content=content,
+            headers=headers,
+            timeout=timeout,
+            extensions={"trace": timer.async_trace} if self.hooks else None,
+        )
+        for hook in self.hooks:
+            hook.before_request(method, path)
+
+        response: Optional[Response] = None
+        error: Optional[BaseException] = None
+        try:
+            response = await self.client.send(request, stream=stream)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if response is not None and self.log_mode != "off":
+                _log_response(self.log_mode, method, path, response, time.perf_counter() - timer.start)
+            if self.hooks:
+                info = request_info(request, path, response, timer, error)
+                for hook in self.hooks:
+                    hook.after_request(info)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None):
         """Get a resource.
 
         Args:
             path: The path to the resource. For example, /1.0/containers.
             params: The query parameters. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
 
         Returns:
             SyncResponse: The response from the LXD server.
         """
-        response: Response = self.client.get(f"http://localhost{path}", params=params)
-        logger.debug("", method="GET", path=path, response=response)
-        return response.json()
+        if self.cache is None:
+            return self.codec.loads((await self.request("GET", path, params=params, deadline=deadline)).content)
+
+        key = self.cache.key(path, params)
+        entry: Optional[CacheEntry] = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            return entry.body
+
+        response: Response = await self.request(
+            "GET", path, params=params, headers=_revalidation_headers(entry), deadline=deadline
+        )
+        return _cached_body(self.cache, self.codec, key, path, entry, response)
 
-    @logger.catch
-    def post(self, path: str, data: Optional[Dict[str, Any]] = None) -> SyncResponse:
+    async def post(
+        self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None
+    ) -> SyncResponse:
         """Post a resource.
 
         Args:
             path: The path to the resource. For example, /1.0/containers.
             data: The data to post. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
 
         Returns:
             SyncResponse: The response from the LXD server.
         """
-        response = self.client.post(f"http://localhost{path}", json=data).json()
-        logger.debug("", method="POST", path=path, response=response)
+        response = self.codec.loads((await self.request("POST", path, data=data, deadline=deadline)).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
         return response
 
-    @logger.catch
-    def delete(self, path: str) -> SyncResponse:
+    async def delete(self, path: str, deadline: Optional[float] = None) -> SyncResponse:
         """Delete a resource.
 
         Args:
             path: The path to the resource.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
 
         Returns:
             SyncResponse: The response from the LXD server.
         """
-        response = self.client.delete(f"http://localhost{path}").json()
-        logger.debug("", method="DELETE", path=path, response=response)
+        response = self.codec.loads((await self.request("DELETE", path, deadline=deadline)).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
         return response
 
-    @logger.catch
-    def put(self, path: str, data: Optional[Dict[str, Any]] = None) -> SyncResponse:
+    async def put(
+        self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None
+    ) -> SyncResponse:
         """Put a resource.
 
         Args:
             path: The path to the resource.
             data: The data to put. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
+
+        Raises:
+            LXDError: If the request failed. See request().
 
         Returns:
             SyncResponse: The response from the LXD server.
         """
-        response = self.client.put(f"http://localhost{path}", json=data).json()
-        logger.debug("", method="PUT", path=path, response=response)
+        response = self.codec.loads((await self.request("PUT", path, data=data, deadline=deadline)).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
         return response
 
-    @logger.catch
-    def patch(self, path: str, data: Optional[Dict[str, Any]] = None) -> SyncResponse:
+    async def patch(
+        self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Optional[float] = None
+    ) -> SyncResponse:
         """Patch a resource.
 
         Args:
             path: The path to the resource.
             data: The data to patch. Defaults to None.
+            deadline: Seconds the call may take, retries included. Defaults to the client's deadline.
 
+        Raises:
+            LXDError: If the request failed. See request().
         Returns:
             SyncResponse: The response from the LXD server.
         """
-        response = self.client.patch(f"http://localhost{path}", json=data).json()
-        logger.debug("", method="PATCH", path=path, response=response)
+        response = self.codec.loads((await self.request("PATCH", path, data=data, deadline=deadline)).content)
+        if self.cache is not None:
+            self.cache.invalidate(path)
         return response
+
+
+# Every client, so the child process of a fork can reset them. See LXD._after_fork().
+_instances: "weakref.WeakSet[Union[LXD, AsyncLXD]]" = weakref.WeakSet()
+
+
+def _after_fork_of(*shared: Any) -> None:
+    """Reset the locks of the retry budget, circuit breaker, cache and hooks of a client in a forked child.
+
+    They can be shared between clients, resetting one twice does no harm.
+    """
+    for obj in shared:
+        after_fork: Optional[Callable[[], None]] = getattr(obj, "after_fork", None)
+        if after_fork is not None:
+            after_fork()
+
+
+def _reset_after_fork() -> None:
+    for instance in list(_instances):
+        instance._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _Call:
+    """The attempts of one call to request(): its deadline, when to retry and what to raise."""
+
+    def __init__(
+        self,
+        lxd: Union[LXD, AsyncLXD],
+        method: str,
+        path: str,
+        timeout: Optional[float],
+        deadline: Optional[float],
+        retryable: bool = True,
+    ) -> None:
+        self.method: str = method
+        self.retryable: bool = retryable
+        self.path: str = path
+        self.retry: RetryPolicy = lxd.retry
+        self.retry_budget: RetryBudget = lxd.retry_budget
+        self.circuit_breaker: Optional[CircuitBreaker] = lxd.circuit_breaker
+        # Only the circuit breaker needs the template, don't pay for it otherwise.
+        self.template: str = normalize_path(path) if self.circuit_breaker is not None else path
+        self.timeout: float = lxd.timeout if timeout is None else timeout
+        self.deadline: Optional[float] = lxd.deadline if deadline is None else deadline
+        self.expires: Optional[float] = None if self.deadline is None else time.monotonic() + self.deadline
+        self.attempts: int = 0
+        self.retry_budget.record_request()
+
+    def next_timeout(self) -> float:
+        """Start the next attempt and return its timeout, which is cut short by the deadline."""
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow(self.method, self.template):
+            raise CircuitOpenError(f"{self.method} {self.template} keeps failing, not sending requests to it for now.")
+
+        self.attempts += 1
+        if self.expires is None:
+            return self.timeout
+        remaining: float = self.expires - time.monotonic()
+        if remaining <= 0:
+            raise LXDTimeoutError(f"{self.method} {self.path} did not finish within {self.deadline} seconds.")
+        return min(self.timeout, remaining)
+
+    def on_error(self, error: httpx.TransportError) -> float:
+        """The delay before retrying a failed attempt. Raises the error as an LXDError if it can't be retried."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure(self.method, self.template)
+
+        delay: Optional[float] = self._retry_delay()
+        if delay is not None:
+            logger.debug(f"{self.method} {self.path} failed: {error!r}. Retrying in {delay:.2f} seconds.")
+            return delay
+        if isinstance(error, httpx.TimeoutException):
+            raise LXDTimeoutError(f"{self.method} {self.path} timed out after {self.attempts} attempts.") from error
+        raise LXDConnectionError(f"{self.method} {self.path} failed after {self.attempts} attempts: {error}") from error
+
+    def on_response(self, response: Response) -> Optional[float]:
+        """The delay before retrying an attempt that got a response, None to return the response."""
+        if response.status_code not in self.retry.statuses:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_success(self.method, self.template)
+            return None
+
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure(self.method, self.template)
+        return self._retry_delay()
+
+    def _retry_delay(self) -> Optional[float]:
+        if not self.retryable or self.method not in self.retry.methods or self.attempts >= self.retry.max_attempts:
+            return None
+        delay: float = self.retry.delay(self.attempts - 1)
+        if self.expires is not None and time.monotonic() + delay >= self.expires:
+            return None
+        # Take from the budget last, so a retry that doesn't happen doesn't use it up.
+        if not self.retry_budget.try_spend():
+            return None
+        return delay
+
+
+def _ssl_context(
+    endpoint: Optional[str], cert: Optional[Tuple[str, str]], verify: Union[bool, str], http2: bool
+) -> Optional[ssl.SSLContext]:
+    """Build the one SSL context all connections to a remote server share. None for the Unix socket."""
+    if not endpoint or not endpoint.startswith("https://"):
+        return None
+    return httpx.create_ssl_context(cert=cert, verify=verify, http2=http2)
+
+
+def _transport_options(
+    socket_path: Optional[str], ssl_context: Optional[ssl.SSLContext], http2: bool, limits: Optional[Limits]
+) -> Dict[str, Any]:
+    """Keyword arguments for the httpx transport of a client."""
+    if socket_path:
+        # Nothing on the Unix socket is encrypted, so don't spend time loading the CA bundle into an unused context.
+        return {
+            "uds": socket_path,
+            "verify": False,
+            "limits": limits or Limits(max_connections=100, max_keepalive_connections=20),
+        }
+
+    if limits is None:
+        limits = Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=KEEPALIVE_EXPIRY)
+    return {"verify": ssl_context or True, "http2": http2, "limits": limits}
+
+
+def _encode_body(
+    codec: JSONCodec, data: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]
+) -> Tuple[Optional[bytes], Optional[Dict[str, str]]]:
+    """Encode a JSON body with the codec. Requests without data have no body, like httpx's json=None."""
+    if data is None:
+        return None, headers
+    return codec.dumps(data), {"Content-Type": "application/json", **(headers or {})}
+
+
+def _revalidation_headers(entry: Optional[CacheEntry]) -> Optional[Dict[str, str]]:
+    """Ask the server to answer 304 Not Modified if the stale entry is still valid."""
+    if entry is not None and entry.etag:
+        return {"If-None-Match": entry.etag}
+    return None
+
+
+def _cached_body(
+    cache: ResponseCache, codec: JSONCodec, key: Any, path: str, entry: Optional[CacheEntry], response: Response
+) -> SyncResponse:
+    """Get the body for a GET response and update the cache with it."""
+    if response.status_code == 304 and entry is not None:
+        cache.refresh(key)
+        return entry.body
+
+    body = codec.loads(response.content)
+    if response.status_code == 200:
+        cache.store(key, path, body, response.headers.get("ETag"))
+    return body
+
+
+def _log_response(log_mode: LogMode, method: str, path: str, response: Response, elapsed: float) -> None:
+    """Log a summary of a request, and the body in "full" mode.
+
+    Nothing is formatted unless a loguru handler accepts DEBUG messages.
+    """
+    # The response may still be streaming, we can only tell its size once it has been read.
+    size: str = str(len(response.content)) if response.is_stream_consumed else "?"
+    if log_mode == "full":
+        logger.opt(lazy=True).debug(
+            "{} {} {} {} bytes in {:.1f} ms: {}",
+            lambda: method,
+            lambda: path,
+            lambda: response.status_code,
+            lambda: size,
+            lambda: elapsed * 1000,
+            lambda: response.text if response.is_stream_consumed else "(streamed)",
+        )
+    else:
+        logger.debug("{} {} {} {} bytes in {:.1f} ms", method, path, response.status_code, size, elapsed * 1000)
@@ -0,0 +1,448 @@
+import math
+import re
+import time
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from httpx import Response
+
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD, AsyncLXD
+
+# A column of a MetricFamily: a NumPy array when NumPy is installed, otherwise an array.array.
+Column = Any
+
+# Label name="value" pairs, with the escapes the exposition format allows in values.
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+_UNESCAPE = re.compile(r"\\(.)")
+
+# Suffixes of samples that belong to a metric family with a shorter name.
+_SUFFIXES: Tuple[str, ...] = ("_total", "_count", "_sum", "_bucket", "_created")
+
+
+@lru_cache(maxsize=1)
+def numpy_module() -> Any:
+    """NumPy if it is installed (pip install numpy), otherwise None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@dataclass
+class MetricFamily:
+    """All samples of one metric from a scrape, stored as columns instead of one object per sample.
+
+    Sample i has the value values[i] and, for every label, the value label_values[label][label_codes[label][i]].
+
+    Example:
+        cpu = scrape["lxd_cpu_seconds_total"]
+        cpu.get(name="c1", mode="user")
+        cpu.values[cpu.rows(name="c1")].sum()  # with NumPy
+    """
+
+    # Name of the samples.
+    # Example: lxd_cpu_seconds_total
+    name: str
+
+    # Type from the # TYPE line (one of "counter", "gauge", "histogram", "summary" or "unknown").
+    # Example: counter
+    metric_type: str = "unknown"
+
+    # Text of the # HELP line.
+    # Example: The total number of CPU time used in seconds.
+    help: str = ""
+
+    # Names of the labels, in the order the server sent them.
+    # Example: ["cpu", "mode", "name", "project", "type"]
+    label_names: List[str] = field(default_factory=list)
+
+    # The distinct values of every label.
+    # Example: {"mode": ["user", "system"]}
+    label_values: Dict[str, List[str]] = field(default_factory=dict)
+
+    # For every label, the position in label_values of the value of each sample. Integer columns.
+    label_codes: Dict[str, Column] = field(default_factory=dict)
+
+    # The value of each sample. A float column.
+    values: Column = field(default_factory=lambda: array("d"))
+
+    # The label values of each sample, in the order of label_names.
+    keys: List[Tuple[str, ...]] = field(default_factory=list, repr=False)
+
+    _index: Optional[Dict[Tuple[str, ...], int]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def index(self) -> Dict[Tuple[str, ...], int]:
+        """The row of every series, by its label values in the order of label_names. Built on first use."""
+        if self._index is None:
+            self._index = {key: row for row, key in enumerate(self.keys)}
+        return self._index
+
+    def labels(self, row: int) -> Dict[str, str]:
+        """The labels of a sample."""
+        return dict(zip(self.label_names, self.keys[row]))
+
+    def rows(self, **labels: str) -> Column:
+        """The rows of the samples that have all the given label values, as an integer column."""
+        numpy = numpy_module()
+        selected: Optional[Any] = None
+        for label, value in labels.items():
+            values: List[str] = self.label_values.get(label, [])
+            if value not in values:
+                return numpy.empty(0, dtype=numpy.intp) if numpy is not None else array("q")
+            code: int = values.index(value)
+            codes: Column = self.label_codes[label]
+            if numpy is not None:
+                match = codes == code
+                selected = match if selected is None else selected & match
+            else:
+                rows = {row for row, c in enumerate(codes) if c == code}
+                selected = rows if selected is None else selected & rows
+        if numpy is not None:
+            return numpy.arange(len(self)) if selected is None else numpy.flatnonzero(selected)
+        return array("q", range(len(self)) if selected is None else sorted(selected))
+
+    def get(self, **labels: str) -> Optional[float]:
+        """The value of the one sample with exactly these labels, None if there is none."""
+        row: Optional[int] = self.index.get(tuple(labels.get(name, "") for name in self.label_names))
+        return None if row is None else float(self.values[row])
+
+
+@dataclass
+class MetricsScrape:
+    """The metrics from one scrape of /1.0/metrics."""
+
+    # time.monotonic() when the scrape finished, used to compute rates.
+    timestamp: float
+
+    # The metrics by sample name.
+    families: Dict[str, MetricFamily]
+
+    def __getitem__(self, name: str) -> MetricFamily:
+        return self.families[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.families
+
+
+class _FamilyBuilder:
+    """Collects the samples of one family into growable typed arrays while the text is parsed."""
+
+    __slots__ = ("name", "names", "code_maps", "codes", "values", "keys")
+
+    def __init__(self, name: str, names: Tuple[str, ...]) -> None:
+        self.name: str = name
+        self.names: Tuple[str, ...] = names
+        self.code_maps: List[Dict[str, int]] = [{} for _ in names]
+        self.codes: List[array] = [array("l") for _ in names]
+        self.values: array = array("d")
+        self.keys: List[Tuple[str, ...]] = []
+
+    def add(self, names: Tuple[str, ...], values: Tuple[str, ...], value: float) -> None:
+        if names != self.names:
+            values = self._align(names, values)
+        for code_map, codes, label_value in zip(self.code_maps, self.codes, values):
+            code: Optional[int] = code_map.get(label_value)
+            if code is None:
+                code = code_map[label_value] = len(code_map)
+            codes.append(code)
+        self.values.append(value)
+        self.keys.append(values)
+
+    def _align(self, names: Tuple[str, ...], values: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Put label values in the order of the family, adding labels the family has not seen yet."""
+        added: List[str] = [name for name in names if name not in self.names]
+        if added:
+            self.names += tuple(added)
+            for _ in added:
+                # Earlier samples don't have the new label, give them an empty value.
+                self.code_maps.append({"": 0} if self.keys else {})
+                self.codes.append(array("l", [0] * len(self.keys)))
+            self.keys = [key + ("",) * len(added) for key in self.keys]
+        by_name: Dict[str, str] = dict(zip(names, values))
+        return tuple(by_name.get(name, "") for name in self.names)
+
+    def build(self, metric_type: str, help: str) -> MetricFamily:
+        return MetricFamily(
+            name=self.name,
+            metric_type=metric_type,
+            help=help,
+            label_names=list(self.names),
+            label_values={name: list(code_map) for name, code_map in zip(self.names, self.code_maps)},
+            label_codes={name: _int_column(codes) for name, codes in zip(self.names, self.codes)},
+            values=_float_column(self.values),
+            keys=self.keys,
+        )
+
+
+class MetricsParser:
+    """Parses the OpenMetrics text of /1.0/metrics into MetricFamily columns in one pass over the lines.
+
+    Reuse a parser between scrapes: the labels of every series are parsed once and then looked up, since the same
+    series come back in every scrape.
+    """
+
+    def __init__(self, max_cached_labels: int = 100_000) -> None:
+        self.max_cached_labels: int = max_cached_labels
+        self._labels: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+    def parse(self, lines: Iterable[str]) -> Dict[str, MetricFamily]:
+        """Parse the lines of a scrape.
+
+        Args:
+            lines: The lines of the exposition text, with or without line endings.
+
+        Returns:
+            Dict[str, MetricFamily]: The metrics by sample name.
+        """
+        parse = _Parse(self)
+        for line in lines:
+            parse.feed(line)
+        return parse.finish()
+
+    def _parse_labels(self, block: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        labels = self._labels.get(block)
+        if labels is None:
+            pairs: List[Tuple[str, str]] = _LABEL.findall(block)
+            labels = (
+                tuple(name for name, _ in pairs),
+                tuple(_UNESCAPE.sub(_unescape, value) if "\\" in value else value for _, value in pairs),
+            )
+            if len(self._labels) >= self.max_cached_labels:
+                self._labels.clear()
+            self._labels[block] = labels
+        return labels
+
+
+class _Parse:
+    """The state of one parse, fed a line at a time so lines can be parsed as they arrive."""
+
+    def __init__(self, parser: MetricsParser) -> None:
+        self.parser: MetricsParser = parser
+        self.builders: Dict[str, _FamilyBuilder] = {}
+        self.types: Dict[str, str] = {}
+        self.helps: Dict[str, str] = {}
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\n")
+        if not line:
+            return
+        if line[0] == "#":
+            parts: List[str] = line.split(" ", 3)
+            if len(parts) == 4 and parts[1] == "TYPE":
+                self.types[parts[2]] = parts[3].strip()
+            elif len(parts) == 4 and parts[1] == "HELP":
+                self.helps[parts[2]] = parts[3]
+            return
+
+        brace: int = line.find("{")
+        if brace >= 0:
+            end: int = line.rfind("}")
+            name: str = line[:brace]
+            names, values = self.parser._parse_labels(line[brace + 1 : end])
+            rest: str = line[end + 1 :]
+        else:
+            name, _, rest = line.partition(" ")
+            names, values = (), ()
+
+        builder: Optional[_FamilyBuilder] = self.builders.get(name)
+        if builder is None:
+            builder = self.builders[name] = _FamilyBuilder(name, names)
+        builder.add(names, values, float(rest.split(None, 1)[0]))
+
+    def finish(self) -> Dict[str, MetricFamily]:
+        return {
+            name: builder.build(*_type_and_help(name, self.types, self.helps))
+            for name, builder in self.builders.items()
+        }
+
+
+def _unescape(match: "re.Match[str]") -> str:
+    return "\n" if match.group(1) == "n" else match.group(1)
+
+
+def _type_and_help(name: str, types: Dict[str, str], helps: Dict[str, str]) -> Tuple[str, str]:
+    """The TYPE and HELP of a sample name, which may carry a suffix the family name does not have."""
+    if name in types:
+        return types[name], helps.get(name, "")
+    for suffix in _SUFFIXES:
+        if name.endswith(suffix) and name[: -len(suffix)] in types:
+            family: str = name[: -len(suffix)]
+            return types[family], helps.get(family, "")
+    return "unknown", helps.get(name, "")
+
+
+def _float_column(values: array) -> Column:
+    numpy = numpy_module()
+    # frombuffer shares the memory of the array instead of copying it.
+    return numpy.frombuffer(values, dtype=numpy.float64) if numpy is not None else values
+
+
+def _int_column(values: array) -> Column:
+    numpy = numpy_module()
+    return numpy.frombuffer(values, dtype=numpy.dtype(f"i{values.itemsize}")) if numpy is not None else values
+
+
+def parse_metrics(text: str) -> Dict[str, MetricFamily]:
+    """Parse OpenMetrics text. Use a MetricsParser to parse several scrapes.
+
+    Args:
+        text: The exposition text.
+
+    Returns:
+        Dict[str, MetricFamily]: The metrics by sample name.
+    """
+    return MetricsParser().parse(text.splitlines())
+
+
+def scrape_metrics(lxd: LXD, parser: Optional[MetricsParser] = None, project: Optional[str] = None) -> MetricsScrape:
+    """Scrape /1.0/metrics, parsing the response while it streams in.
+
+    Args:
+        lxd: The LXD client. The server only serves metrics to trusted clients and metrics certificates.
+        parser: The parser to use. Pass the same one to every scrape of a server. Defaults to a new one.
+        project: Only scrape the instances of this project. Defaults to all projects.
+
+    Raises:
+        LXDError: If the server refused to serve the metrics.
+
+    Returns:
+        MetricsScrape: The metrics.
+    """
+    response: Response = lxd.request("GET", "/1.0/metrics", params=_params(project), stream=True)
+    try:
+        if response.status_code != 200:
+            response.read()
+            raise LXDError(_scrape_error(response))
+        families: Dict[str, MetricFamily] = (parser or MetricsParser()).parse(response.iter_lines())
+    finally:
+        response.close()
+    return MetricsScrape(timestamp=time.monotonic(), families=families)
+
+
+def _params(project: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"project": project} if project else None
+
+
+def _scrape_error(response: Response) -> str:
+    return f"{response.status_code} - Could not scrape the metrics: {response.text}"
+
+
+async def async_scrape_metrics(
+    lxd: AsyncLXD, parser: Optional[MetricsParser] = None, project: Optional[str] = None
+) -> MetricsScrape:
+    """Asyncio version of scrape_metrics().
+
+    Args:
+        lxd: The asyncio LXD client.
+        parser: The parser to use. Pass the same one to every scrape of a server. Defaults to a new one.
+        project: Only scrape the instances of this project. Defaults to all projects.
+
+    Raises:
+        LXDError: If the server refused to serve the metrics.
+
+    Returns:
+        MetricsScrape: The metrics.
+    """
+    response: Response = await lxd.request("GET", "/1.0/metrics", params=_params(project), stream=True)
+    try:
+        if response.status_code != 200:
+            await response.aread()
+            raise LXDError(_scrape_error(response))
+        parse = _Parse(parser or MetricsParser())
+        async for line in response.aiter_lines():
+            parse.feed(line)
+    finally:
+        await response.aclose()
+    return MetricsScrape(timestamp=time.monotonic(), families=parse.finish())
+
+
+def rate(previous: MetricFamily, current: MetricFamily, seconds: float) -> MetricFamily:
+    """The per-second rate of a counter between two scrapes.
+
+    The result has the series of current. Series that were not in previous get NaN, and counters that went down were
+    reset, so their whole current value counts as the increase.
+
+    Args:
+        previous: The counter from the earlier scrape.
+        current: The counter from the later scrape.
+        seconds: Seconds between the scrapes.
+
+    Returns:
+        MetricFamily: The rates, with the labels of current.
+    """
+    before: Column = _aligned(previous, current)
+    numpy = numpy_module()
+    if numpy is not None:
+        delta = current.values - before
+        delta = numpy.where(delta < 0, current.values, delta)
+        values: Column = delta / seconds
+    else:
+        values = array(
+            "d",
+            (
+                (now if now < then else now - then) / seconds if not math.isnan(then) else math.nan
+                for now, then in zip(current.values, before)
+            ),
+        )
+    return MetricFamily(
+        name=current.name,
+        metric_type="gauge",
+        help=current.help,
+        label_names=current.label_names,
+        label_values=current.label_values,
+        label_codes=current.label_codes,
+        values=values,
+        keys=current.keys,
+    )
+
+
+def _aligned(previous: MetricFamily, current: MetricFamily) -> Column:
+    """The previous values in the row order of current, NaN for new series."""
+    if previous.label_names == current.label_names and previous.keys == current.keys:
+        # The server sends the series in the same order every time, so this is the common case.
+        return previous.values
+    rows: Sequence[int] = [previous.index.get(key, -1) for key in _keys_in(current, previous.label_names)]
+    numpy = numpy_module()
+    if numpy is not None:
+        positions = numpy.array(rows, dtype=numpy.intp)
+        before = numpy.full(len(current), numpy.nan)
+        found = positions >= 0
+        before[found] = previous.values[positions[found]]
+        return before
+    return array("d", (previous.values[row] if row >= 0 else math.nan for row in rows))
+
+
+def _keys_in(family: MetricFamily, label_names: List[str]) -> List[Tuple[str, ...]]:
+    """The keys of family with the labels in another order."""
+    if family.label_names == label_names:
+        return family.keys
+    positions: List[Optional[int]] = [
+        family.label_names.index(name) if name in family.label_names else None for name in label_names
+    ]
+    return [tuple("" if p is None else key[p] for p in positions) for key in family.keys]
+
+
+def rates(previous: MetricsScrape, current: MetricsScrape) -> Dict[str, MetricFamily]:
+    """The per-second rates of all counters between two scrapes. See rate().
+
+    Args:
+        previous: The earlier scrape.
+        current: The later scrape.
+
+    Returns:
+        Dict[str, MetricFamily]: The rates by sample name.
+    """
+    seconds: float = current.timestamp - previous.timestamp
+    return {
+        name: rate(previous.families[name], family, seconds)
+        for name, family in current.families.items()
+        if family.metric_type == "counter" and name in previous.families
+    }
@@ -1,9 +1,10 @@
+from base64 import b64encode
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Tuple
 
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
+if TYPE_CHECKING:
+    # cryptography takes longer to import than the rest of the library, so it is only imported where it is used.
+    from cryptography import x509
 
 
 @dataclass
@@ -85,6 +86,10 @@ class Server:
         self.environment = environment.get("environment", {})
         self.public = environment.get("public", False)
 
+    def writable_fields(self) -> Dict[str, Any]:
+        """The fields that can be changed with PATCH or PUT, named like in the API."""
+        return {"config": self.config}
+
 
 @dataclass
 class MemberConfig:
@@ -187,6 +192,10 @@ class CertificatesPost:
         projects: List[str] | None = None,
     ) -> None:
 
+        from cryptography import x509
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives import serialization
+
         # TODO: Raise exception if certificate is not a valid certificate
         cert = x509.load_pem_x509_certificate(certificate.encode(), default_backend())
         base64: str = cert.public_bytes(serialization.Encoding.PEM).decode()
@@ -203,6 +212,29 @@ class CertificatesPost:
         self.token = token
         self.cert_type = cert_type
 
+    @classmethod
+    def from_x509(
+        cls,
+        cert: "x509.Certificate",
+        name: str,
+        cert_type: str = "client",
+        restricted: bool = False,
+        projects: List[str] | None = None,
+    ) -> "CertificatesPost":
+        """Create a CertificatesPost from an already parsed certificate, without parsing it again."""
+        from cryptography.hazmat.primitives import serialization
+
+        certificates_post: CertificatesPost = cls.__new__(cls)
+        # The PEM body without its first and last line is the base64 encoded DER.
+        certificates_post.certificate = b64encode(cert.public_bytes(serialization.Encoding.DER)).decode()
+        certificates_post.name = name
+        certificates_post.password = ""
+        certificates_post.projects = projects
+        certificates_post.restricted = restricted
+        certificates_post.token = False
+        certificates_post.cert_type = cert_type
+        return certificates_post
+
     def dict(self) -> Dict[str, Any]:
         return {
             "certificate": self.certificate,
@@ -234,3 +266,442 @@ class Certificate:
         self.projects = list(meta["projects"])
         self.restricted = meta["restricted"]
         self.cert_type = meta["type"]
+
+    def writable_fields(self) -> Dict[str, Any]:
+        """The fields that can be changed with PATCH or PUT, named like in the API."""
+        return {"name": self.name, "type": self.cert_type, "restricted": self.restricted, "projects": self.projects}
+
+
+@dataclass()
+class Operation:
+    """A background operation, like an image upload or a command running in an instance."""
+
+    # UUID of the operation
+    # example: 6916c8a6-9b7d-4abd-90b3-aedfec7ec7da
+    id: str
+
+    # Type of operation (one of "task", "token" or "websocket")
+    # example: websocket
+    operation_class: str
+
+    # Description of the operation
+    # example: Executing command
+    description: str
+
+    # Operation creation time
+    # example: 2021-03-23T17:38:37.753398689-04:00
+    created_at: str
+
+    # Operation last change
+    # example: 2021-03-23T17:38:37.753398689-04:00
+    updated_at: str
+
+    # Status name
+    # example: Running
+    status: str
+
+    # Status code (103 is running, 200 is success, 400 is failure and 401 is cancelled)
+    # example: 103
+    status_code: int
+
+    # Affected resources
+    # example: {"instances": ["/1.0/instances/foo"]}
+    resources: Dict[str, List[str]]
+
+    # Operation specific metadata
+    # example: {"command": ["bash"], "environment": {"HOME": "/root"}}
+    metadata: Dict[str, Any]
+
+    # Whether the operation can be canceled
+    # example: false
+    may_cancel: bool
+
+    # Operation error message
+    # example: Some error message
+    err: str
+
+    # What cluster member this record was found on
+    # example: lxd01
+    location: str
+
+    def __init__(self, metadata: Dict[str, Any]) -> None:
+        self.id = metadata["id"]
+        self.operation_class = metadata.get("class", "")
+        self.description = metadata.get("description", "")
+        self.created_at = metadata.get("created_at", "")
+        self.updated_at = metadata.get("updated_at", "")
+        self.status = metadata.get("status", "")
+        self.status_code = metadata.get("status_code", 0)
+        self.resources = metadata.get("resources") or {}
+        self.metadata = metadata.get("metadata") or {}
+        self.may_cancel = metadata.get("may_cancel", False)
+        self.err = metadata.get("err", "")
+        self.location = metadata.get("location", "")
+
+    @property
+    def done(self) -> bool:
+        """Whether the operation finished, successfully or not."""
+        return self.status_code >= 200
+
+
+@dataclass()
+class Event:
+    """An event from the /1.0/events stream"""
+
+    # Event type (one of "operation", "logging" or "lifecycle")
+    # example: lifecycle
+    event_type: str
+
+    # Time at which the event was sent
+    # example: 2021-02-24T19:00:45.452649098-05:00
+    timestamp: str
+
+    # JSON encoded metadata (see EventLogging, EventLifecycle or Operation)
+    # example: {"action": "instance-started", "source": "/1.0/instances/c1", "context": {}}
+    metadata: Dict[str, Any]
+
+    # Originating cluster member
+    # example: lxd01
+    location: str
+
+    # Project the event belongs to.
+    # example: default
+    project: str
+
+    def __init__(self, event: Dict[str, Any]) -> None:
+        self.event_type = event["type"]
+        self.timestamp = event.get("timestamp", "")
+        self.metadata = event.get("metadata") or {}
+        self.location = event.get("location", "")
+        self.project = event.get("project", "")
+
+
+# Marks a field without a default, reading it from a response that doesn't have it raises KeyError.
+_REQUIRED: Any = object()
+
+
+class _LazyField:
+    """A field of a view that is parsed from the raw response the first time it is read.
+
+    The parsed value is cached in the slot with the same name prefixed by an underscore, so the owning class has to
+    declare that slot.
+    """
+
+    __slots__ = ("key", "parse", "default", "slot")
+
+    def __init__(self, key: str, parse: Optional[Callable[[Any], Any]] = None, default: Any = _REQUIRED) -> None:
+        self.key: str = key
+        self.parse: Optional[Callable[[Any], Any]] = parse
+        self.default: Any = default
+        self.slot: str = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = f"_{name}"
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            pass
+
+        raw: Mapping[str, Any] = instance._raw
+        value: Any = raw[self.key] if self.default is _REQUIRED else raw.get(self.key, self.default)
+        if self.parse is not None:
+            value = self.parse(value)
+        setattr(instance, self.slot, value)
+        return value
+
+
+class _View:
+    """Base class for the compact, lazily parsed versions of the models.
+
+    A view only keeps a reference to the response mapping it was created from. Fields are parsed when they are first
+    read and then cached. Views have __slots__, so they have no per-instance __dict__.
+    """
+
+    __slots__ = ("_raw",)
+
+    # Names of the fields, used by __repr__() and fields().
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, raw: Mapping[str, Any]) -> None:
+        self._raw: Mapping[str, Any] = raw
+
+    @property
+    def raw(self) -> Mapping[str, Any]:
+        """The response mapping the view reads from. Do not modify it."""
+        return self._raw
+
+    def fields(self) -> Dict[str, Any]:
+        """Parse every field and return them as a dict."""
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._raw == other._raw
+
+    def __repr__(self) -> str:
+        fields: str = ", ".join(f"{name}={value!r}" for name, value in self.fields().items())
+        return f"{self.__class__.__name__}({fields})"
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, KeyError):
+            # KeyError: a required field that is missing from the response.
+            return default
+
+
+class SyncResponseView(_View):
+    """Compact version of SyncResponse. Created from the whole response."""
+
+    __slots__ = ("_response_type", "_status", "_status_code", "_operation", "_error_code", "_error", "_metadata")
+    _fields = ("response_type", "status", "status_code", "operation", "error_code", "error", "metadata")
+
+    response_type = _LazyField("type")
+    status = _LazyField("status")
+    status_code = _LazyField("status_code")
+    operation = _LazyField("operation")
+    error_code = _LazyField("error_code")
+    error = _LazyField("error")
+    metadata = _LazyField("metadata")
+
+
+class ServerView(_View):
+    """Compact version of Server. Created from the metadata of GET /1.0."""
+
+    __slots__ = (
+        "_api_extensions",
+        "_api_status",
+        "_api_version",
+        "_auth",
+        "_auth_methods",
+        "_config",
+        "_environment",
+        "_public",
+    )
+    _fields = ("api_extensions", "api_status", "api_version", "auth", "auth_methods", "config", "environment", "public")
+
+    api_extensions = _LazyField("api_extensions", list, [])
+    api_status = _LazyField("api_status", default="")
+    api_version = _LazyField("api_version", default="")
+    auth = _LazyField("auth", default="")
+    auth_methods = _LazyField("auth_methods", list, [])
+    config = _LazyField("config", dict, {})
+    environment = _LazyField("environment", dict, {})
+    public = _LazyField("public", default=False)
+
+
+class MemberConfigView(_View):
+    """Compact version of MemberConfig. Created from one item of member_config."""
+
+    __slots__ = ("_description", "_entity", "_key", "_name", "_value")
+    _fields = ("description", "entity", "key", "name", "value")
+
+    description = _LazyField("description")
+    entity = _LazyField("entity")
+    key = _LazyField("key")
+    name = _LazyField("name")
+    value = _LazyField("value")
+
+
+def _member_config_views(member_config: List[Mapping[str, Any]]) -> List[MemberConfigView]:
+    return [MemberConfigView(m) for m in member_config]
+
+
+class ClusterView(_View):
+    """Compact version of Cluster. Created from the metadata of GET /1.0/cluster.
+
+    member_config is only turned into MemberConfigView objects when it is first read.
+    """
+
+    __slots__ = ("_enabled", "_member_config", "_server_name")
+    _fields = ("enabled", "member_config", "server_name")
+
+    enabled = _LazyField("enabled")
+    member_config = _LazyField("member_config", _member_config_views)
+    server_name = _LazyField("server_name")
+
+
+class CertificateView(_View):
+    """Compact version of Certificate. Created from the metadata of a certificate."""
+
+    __slots__ = ("_certificate", "_fingerprint", "_name", "_projects", "_restricted", "_cert_type")
+    _fields = ("certificate", "fingerprint", "name", "projects", "restricted", "cert_type")
+
+    certificate = _LazyField("certificate")
+    fingerprint = _LazyField("fingerprint")
+    name = _LazyField("name")
+    projects = _LazyField("projects", list)
+    restricted = _LazyField("restricted")
+    cert_type = _LazyField("type")
+
+
+class InstanceStateView(_View):
+    """The state of a running instance. Created from the metadata of GET /1.0/instances/{name}/state."""
+
+    __slots__ = ("_status", "_status_code", "_pid", "_processes", "_cpu", "_memory", "_disk", "_network")
+    _fields = ("status", "status_code", "pid", "processes", "cpu", "memory", "disk", "network")
+
+    # Current status (Running, Stopped, Frozen or Error)
+    status = _LazyField("status", default="")
+
+    # Numeric status code (101, 102, 110, 112)
+    status_code = _LazyField("status_code", default=0)
+
+    # PID of the runtime
+    pid = _LazyField("pid", default=0)
+
+    # Number of processes in the instance
+    processes = _LazyField("processes", default=0)
+
+    # CPU usage, for example {"usage": 4986019722}
+    cpu = _LazyField("cpu", dict, {})
+
+    # Memory usage, for example {"usage": 73248768, "usage_peak": 73785344}
+    memory = _LazyField("memory", dict, {})
+
+    # Disk usage by device, for example {"root": {"usage": 502239232}}
+    disk = _LazyField("disk", dict, {})
+
+    # Network usage by interface, for example {"eth0": {"counters": {...}, "addresses": [...]}}
+    network = _LazyField("network", dict, {})
+
+
+def _instance_state_view(state: Optional[Mapping[str, Any]]) -> Optional[InstanceStateView]:
+    return InstanceStateView(state) if state is not None else None
+
+
+class InstanceView(_View):
+    """A LXD instance (container or virtual machine). Created from the metadata of an instance.
+
+    The state is only there when it was asked for, and only parsed when it is read.
+    """
+
+    __slots__ = (
+        "_name",
+        "_project",
+        "_instance_type",
+        "_status",
+        "_status_code",
+        "_architecture",
+        "_description",
+        "_config",
+        "_devices",
+        "_expanded_config",
+        "_expanded_devices",
+        "_profiles",
+        "_ephemeral",
+        "_stateful",
+        "_created_at",
+        "_last_used_at",
+        "_location",
+        "_state",
+        "_snapshots",
+        "_backups",
+    )
+    _fields = (
+        "name",
+        "project",
+        "instance_type",
+        "status",
+        "status_code",
+        "architecture",
+        "description",
+        "config",
+        "devices",
+        "expanded_config",
+        "expanded_devices",
+        "profiles",
+        "ephemeral",
+        "stateful",
+        "created_at",
+        "last_used_at",
+        "location",
+        "state",
+        "snapshots",
+        "backups",
+    )
+
+    # Instance name
+    # example: foo
+    name = _LazyField("name")
+
+    # Instance project name
+    # example: default
+    project = _LazyField("project", default="default")
+
+    # The type of instance (one of "container" or "virtual-machine")
+    # example: container
+    instance_type = _LazyField("type", default="container")
+
+    # Instance status (see instance_state)
+    # example: Running
+    status = _LazyField("status", default="")
+
+    # Instance status code (see instance_state)
+    # example: 101
+    status_code = _LazyField("status_code", default=0)
+
+    # Architecture name
+    # example: x86_64
+    architecture = _LazyField("architecture", default="")
+
+    # Instance description
+    # example: My test instance
+    description = _LazyField("description", default="")
+
+    # Instance configuration (see doc/instances.md)
+    # example: {"security.nesting": "true"}
+    config = _LazyField("config", dict, {})
+
+    # Instance devices (see doc/instances.md)
+    # example: {"root": {"type": "disk", "pool": "default", "path": "/"}}
+    devices = _LazyField("devices", dict, {})
+
+    # Expanded configuration (all profiles and local config merged)
+    # example: {"security.nesting": "true"}
+    expanded_config = _LazyField("expanded_config", dict, {})
+
+    # Expanded devices (all profiles and local devices merged)
+    # example: {"root": {"type": "disk", "pool": "default", "path": "/"}}
+    expanded_devices = _LazyField("expanded_devices", dict, {})
+
+    # List of profiles applied to the instance
+    # example: ["default"]
+    profiles = _LazyField("profiles", list, [])
+
+    # Whether the instance is ephemeral (deleted on shutdown)
+    # example: false
+    ephemeral = _LazyField("ephemeral", default=False)
+
+    # Whether the instance currently has saved state on disk
+    # example: false
+    stateful = _LazyField("stateful", default=False)
+
+    # Instance creation timestamp
+    # example: 2021-03-23T20:00:00-04:00
+    created_at = _LazyField("created_at", default="")
+
+    # Last start timestamp
+    # example: 2021-03-23T20:00:00-04:00
+    last_used_at = _LazyField("last_used_at", default="")
+
+    # What cluster member this instance is located on
+    # example: lxd01
+    location = _LazyField("location", default="")
+
+    # The state, with recursion=2. None otherwise.
+    state = _LazyField("state", _instance_state_view, None)
+
+    # The snapshots, with recursion=2. None otherwise.
+    snapshots = _LazyField("snapshots", default=None)
+
+    # The backups, with recursion=2. None otherwise.
+    backups = _LazyField("backups", default=None)
@@ -0,0 +1,152 @@
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from lxd_python.exceptions import LXDError, LXDTimeoutError, OperationFailedError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Operation
+
+# Longest a single long poll on /wait may take. Waiting longer is done with several polls, so dead connections are
+# noticed and the client timeout never has to be raised by much.
+WAIT_POLL: float = 30.0
+
+
+def operation_id(operation: str) -> str:
+    """The UUID of an operation, from its UUID or its path.
+
+    Example:
+        operation_id("/1.0/operations/6916c8a6-9b7d-4abd-90b3-aedfec7ec7da") == "6916c8a6-9b7d-4abd-90b3-aedfec7ec7da"
+    """
+    return operation.rstrip("/").rsplit("/", 1)[-1]
+
+
+def get_operation(lxd: LXD, operation: str) -> Operation:
+    """Get the current state of a background operation.
+
+    Args:
+        lxd: The LXD client.
+        operation: UUID or path of the operation.
+
+    Raises:
+        LXDError: If there is no such operation.
+
+    Returns:
+        Operation: The operation.
+    """
+    # Not through lxd.get(), the state of an operation must never come from the cache.
+    response = lxd.request("GET", f"/1.0/operations/{operation_id(operation)}")
+    return _operation(operation, lxd.codec.loads(response.content))
+
+
+def wait_operation(lxd: LXD, operation: str, timeout: Optional[float] = None) -> Operation:
+    """Wait for a background operation to finish.
+
+    Uses the /wait endpoint, which only answers once the operation is done, so there is no polling loop and the result
+    arrives as soon as the server has it.
+
+    Args:
+        lxd: The LXD client.
+        operation: UUID or path of the operation.
+        timeout: Seconds to wait. Defaults to waiting until it is done.
+
+    Raises:
+        OperationFailedError: If the operation failed or was cancelled.
+        LXDTimeoutError: If the operation is still running after timeout seconds.
+        LXDError: If there is no such operation.
+
+    Returns:
+        Operation: The finished operation.
+    """
+    expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+    while True:
+        poll: float = _poll_time(expires)
+        # Long poll until it is done, or only check whether it is done once out of time.
+        path: str = f"/1.0/operations/{operation_id(operation)}" + ("/wait" if poll > 0 else "")
+        params: Optional[Dict[str, str]] = {"timeout": _seconds(poll)} if poll > 0 else None
+        # A long poll is not a hung request, so neither the client timeout nor its deadline apply to it.
+        response = lxd.request("GET", path, params=params, timeout=poll + lxd.timeout, deadline=poll + lxd.timeout)
+        if (result := _finished(operation, lxd.codec.loads(response.content), expires)) is not None:
+            return result
+
+
+def _poll_time(expires: Optional[float]) -> float:
+    if expires is None:
+        return WAIT_POLL
+    return max(0.0, min(WAIT_POLL, expires - time.monotonic()))
+
+
+def _seconds(poll: float) -> str:
+    # LXD takes whole seconds, round up so we don't ask again just before it finishes.
+    return str(max(1, int(poll + 0.999)))
+
+
+def _operation(operation: str, response: Dict[str, Any]) -> Operation:
+    if response["error_code"]:
+        raise LXDError(f"{response['error_code']} - Could not get operation {operation}: {response['error']}")
+    return Operation(response["metadata"])
+
+
+def _finished(operation: str, response: Dict[str, Any], expires: Optional[float]) -> Optional[Operation]:
+    """The finished operation, or None to wait again. Raises if it failed or the time is up."""
+    result: Operation = _operation(operation, response)
+    if result.done:
+        if result.status_code != 200:
+            raise OperationFailedError(result.id, result.status, result.err)
+        return result
+    if expires is not None and time.monotonic() >= expires:
+        raise LXDTimeoutError(f"Operation {result.id} is still {result.status.lower()}.")
+    return None
+
+
+async def async_get_operation(lxd: AsyncLXD, operation: str) -> Operation:
+    """Asyncio version of get_operation().
+
+    Args:
+        lxd: The asyncio LXD client.
+        operation: UUID or path of the operation.
+
+    Raises:
+        LXDError: If there is no such operation.
+
+    Returns:
+        Operation: The operation.
+    """
+    response = await lxd.request("GET", f"/1.0/operations/{operation_id(operation)}")
+    return _operation(operation, lxd.codec.loads(response.content))
+
+
+async def async_wait_operation(lxd: AsyncLXD, operation: str, timeout: Optional[float] = None) -> Operation:
+    """Asyncio version of wait_operation().
+
+    Args:
+        lxd: The asyncio LXD client.
+        operation: UUID or path of the operation.
+        timeout: Seconds to wait. Defaults to waiting until it is done.
+
+    Raises:
+        OperationFailedError: If the operation failed or was cancelled.
+        LXDTimeoutError: If the operation is still running after timeout seconds.
+        LXDError: If there is no such operation.
+
+    Returns:
+        Operation: The finished operation.
+    """
+    expires: Optional[float] = None if timeout is None else time.monotonic() + timeout
+    while True:
+        poll: float = _poll_time(expires)
+        path: str = f"/1.0/operations/{operation_id(operation)}" + ("/wait" if poll > 0 else "")
+        params: Optional[Dict[str, str]] = {"timeout": _seconds(poll)} if poll > 0 else None
+        response = await lxd.request(
+            "GET", path, params=params, timeout=poll + lxd.timeout, deadline=poll + lxd.timeout
+        )
+        if (result := _finished(operation, lxd.codec.loads(response.content), expires)) is not None:
+            return result
+
+
+def websocket_path(operation: str, secret: str) -> str:
+    """The path of one of the websockets of an operation, like the stdin, stdout, stderr and control of an exec.
+
+    Example:
+        websocket_path("/1.0/operations/6916c8a6", "0c5a4f") == "/1.0/operations/6916c8a6/websocket?secret=0c5a4f"
+    """
+    return f"/1.0/operations/{operation_id(operation)}/websocket?{urlencode({'secret': secret})}"
@@ -0,0 +1,238 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from lxd_python.batch import BatchRequest, BatchResult, run_batch
+from lxd_python.capabilities import get_capabilities
+from lxd_python.certificates import certificate_fingerprint, get_all_certificates
+from lxd_python.lxd import LXD
+from lxd_python.models import Certificate, CertificatesPost
+
+if TYPE_CHECKING:
+    from cryptography import x509
+
+
+# The fields of a certificate PUT replaces.
+_PUT_FIELDS: Tuple[str, ...] = ("certificate", "name", "type", "restricted", "projects")
+
+
+@dataclass
+class DesiredCertificate:
+    """A certificate that should be in the trust store."""
+
+    # The certificate itself, as PEM encoded X509
+    # example: X509 PEM certificate
+    certificate: str
+
+    # Name associated with the certificate
+    # example: castiana
+    name: str
+
+    # Usage type for the certificate
+    # example: client
+    cert_type: str = "client"
+
+    # Whether to limit the certificate to listed projects
+    # example: true
+    restricted: bool = False
+
+    # List of allowed projects (applies when restricted)
+    # example: List["default", "foo", "bar"]
+    projects: List[str] = field(default_factory=list)
+
+    def fields(self) -> Dict[str, Any]:
+        """The fields that can be changed with PATCH, named like in the API."""
+        return {"name": self.name, "type": self.cert_type, "restricted": self.restricted, "projects": self.projects}
+
+
+@dataclass
+class CertificateUpdate:
+    """A certificate that is trusted but has the wrong fields."""
+
+    # Fingerprint of the certificate.
+    fingerprint: str
+
+    # The fields to PATCH, named like in the API.
+    # example: {"name": "castiana", "projects": ["default"]}
+    changes: Dict[str, Any]
+
+
+@dataclass
+class ReconcilePlan:
+    """What has to change to make the trust store match the desired certificates."""
+
+    # Certificates to add, by fingerprint.
+    add: Dict[str, CertificatesPost] = field(default_factory=dict)
+
+    # Fingerprints of the certificates to delete.
+    delete: List[str] = field(default_factory=list)
+
+    # Certificates to update.
+    update: List[CertificateUpdate] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        """Whether the trust store already matches."""
+        return not (self.add or self.delete or self.update)
+
+
+@dataclass
+class ReconcileResult:
+    """The outcome of one item of a ReconcilePlan."""
+
+    # What was done (one of "add", "delete" or "update").
+    action: str
+
+    # Fingerprint of the certificate.
+    fingerprint: str
+
+    # The error, None if it worked.
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def plan_certificates(
+    lxd: LXD,
+    desired: Iterable[DesiredCertificate],
+    prune: bool = True,
+    prune_types: Iterable[str] = ("client", "metrics"),
+) -> ReconcilePlan:
+    """Compare the desired certificates with the trust store, using one request.
+
+    Args:
+        lxd: The LXD client.
+        desired: The certificates that should be trusted.
+        prune: Delete trusted certificates that are not desired.
+        prune_types: Only delete certificates of these types. Server certificates of cluster members are left alone
+            by default.
+
+    Raises:
+        ValueError: If a desired certificate is not a valid PEM certificate.
+
+    Returns:
+        ReconcilePlan: What has to change.
+    """
+    from cryptography import x509
+
+    wanted: Dict[str, Tuple[DesiredCertificate, "x509.Certificate"]] = {}
+    for desired_certificate in desired:
+        cert: "x509.Certificate" = x509.load_pem_x509_certificate(desired_certificate.certificate.encode())
+        wanted[certificate_fingerprint(cert)] = (desired_certificate, cert)
+
+    trusted: Dict[str, Certificate] = {c.fingerprint: c for c in get_all_certificates(lxd)}
+    plan = ReconcilePlan()
+
+    for fingerprint, (desired_certificate, cert) in wanted.items():
+        current: Optional[Certificate] = trusted.get(fingerprint)
+        if current is None:
+            plan.add[fingerprint] = CertificatesPost.from_x509(
+                cert,
+                name=desired_certificate.name,
+                cert_type=desired_certificate.cert_type,
+                restricted=desired_certificate.restricted,
+                projects=desired_certificate.projects,
+            )
+            continue
+
+        current_fields: Dict[str, Any] = current.writable_fields()
+        changes: Dict[str, Any] = {
+            key: value
+            for key, value in desired_certificate.fields().items()
+            if _comparable(key, value) != _comparable(key, current_fields[key])
+        }
+        if changes:
+            plan.update.append(CertificateUpdate(fingerprint=fingerprint, changes=changes))
+
+    if prune:
+        types: FrozenSet[str] = frozenset(prune_types)
+        plan.delete = [fp for fp, c in trusted.items() if fp not in wanted and c.cert_type in types]
+    return plan
+
+
+def _comparable(key: str, value: Any) -> Any:
+    """The order of the projects doesn't matter."""
+    return sorted(value or []) if key == "projects" else value
+
+
+def _certificate_path(fingerprint: str) -> str:
+    return f"/1.0/certificates/{fingerprint}"
+
+
+def _put_requests(lxd: LXD, updates: List[CertificateUpdate]) -> List[Union[BatchRequest, BatchResult]]:
+    """PUTs of all the fields of each certificate, for servers without PATCH.
+
+    The certificates that could not be read get the failed GET instead.
+    """
+    current: List[BatchResult] = run_batch(lxd, [("GET", _certificate_path(u.fingerprint)) for u in updates])
+    requests: List[Union[BatchRequest, BatchResult]] = []
+    for result, update in zip(current, updates):
+        if not result.ok:
+            requests.append(result)
+            continue
+        fields: Dict[str, Any] = {key: result.metadata.get(key) for key in _PUT_FIELDS}
+        requests.append(BatchRequest(method="PUT", path=result.request.path, data={**fields, **update.changes}))
+    return requests
+
+
+def apply_plan(lxd: LXD, plan: ReconcilePlan) -> List[ReconcileResult]:
+    """Apply a plan, sending the changes at the same time with run_batch().
+
+    A failing item does not stop the others, check the result of each one.
+
+    Args:
+        lxd: The LXD client. At most lxd.max_workers changes are sent at the same time.
+        plan: The plan from plan_certificates().
+
+    Returns:
+        List[ReconcileResult]: One result per item, adds first, then updates, then deletes.
+    """
+    items: List[Tuple[str, str, Union[BatchRequest, BatchResult]]] = [
+        ("add", fingerprint, BatchRequest(method="POST", path="/1.0/certificates", data=certificate.dict()))
+        for fingerprint, certificate in plan.add.items()
+    ]
+    # Servers without PATCH get the whole certificate with PUT.
+    updates: List[Union[BatchRequest, BatchResult]]
+    if plan.update and get_capabilities(lxd).patch:
+        updates = [
+            BatchRequest(method="PATCH", path=_certificate_path(update.fingerprint), data=update.changes)
+            for update in plan.update
+        ]
+    else:
+        updates = _put_requests(lxd, plan.update) if plan.update else []
+    items += [("update", update.fingerprint, request) for update, request in zip(plan.update, updates)]
+    items += [("delete", fp, BatchRequest(method="DELETE", path=_certificate_path(fp))) for fp in plan.delete]
+
+    sent: Iterator[BatchResult] = iter(
+        run_batch(lxd, [request for _, _, request in items if isinstance(request, BatchRequest)])
+    )
+    return [
+        ReconcileResult(
+            action=action,
+            fingerprint=fingerprint,
+            error=(next(sent) if isinstance(request, BatchRequest) else request).error,
+        )
+        for action, fingerprint, request in items
+    ]
+
+
+def reconcile_certificates(
+    lxd: LXD,
+    desired: Iterable[DesiredCertificate],
+    prune: bool = True,
+    prune_types: Iterable[str] = ("client", "metrics"),
+) -> List[ReconcileResult]:
+    """Make the trust store match the desired certificates.
+
+    Shorthand for apply_plan(lxd, plan_certificates(lxd, desired, prune, prune_types)).
+
+    Args:
+        lxd: The LXD client.
+        desired: The certificates that should be trusted.
+        prune: Delete trusted certificates that are not desired.
+        prune_types: Only delete certificates of these types.
+
+    Returns:
+        List[ReconcileResult]: One result per change.
+    """
+    return apply_plan(lxd, plan_certificates(lxd, desired, prune, prune_types))
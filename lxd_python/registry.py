@@ -0,0 +1,97 @@
+import atexit
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+from lxd_python.lxd import LXD, get_socket_location
+
+# The clients of this process, by what they connect to.
+_clients: Dict[Tuple[Any, ...], LXD] = {}
+_lock = threading.Lock()
+_pid: int = os.getpid()
+
+
+def get_client(
+    socket_path: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    cert: Optional[Tuple[str, str]] = None,
+    verify: Union[bool, str] = True,
+    **options: Any,
+) -> LXD:
+    """Get the shared client for a socket or endpoint, creating it on first use.
+
+    Every caller in a process gets the same pooled client, instead of each opening its own connections. After a fork
+    the child gets new clients, so it never uses the connections of its parent. The clients are closed when the
+    process exits.
+
+    Example:
+        lxd = get_client()
+        remote = get_client(endpoint="https://lxd01:8443", cert=("client.crt", "client.key"))
+
+    Args:
+        socket_path: The path to the LXD socket. Defaults to get_socket_location().
+        endpoint: URL of a remote LXD server. Defaults to the Unix socket.
+        cert: Client certificate and key files to authenticate to the remote server with.
+        verify: Verify the certificate of the remote server, see LXD.
+        **options: Other arguments for LXD(). Only used when the client is created.
+
+    Returns:
+        LXD: The client.
+    """
+    key: Tuple[Any, ...] = (endpoint.rstrip("/"), cert, verify) if endpoint else (socket_path or get_socket_location(),)
+    _check_fork()
+    client: Optional[LXD] = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = LXD(
+                socket_path=socket_path, endpoint=endpoint, cert=cert, verify=verify, **options
+            )
+        return client
+
+
+def close_clients() -> None:
+    """Close every shared client. The next get_client() creates a new one."""
+    _check_fork()
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def _close_at_exit() -> None:
+    """Close the shared clients without logging, the log handlers may already be gone at exit."""
+    if os.getpid() != _pid:
+        return
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client._close()
+
+
+def _check_fork() -> None:
+    """Forget the clients of the parent process if this is a forked child.
+
+    register_at_fork() already handles os.fork(), the PID check also catches processes forked without it.
+    """
+    if os.getpid() != _pid:
+        _after_fork()
+
+
+def _after_fork() -> None:
+    global _lock, _pid
+    # The lock may have been held by another thread of the parent when it forked, it would never be released.
+    _lock = threading.Lock()
+    _pid = os.getpid()
+    # Dropped, not closed: the connections belong to the parent.
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+atexit.register(_close_at_exit)
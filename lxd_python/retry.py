@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+# Methods that can be sent twice without changing the outcome. POST and PATCH are never retried.
+IDEMPOTENT_METHODS: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Responses that mean the daemon is restarting or overloaded, for example during a snap refresh.
+RETRY_STATUSES: FrozenSet[int] = frozenset({502, 503, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """When and how often to retry a request.
+
+    Only idempotent requests are retried, and only when they could not connect, timed out or got one of
+    retry_statuses. The delay before retry n is random between 0 and min(max_backoff, backoff * 2**n) ("full
+    jitter"), so clients that failed together don't retry together.
+    """
+
+    # How many times to send a request in total. 1 disables retries.
+    max_attempts: int = 3
+
+    # Seconds the delay before the first retry is at most. Doubled for every retry after that.
+    backoff: float = 0.1
+
+    # The longest to wait before a retry.
+    max_backoff: float = 2.0
+
+    # The methods that are retried.
+    methods: FrozenSet[str] = IDEMPOTENT_METHODS
+
+    # The status codes that are retried.
+    statuses: FrozenSet[int] = RETRY_STATUSES
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before a retry, the first retry being 0."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**retry))
+
+
+class RetryBudget:
+    """Limits retries to a fraction of all requests, so retries can't pile up on a server that is already struggling.
+
+    Every request adds ratio tokens and every retry takes one, up to max_tokens. With the defaults, retries add at
+    most 10% to the load once the initial 10 tokens are used. One budget can be shared by several clients.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0) -> None:
+        """Create a retry budget. It starts full.
+
+        Args:
+            ratio: Tokens every request adds.
+            max_tokens: The most tokens that can be saved up.
+        """
+        self.ratio: float = ratio
+        self.max_tokens: float = max_tokens
+        self._tokens: float = max_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Add the tokens of a request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take the token for a retry. False if there is none, then the request should not be retried."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def after_fork(self) -> None:
+        """Replace the lock in a forked child. Another thread of the parent may have held it during the fork."""
+        self._lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """Stops sending requests to an endpoint that keeps failing, so callers fail fast instead of waiting for timeouts.
+
+    The circuit of an endpoint opens after failure_threshold failures in a row. While open, requests fail with
+    CircuitOpenError without being sent. After reset_timeout seconds one request is let through: if it works the
+    circuit closes, if it fails it opens again.
+
+    Endpoints are method and path template pairs, like GET /1.0/certificates/{fingerprint}.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """Create a circuit breaker.
+
+        Args:
+            failure_threshold: Failures in a row that open the circuit.
+            reset_timeout: Seconds to wait before trying an open circuit again.
+        """
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        # Failures in a row and when the circuit opened (None while closed), by endpoint.
+        self._circuits: Dict[Tuple[str, str], Tuple[int, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, method: str, template: str) -> bool:
+        """Whether a request to the endpoint may be sent."""
+        key: Tuple[str, str] = (method, template)
+        with self._lock:
+            failures, opened = self._circuits.get(key, (0, None))
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.reset_timeout:
+                return False
+            # Let this one request through. Others keep failing fast until it succeeds.
+            self._circuits[key] = (failures, time.monotonic())
+            return True
+
+    def record_success(self, method: str, template: str) -> None:
+        """Close the circuit of the endpoint."""
+        with self._lock:
+            self._circuits.pop((method, template), None)
+
+    def record_failure(self, method: str, template: str) -> None:
+        """Count a failure, opening the circuit if there were too many in a row."""
+        key: Tuple[str, str] = (method, template)
+        with self._lock:
+            failures, opened = self._circuits.get(key, (0, None))
+            failures += 1
+            if failures >= self.failure_threshold:
+                opened = time.monotonic()
+            self._circuits[key] = (failures, opened)
+
+    def is_open(self, method: str, template: str) -> bool:
+        """Whether the circuit of the endpoint is open."""
+        with self._lock:
+            return self._circuits.get((method, template), (0, None))[1] is not None
+
+    def after_fork(self) -> None:
+        """Replace the lock in a forked child. Another thread of the parent may have held it during the fork."""
+        self._lock = threading.Lock()
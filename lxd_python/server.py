@@ -1,6 +1,6 @@
 from typing import List
 
-from lxd_python.lxd import LXD
+from lxd_python.lxd import LXD, AsyncLXD
 from lxd_python.models import Server, SyncResponse
 
 
@@ -31,6 +31,35 @@ def get_server_environment_and_configuration(lxd: LXD, cluster_member_name: str,
     Returns:
         Server: The server environment and configuration.
     """
-    # TODO: Implement me.
     environment: SyncResponse = lxd.get("/1.0", params={"target": cluster_member_name, "project": project_name})
-    return Server(environment)
+    return Server(environment["metadata"])
+
+
+async def async_get_supported_api_endpoints(lxd: AsyncLXD) -> List[str]:
+    """Asyncio version of get_supported_api_endpoints().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Returns:
+        List[str]: A list of supported API versions (URLs).
+    """
+    api_endpoints: SyncResponse = await lxd.get("/")
+    return api_endpoints["metadata"]
+
+
+async def async_get_server_environment_and_configuration(
+    lxd: AsyncLXD, cluster_member_name: str, project_name: str
+) -> Server:
+    """Asyncio version of get_server_environment_and_configuration().
+
+    Args:
+        lxd: The asyncio LXD client.
+        cluster_member_name: The name of the cluster member.
+        project_name: The name of the project.
+
+    Returns:
+        Server: The server environment and configuration.
+    """
+    environment: SyncResponse = await lxd.get("/1.0", params={"target": cluster_member_name, "project": project_name})
+    return Server(environment["metadata"])
@@ -0,0 +1,223 @@
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, Optional, Tuple, TypeVar
+
+from httpx import Response
+
+from lxd_python.capabilities import async_get_capabilities, get_capabilities
+from lxd_python.certificates import async_get_certificates, get_certificates
+from lxd_python.codec import JSONCodec
+from lxd_python.exceptions import CertNotFoundError, LXDError, PreconditionFailedError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Certificate, Server, SyncResponse
+
+T = TypeVar("T", Certificate, Server)
+
+
+@dataclass
+class Tracked(Generic[T]):
+    """An object read from LXD that remembers how it was read, so save() only has to send what changed.
+
+    Example:
+        tracked = get_certificate_for_update(lxd, "abc123")
+        tracked.value.name = "castiana"
+        save(lxd, tracked)  # PATCH /1.0/certificates/abc123 {"name": "castiana"}
+    """
+
+    # Path of the object.
+    # Example: /1.0/certificates/abc123
+    path: str
+
+    # The object. Change its fields and pass the Tracked to save().
+    value: T
+
+    # ETag of the object when it was read. None if the server did not send one, or after save(), because LXD does not
+    # return the new ETag. Read the object again to keep saves safe from concurrent changes.
+    # Example: "9c0d8e..."
+    etag: Optional[str] = None
+
+    # The writable fields as they were read, named like in the API.
+    original: Dict[str, Any] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.original = deepcopy(self.value.writable_fields())
+
+    def changes(self) -> Dict[str, Any]:
+        """The writable fields that changed since the object was read, named like in the API.
+
+        Maps like the server config only contain the keys that changed. Removed keys are set to "", which unsets them.
+
+        Returns:
+            Dict[str, Any]: The changed fields, empty if nothing changed.
+        """
+        changes: Dict[str, Any] = {}
+        for key, value in self.value.writable_fields().items():
+            old: Any = self.original.get(key)
+            if isinstance(value, dict) and isinstance(old, dict):
+                changed: Dict[str, Any] = {k: v for k, v in value.items() if k not in old or old[k] != v}
+                changed.update({k: "" for k in old if k not in value})
+                if changed:
+                    changes[key] = changed
+            elif value != old:
+                changes[key] = value
+        return changes
+
+
+def get_certificate_for_update(lxd: LXD, fingerprint: str) -> Tracked[Certificate]:
+    """Get a certificate to change and save().
+
+    The certificate is always read from the server, never from the cache, so its ETag is current.
+
+    Args:
+        lxd: The LXD client.
+        fingerprint: Fingerprint of the certificate.
+
+    Raises:
+        CertNotFoundError: If there is no certificate with that fingerprint.
+        LXDError: If the certificate could not be read.
+
+    Returns:
+        Tracked[Certificate]: The certificate.
+    """
+    path: str = f"/1.0/certificates/{fingerprint.replace('/1.0/certificates/', '')}"
+    body, etag = _read(lxd.codec, lxd.request("GET", path))
+    if body["error_code"] == 404:
+        raise CertNotFoundError(fingerprint, get_certificates(lxd))
+    return Tracked(path=path, value=Certificate(_checked(body, path)), etag=etag)
+
+
+def get_server_for_update(lxd: LXD) -> Tracked[Server]:
+    """Get the server to change its config and save().
+
+    Args:
+        lxd: The LXD client.
+
+    Raises:
+        LXDError: If the server could not be read.
+
+    Returns:
+        Tracked[Server]: The server.
+    """
+    body, etag = _read(lxd.codec, lxd.request("GET", "/1.0"))
+    return Tracked(path="/1.0", value=Server(_checked(body, "/1.0")["metadata"]), etag=etag)
+
+
+def save(lxd: LXD, tracked: Tracked) -> Optional[SyncResponse]:
+    """Send the changes made to a tracked object, as a PATCH of only the fields that changed.
+
+    The request has an If-Match header with the ETag from when the object was read, so it fails instead of overwriting
+    a change someone else made in the meantime. Servers without the patch extension get a PUT of all writable fields
+    instead.
+
+    Args:
+        lxd: The LXD client.
+        tracked: The object from get_certificate_for_update() or get_server_for_update().
+
+    Raises:
+        PreconditionFailedError: If the object changed on the server since it was read. Read it again, redo the change
+            and save again.
+        LXDError: If the request failed. See LXD.request().
+
+    Returns:
+        Optional[SyncResponse]: The response from the LXD server, None if nothing changed.
+    """
+    changes: Dict[str, Any] = tracked.changes()
+    if not changes:
+        return None
+    method, data = _update_request(tracked, changes, get_capabilities(lxd).patch)
+    response: Response = lxd.request(method, tracked.path, data=data, headers=_if_match(tracked.etag))
+    if lxd.cache is not None:
+        lxd.cache.invalidate(tracked.path)
+    return _saved(lxd.codec, tracked, response)
+
+
+def _read(codec: JSONCodec, response: Response) -> Tuple[Dict[str, Any], Optional[str]]:
+    return codec.loads(response.content), response.headers.get("ETag")
+
+
+def _checked(body: Dict[str, Any], path: str) -> Dict[str, Any]:
+    if body["error_code"]:
+        raise LXDError(f"{body['error_code']} - Could not get {path}: {body['error']}")
+    return body
+
+
+def _update_request(tracked: Tracked, changes: Dict[str, Any], patch: bool) -> Tuple[str, Dict[str, Any]]:
+    if patch:
+        return "PATCH", changes
+    return "PUT", tracked.value.writable_fields()
+
+
+def _if_match(etag: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"If-Match": etag} if etag else None
+
+
+def _saved(codec: JSONCodec, tracked: Tracked, response: Response) -> SyncResponse:
+    if response.status_code == 412:
+        raise PreconditionFailedError(tracked.path, tracked.etag)
+    body = codec.loads(response.content)
+    if not body["error_code"]:
+        tracked.original = deepcopy(tracked.value.writable_fields())
+        tracked.etag = None
+    return body
+
+
+async def async_get_certificate_for_update(lxd: AsyncLXD, fingerprint: str) -> Tracked[Certificate]:
+    """Asyncio version of get_certificate_for_update().
+
+    Args:
+        lxd: The asyncio LXD client.
+        fingerprint: Fingerprint of the certificate.
+
+    Raises:
+        CertNotFoundError: If there is no certificate with that fingerprint.
+        LXDError: If the certificate could not be read.
+
+    Returns:
+        Tracked[Certificate]: The certificate.
+    """
+    path: str = f"/1.0/certificates/{fingerprint.replace('/1.0/certificates/', '')}"
+    body, etag = _read(lxd.codec, await lxd.request("GET", path))
+    if body["error_code"] == 404:
+        raise CertNotFoundError(fingerprint, await async_get_certificates(lxd))
+    return Tracked(path=path, value=Certificate(_checked(body, path)), etag=etag)
+
+
+async def async_get_server_for_update(lxd: AsyncLXD) -> Tracked[Server]:
+    """Asyncio version of get_server_for_update().
+
+    Args:
+        lxd: The asyncio LXD client.
+
+    Raises:
+        LXDError: If the server could not be read.
+
+    Returns:
+        Tracked[Server]: The server.
+    """
+    body, etag = _read(lxd.codec, await lxd.request("GET", "/1.0"))
+    return Tracked(path="/1.0", value=Server(_checked(body, "/1.0")["metadata"]), etag=etag)
+
+
+async def async_save(lxd: AsyncLXD, tracked: Tracked) -> Optional[SyncResponse]:
+    """Asyncio version of save().
+
+    Args:
+        lxd: The asyncio LXD client.
+        tracked: The object from async_get_certificate_for_update() or async_get_server_for_update().
+
+    Raises:
+        PreconditionFailedError: If the object changed on the server since it was read.
+        LXDError: If the request failed. See AsyncLXD.request().
+
+    Returns:
+        Optional[SyncResponse]: The response from the LXD server, None if nothing changed.
+    """
+    changes: Dict[str, Any] = tracked.changes()
+    if not changes:
+        return None
+    capabilities = await async_get_capabilities(lxd)
+    method, data = _update_request(tracked, changes, capabilities.patch)
+    response: Response = await lxd.request(method, tracked.path, data=data, headers=_if_match(tracked.etag))
+    if lxd.cache is not None:
+        lxd.cache.invalidate(tracked.path)
+    return _saved(lxd.codec, tracked, response)
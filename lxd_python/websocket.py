@@ -0,0 +1,395 @@
+import asyncio
+import base64
+import hashlib
+import os
+import socket
+import struct
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from lxd_python.exceptions import WebSocketError
+from lxd_python.lxd import LXD, AsyncLXD
+
+OPCODE_CONTINUATION: int = 0x0
+OPCODE_TEXT: int = 0x1
+OPCODE_BINARY: int = 0x2
+OPCODE_CLOSE: int = 0x8
+OPCODE_PING: int = 0x9
+OPCODE_PONG: int = 0xA
+
+# Appended to the client key to get the Sec-WebSocket-Accept header the server must answer with.
+_ACCEPT_GUID: bytes = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Response headers bigger than this are not from a LXD server.
+_MAX_HEADER_SIZE: int = 65536
+
+
+def accept_key(key: str) -> str:
+    """The Sec-WebSocket-Accept value for a Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1(key.encode() + _ACCEPT_GUID).digest()).decode()
+
+
+def encode_frame(opcode: int, payload: bytes = b"", mask: bool = True) -> bytes:
+    """Encode a single, final websocket frame.
+
+    Args:
+        opcode: The frame opcode. For example, OPCODE_TEXT.
+        payload: The frame payload.
+        mask: Mask the payload. Clients must mask, servers must not.
+
+    Returns:
+        bytes: The frame.
+    """
+    length: int = len(payload)
+    mask_bit: int = 0x80 if mask else 0
+    if length < 126:
+        header: bytes = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+
+    if not mask:
+        return header + payload
+
+    masking_key: bytes = os.urandom(4)
+    return header + masking_key + _apply_mask(payload, masking_key)
+
+
+def _apply_mask(payload: bytes, masking_key: bytes) -> bytes:
+    """XOR the payload with the masking key, using one big integer instead of a Python loop over every byte."""
+    if not payload:
+        return payload
+    repeated_key: bytes = (masking_key * (len(payload) // 4 + 1))[: len(payload)]
+    masked: int = int.from_bytes(payload, "big") ^ int.from_bytes(repeated_key, "big")
+    return masked.to_bytes(len(payload), "big")
+
+
+def _handshake_request(path: str, host: str = "localhost") -> Tuple[bytes, str]:
+    """Build the HTTP upgrade request. Returns the request and the key the server has to answer."""
+    key: str = base64.b64encode(os.urandom(16)).decode()
+    request: str = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n"
+        "\r\n"
+    )
+    return request.encode(), key
+
+
+def _check_handshake_response(raw: bytes, key: str) -> None:
+    """Raise WebSocketError if the server did not switch protocols."""
+    lines: List[str] = raw.decode("latin-1").split("\r\n")
+    status_line: str = lines[0]
+    if " 101 " not in f"{status_line} ":
+        raise WebSocketError(f"Websocket handshake failed: {status_line}")
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("sec-websocket-accept") != accept_key(key):
+        raise WebSocketError("Websocket handshake failed: wrong Sec-WebSocket-Accept")
+
+
+def _parse_header(first: bytes) -> Tuple[bool, int, bool, int]:
+    """Parse the first two bytes of a frame into (fin, opcode, masked, length)."""
+    byte1, byte2 = first[0], first[1]
+    return bool(byte1 & 0x80), byte1 & 0x0F, bool(byte2 & 0x80), byte2 & 0x7F
+
+
+class WebSocket:
+    """A blocking websocket (RFC 6455) connection.
+
+    LXD uses websockets for /1.0/events and for the streams of exec operations. httpx can't do websockets, so this
+    speaks just enough of the protocol to read and write messages over the same socket as the LXD client.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock: socket.socket = sock
+        self._buffer: bytearray = bytearray()
+        self.closed: bool = False
+
+    def _read_exactly(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk: bytes = self.sock.recv(max(65536, size - len(self._buffer)))
+            if not chunk:
+                raise WebSocketError("Connection closed by the server")
+            self._buffer += chunk
+        data: bytes = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def fileno(self) -> int:
+        """The file descriptor of the socket, so several websockets can be waited on with selectors."""
+        return self.sock.fileno()
+
+    @property
+    def pending(self) -> bool:
+        """Whether data was already read from the socket but not returned by recv() yet.
+
+        select() can't see it, so check this before waiting for the socket to become readable.
+        """
+        return bool(self._buffer)
+
+    def _read_frame(self) -> Tuple[bool, int, bytes]:
+        fin, opcode, masked, length = _parse_header(self._read_exactly(2))
+        if length == 126:
+            (length,) = struct.unpack("!H", self._read_exactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", self._read_exactly(8))
+        masking_key: bytes = self._read_exactly(4) if masked else b""
+        payload: bytes = self._read_exactly(length)
+        return fin, opcode, _apply_mask(payload, masking_key) if masked else payload
+
+    def recv(self) -> Optional[Tuple[int, bytes]]:
+        """Receive the next message.
+
+        Pings are answered and fragmented messages are put back together.
+
+        Returns:
+            Tuple[int, bytes] | None: The opcode and payload of the message, or None when the server closed the
+            connection.
+        """
+        if self.closed:
+            return None
+
+        message_opcode: int = OPCODE_CONTINUATION
+        fragments: List[bytes] = []
+        while True:
+            fin, opcode, payload = self._read_frame()
+            if opcode == OPCODE_PING:
+                self.sock.sendall(encode_frame(OPCODE_PONG, payload))
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                self.close(payload[:2])
+                return None
+
+            if opcode != OPCODE_CONTINUATION:
+                message_opcode = opcode
+            fragments.append(payload)
+            if fin:
+                return message_opcode, b"".join(fragments)
+
+    def send(self, data: bytes | str) -> None:
+        """Send a text (str) or binary (bytes) message."""
+        if isinstance(data, str):
+            self.sock.sendall(encode_frame(OPCODE_TEXT, data.encode()))
+        else:
+            self.sock.sendall(encode_frame(OPCODE_BINARY, bytes(data)))
+
+    def close(self, code: bytes = struct.pack("!H", 1000)) -> None:
+        """Send a close frame and close the socket."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.sendall(encode_frame(OPCODE_CLOSE, code))
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+
+    def __enter__(self) -> "WebSocket":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncWebSocket:
+    """An asyncio websocket connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.closed: bool = False
+
+    async def _read_exactly(self, size: int) -> bytes:
+        try:
+            return await self.reader.readexactly(size)
+        except asyncio.IncompleteReadError as e:
+            raise WebSocketError("Connection closed by the server") from e
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        fin, opcode, masked, length = _parse_header(await self._read_exactly(2))
+        if length == 126:
+            (length,) = struct.unpack("!H", await self._read_exactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self._read_exactly(8))
+        masking_key: bytes = await self._read_exactly(4) if masked else b""
+        payload: bytes = await self._read_exactly(length)
+        return fin, opcode, _apply_mask(payload, masking_key) if masked else payload
+
+    async def recv(self) -> Optional[Tuple[int, bytes]]:
+        """Asyncio version of WebSocket.recv()."""
+        if self.closed:
+            return None
+
+        message_opcode: int = OPCODE_CONTINUATION
+        fragments: List[bytes] = []
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == OPCODE_PING:
+                self.writer.write(encode_frame(OPCODE_PONG, payload))
+                await self.writer.drain()
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                await self.close(payload[:2])
+                return None
+
+            if opcode != OPCODE_CONTINUATION:
+                message_opcode = opcode
+            fragments.append(payload)
+            if fin:
+                return message_opcode, b"".join(fragments)
+
+    async def send(self, data: bytes | str) -> None:
+        """Asyncio version of WebSocket.send()."""
+        if isinstance(data, str):
+            self.writer.write(encode_frame(OPCODE_TEXT, data.encode()))
+        else:
+            self.writer.write(encode_frame(OPCODE_BINARY, bytes(data)))
+        await self.writer.drain()
+
+    async def close(self, code: bytes = struct.pack("!H", 1000)) -> None:
+        """Asyncio version of WebSocket.close()."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write(encode_frame(OPCODE_CLOSE, code))
+            await self.writer.drain()
+        except OSError:
+            pass
+        finally:
+            self.writer.close()
+
+    async def __aenter__(self) -> "AsyncWebSocket":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+def connect_unix(socket_path: str, path: str, timeout: Optional[float] = None) -> WebSocket:
+    """Open a websocket to path over a Unix socket.
+
+    Args:
+        socket_path: The path to the LXD socket.
+        path: The path to connect to, with the query string. For example, /1.0/events?type=lifecycle.
+        timeout: Seconds to wait for the connection and for each read. Defaults to waiting forever.
+
+    Raises:
+        WebSocketError: If the server does not accept the websocket.
+
+    Returns:
+        WebSocket: The connection.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+        return _handshake(sock, path)
+    except BaseException:
+        sock.close()
+        raise
+
+
+def connect(lxd: Union[LXD, AsyncLXD], path: str, timeout: Optional[float] = None) -> WebSocket:
+    """Open a websocket to path on the server of a LXD client, over its Unix socket or over TLS.
+
+    Args:
+        lxd: The LXD client. Its socket, or its endpoint and client certificate, are used.
+        path: The path to connect to, with the query string. For example, /1.0/events?type=lifecycle.
+        timeout: Seconds to wait for the connection and for each read. Defaults to waiting forever.
+
+    Raises:
+        WebSocketError: If the server does not accept the websocket.
+
+    Returns:
+        WebSocket: The connection.
+    """
+    if lxd.socket_path:
+        return connect_unix(lxd.socket_path, path, timeout)
+
+    url = urlsplit(lxd.base_url)
+    port: int = url.port or (443 if url.scheme == "https" else 80)
+    sock: socket.socket = socket.create_connection((url.hostname, port), timeout=timeout)
+    try:
+        if lxd.ssl_context is not None:
+            sock = lxd.ssl_context.wrap_socket(sock, server_hostname=url.hostname)
+        return _handshake(sock, path, url.netloc)
+    except BaseException:
+        sock.close()
+        raise
+
+
+def _handshake(sock: socket.socket, path: str, host: str = "localhost") -> WebSocket:
+    request, key = _handshake_request(path, host)
+    sock.sendall(request)
+
+    response: bytes = b""
+    while b"\r\n\r\n" not in response:
+        chunk: bytes = sock.recv(4096)
+        if not chunk or len(response) > _MAX_HEADER_SIZE:
+            raise WebSocketError("Websocket handshake failed: no response from the server")
+        response += chunk
+
+    raw_headers, _, rest = response.partition(b"\r\n\r\n")
+    _check_handshake_response(raw_headers, key)
+
+    websocket = WebSocket(sock)
+    # The server may already have sent the first frames together with the handshake.
+    websocket._buffer += rest
+    return websocket
+
+
+async def async_connect(lxd: Union[LXD, AsyncLXD], path: str) -> AsyncWebSocket:
+    """Asyncio version of connect()."""
+    if lxd.socket_path:
+        return await async_connect_unix(lxd.socket_path, path)
+
+    url = urlsplit(lxd.base_url)
+    port: int = url.port or (443 if url.scheme == "https" else 80)
+    reader, writer = await asyncio.open_connection(
+        url.hostname, port, ssl=lxd.ssl_context, server_hostname=url.hostname if lxd.ssl_context else None
+    )
+    try:
+        return await _async_handshake(reader, writer, path, url.netloc)
+    except BaseException:
+        writer.close()
+        raise
+
+
+async def async_connect_unix(socket_path: str, path: str) -> AsyncWebSocket:
+    """Asyncio version of connect_unix()."""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        return await _async_handshake(reader, writer, path)
+    except BaseException:
+        writer.close()
+        raise
+
+
+async def _async_handshake(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str, host: str = "localhost"
+) -> AsyncWebSocket:
+    request, key = _handshake_request(path, host)
+    writer.write(request)
+    await writer.drain()
+
+    try:
+        raw_headers: bytes = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        raise WebSocketError("Websocket handshake failed: no response from the server") from e
+    _check_handshake_response(raw_headers[:-4], key)
+    return AsyncWebSocket(reader, writer)
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from typing import List
+
+import pytest
+
+from lxd_python.batch import BatchRequest, BatchResult, async_run_batch, response_error, run_batch
+from lxd_python.certificates import get_certificates
+from lxd_python.lxd import LXD, AsyncLXD
+
+lxd: LXD = LXD()
+
+
+def test_batch_request_from_tuple() -> None:
+    assert BatchRequest.from_tuple(("get", "/1.0", {"target": "lxd01"})) == BatchRequest(
+        method="GET", path="/1.0", params={"target": "lxd01"}
+    )
+    assert BatchRequest.from_tuple(("PATCH", "/1.0/certificates/abc", {"name": "new"})) == BatchRequest(
+        method="PATCH", path="/1.0/certificates/abc", data={"name": "new"}
+    )
+    assert BatchRequest.from_tuple(("DELETE", "/1.0/certificates/abc")).data is None
+
+
+def test_run_batch() -> None:
+    results: List[BatchResult] = run_batch(
+        lxd, [("GET", "/"), BatchRequest("GET", "/1.0/cluster"), ("GET", "/1.0/certificates/does-not-exist")]
+    )
+    assert [result.request.path for result in results] == ["/", "/1.0/cluster", "/1.0/certificates/does-not-exist"]
+    assert results[0].ok and results[0].metadata == ["/1.0"]
+    assert results[1].ok and results[1].metadata["enabled"] is False
+    assert not results[2].ok
+    assert results[2].metadata is None
+    assert run_batch(lxd, []) == []
+
+
+def test_bugs_are_raised() -> None:
+    class BuggyLXD(LXD):
+        def get(self, path: str, *args, **kwargs):
+            raise TypeError("a bug")
+
+    with pytest.raises(TypeError):
+        run_batch(BuggyLXD(), [("GET", "/")])
+
+
+def test_run_batch_every_certificate() -> None:
+    urls: List[str] = get_certificates(lxd)
+    results: List[BatchResult] = run_batch(lxd, [("GET", url) for url in urls])
+    assert [result.metadata["fingerprint"] for result in results] == [url.rsplit("/", 1)[-1] for url in urls]
+
+
+def test_shared_between_threads() -> None:
+    shared = LXD(max_workers=4)
+    errors: List[BaseException] = []
+
+    def work() -> None:
+        try:
+            for _ in range(20):
+                assert shared.get("/")["metadata"] == ["/1.0"]
+            assert all(result.ok for result in run_batch(shared, [("GET", "/")] * 10))
+        except BaseException as e:
+            errors.append(e)
+
+    threads: List[threading.Thread] = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    shared.close()
+    assert not errors
+
+
+def test_response_error() -> None:
+    assert response_error({"error_code": 0, "error": ""}) is None
+    assert response_error({"error_code": 404, "error": "Not found"}) == "Not found"
+    assert response_error({"error_code": 500, "error": ""}) == "Error 500"
+    assert response_error(None) == "No response from LXD"
+
+
+def test_async_run_batch() -> None:
+    async def run() -> List[BatchResult]:
+        async with AsyncLXD() as async_lxd:
+            return await async_run_batch(async_lxd, [("GET", "/"), ("GET", "/1.0/certificates/does-not-exist")])
+
+    results: List[BatchResult] = asyncio.run(run())
+    assert [result.ok for result in results] == [True, False]
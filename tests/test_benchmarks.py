@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+from benchmarks.fake_lxd import FakeLXD, fake_certificate
+from benchmarks.run import SCENARIOS, Result, percentile, run_scenario
+from lxd_python.certificates import get_all_certificates, get_certificate
+from lxd_python.lxd import LXD
+
+
+def test_fake_lxd() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "lxd.socket")
+        with FakeLXD(socket_path, certificates=5):
+            lxd = LXD(socket_path=socket_path)
+            assert len(get_all_certificates(lxd)) == 5
+            assert get_certificate(lxd, fake_certificate(4)["fingerprint"]).name == "client-4"
+            assert lxd.get("/1.0/nothing")["error_code"] == 404
+            lxd.close()
+        assert not os.path.exists(socket_path)
+
+
+def test_run_scenario() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "lxd.socket")
+        with FakeLXD(socket_path, certificates=5):
+            for scenario in SCENARIOS:
+                result: Result = run_scenario(scenario, socket_path, requests=5, warmup=1, alloc_requests=2)
+                assert result.requests_per_second > 0
+                assert 0 < result.p50_ms <= result.p99_ms
+
+
+def test_percentile() -> None:
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 51
+    assert percentile(values, 0.99) == 100
+    assert percentile([], 0.5) == 0
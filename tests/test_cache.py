@@ -0,0 +1,58 @@
+import time
+
+from lxd_python.cache import ResponseCache
+from lxd_python.cluster import get_cluster
+from lxd_python.lxd import LXD
+from lxd_python.models import Cluster
+
+lxd: LXD = LXD(cache=ResponseCache(ttls={"/1.0/cluster": 60}))
+
+
+def test_lru_eviction() -> None:
+    cache = ResponseCache(max_entries=2)
+    for path in ("/a", "/b"):
+        cache.store(cache.key(path), path, {"metadata": path}, None)
+
+    # Touch /a so /b is the least recently used entry.
+    assert cache.get(cache.key("/a")) is not None
+    cache.store(cache.key("/c"), "/c", {"metadata": "/c"}, None)
+
+    assert len(cache) == 2
+    assert cache.get(cache.key("/b")) is None
+    assert cache.get(cache.key("/a")) is not None
+
+
+def test_ttl_by_prefix() -> None:
+    cache = ResponseCache(default_ttl=0, ttls={"/1.0": 60, "/1.0/certificates": 0.01})
+    assert cache.ttl_for("/1.0/cluster") == 60
+    assert cache.ttl_for("/1.0/certificates/abc") == 0.01
+    assert cache.ttl_for("/") == 0
+
+    key = cache.key("/1.0/certificates", {"recursion": 1})
+    cache.store(key, "/1.0/certificates", {}, '"etag"')
+    entry = cache.get(key)
+    assert entry is not None
+    assert entry.is_fresh()
+    time.sleep(0.02)
+    assert not entry.is_fresh()
+
+
+def test_invalidate_path_and_collection() -> None:
+    cache = ResponseCache()
+    cache.store(cache.key("/1.0/certificates"), "/1.0/certificates", {}, None)
+    cache.store(cache.key("/1.0/certificates", {"recursion": 1}), "/1.0/certificates", {}, None)
+    cache.store(cache.key("/1.0/certificates/abc"), "/1.0/certificates/abc", {}, None)
+    cache.store(cache.key("/1.0/cluster"), "/1.0/cluster", {}, None)
+
+    cache.invalidate("/1.0/certificates/abc")
+    assert len(cache) == 1
+    assert cache.get(cache.key("/1.0/cluster")) is not None
+
+
+def test_cached_get_cluster() -> None:
+    assert lxd.cache is not None
+    lxd.cache.clear()
+
+    cluster: Cluster = get_cluster(lxd)
+    assert len(lxd.cache) == 1
+    assert get_cluster(lxd) == cluster
@@ -0,0 +1,73 @@
+from typing import Callable, List
+
+import pytest
+
+from lxd_python import reconcile
+from lxd_python.capabilities import Capabilities, get_capabilities
+from lxd_python.certificates import delete_certificate, get_all_certificates, get_certificates
+from lxd_python.exceptions import LXDError
+from lxd_python.lxd import LXD
+from lxd_python.models import Certificate, Server
+from lxd_python.reconcile import DesiredCertificate, ReconcileResult, reconcile_certificates
+from lxd_python.server import get_server_environment_and_configuration
+
+lxd: LXD = LXD()
+
+
+def test_capabilities() -> None:
+    capabilities = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset({"etag", "patch"}))
+    assert capabilities.etag
+    assert capabilities.patch
+    assert not capabilities.filtering
+    assert "etag" in capabilities
+    assert capabilities.has_all(["etag", "patch"])
+    assert not capabilities.has("container_full")
+
+
+def test_get_capabilities_is_cached() -> None:
+    client: LXD = LXD()
+    capabilities: Capabilities = get_capabilities(client)
+    assert capabilities.api_version == "1.0"
+    assert capabilities.has_all(["etag", "patch"])
+    assert get_capabilities(client) is capabilities
+    assert get_capabilities(client, refresh=True) == capabilities
+
+
+def test_errors_are_not_cached() -> None:
+    class FailingOnceLXD(LXD):
+        failed: bool = False
+
+        def get(self, path: str, *args, **kwargs):
+            if path == "/1.0" and not self.failed:
+                self.failed = True
+                return {"type": "error", "error_code": 500, "error": "Internal error", "metadata": None}
+            return super().get(path, *args, **kwargs)
+
+    client = FailingOnceLXD()
+    with pytest.raises(LXDError, match="500"):
+        get_capabilities(client)
+    assert get_capabilities(client).instances
+
+
+def test_server_environment_and_configuration() -> None:
+    server: Server = get_server_environment_and_configuration(lxd, cluster_member_name="", project_name="default")
+    assert server.api_version == "1.0"
+    assert Capabilities.from_server(server) == get_capabilities(lxd)
+
+
+def test_update_without_patch(monkeypatch, make_pem: Callable[[str], str]) -> None:
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+    pem: str = make_pem("no-patch")
+    reconcile_certificates(lxd, [DesiredCertificate(certificate=pem, name="before")])
+
+    # An old server without PATCH gets the whole certificate with PUT.
+    old_server = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset())
+    monkeypatch.setattr(reconcile, "get_capabilities", lambda lxd: old_server)
+    results: List[ReconcileResult] = reconcile_certificates(
+        lxd, [DesiredCertificate(certificate=pem, name="after", restricted=True, projects=["default"])]
+    )
+    assert [(result.action, result.ok) for result in results] == [("update", True)]
+
+    certificates: List[Certificate] = get_all_certificates(lxd)
+    assert [(c.name, c.restricted, c.projects) for c in certificates] == [("after", True, ["default"])]
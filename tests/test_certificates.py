@@ -1,8 +1,22 @@
-from typing import List
-
-from lxd_python.certificates import add_certificate, delete_certificate, get_certificate, get_certificates
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from lxd_python.certificates import (
+    CertificateImportResult,
+    add_certificate,
+    certificate_fingerprint,
+    delete_certificate,
+    get_all_certificates,
+    get_certificate,
+    get_certificate_views,
+    get_certificates,
+    import_certificates,
+    parse_pem_bundle,
+)
+from lxd_python.exceptions import CertNotFoundError, LXDError
 from lxd_python.lxd import LXD
-from lxd_python.models import Certificate, CertificatesPost, SyncResponse
+from lxd_python.models import Certificate, CertificatesPost, CertificateView, SyncResponse
 
 lxd: LXD = LXD()
 
@@ -97,3 +111,100 @@ def test_add_certificate() -> None:  # sourcery skip: extract-duplicate-method
     assert type(certificates) == list
     assert certificates != []
     assert type(certificates[0]) == str
+
+
+def test_get_all_certificates_with_recursion() -> None:
+    # Remove all certificates from the LXD server.
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+    assert get_all_certificates(lxd) == []
+
+    with open("tests/cert.pem", "r") as cert_from_file:
+        new_cert: CertificatesPost = CertificatesPost(
+            certificate=str(cert_from_file.read()),
+            name="test",
+            projects=["default"],
+            restricted=False,
+            token=False,
+            cert_type="client",
+            password="",
+        )
+        add_certificate(lxd, new_cert)
+
+    certificates: List[Certificate] = get_all_certificates(lxd)
+    assert len(certificates) == 1
+    assert type(certificates[0]) == Certificate
+    assert certificates[0].name == "test"
+    assert certificates[0] == get_certificate(lxd, certificates[0].fingerprint)
+
+    views: List[CertificateView] = get_certificate_views(lxd)
+    assert len(views) == 1
+    assert views[0].fingerprint == certificates[0].fingerprint
+    assert views[0].fields() == certificates[0].__dict__
+
+
+def test_get_all_certificates_without_recursion(make_pem: Callable[[str], str]) -> None:
+    """Servers that ignore recursion get asked for each certificate, and failures are not left out."""
+
+    class NoRecursionLXD(LXD):
+        def __init__(self) -> None:
+            super().__init__()
+            self.errors: Dict[str, int] = {}
+
+        def get(self, path: str, *args, **kwargs) -> Any:
+            if path == "/1.0/certificates":
+                return super().get(path)
+            if path in self.errors:
+                code: int = self.errors[path]
+                return {"type": "error", "status": "", "status_code": 0, "error_code": code, "error": "Failed"}
+            return super().get(path, *args, **kwargs)
+
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+    import_certificates(lxd, [make_pem("first"), make_pem("second")])
+    first, second = get_certificates(lxd)
+
+    client: NoRecursionLXD = NoRecursionLXD()
+    assert sorted(c.fingerprint for c in get_all_certificates(client)) == sorted(
+        c.fingerprint for c in get_all_certificates(lxd)
+    )
+
+    # Deleted since it was listed.
+    client.errors[first] = 404
+    assert [f"/1.0/certificates/{c.fingerprint}" for c in get_all_certificates(client)] == [second]
+
+    client.errors[second] = 500
+    with pytest.raises(LXDError, match=second):
+        get_all_certificates(client)
+
+
+def test_get_certificate_not_found() -> None:
+    with pytest.raises(CertNotFoundError):
+        get_certificate(lxd, "does-not-exist")
+
+
+def test_import_certificates(make_pem: Callable[[str], str]) -> None:
+    # Remove all certificates from the LXD server.
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+
+    pems: List[str] = [make_pem(f"import-{i}") for i in range(5)]
+    bundle: str = "".join(pems)
+    fingerprints: List[str] = [certificate_fingerprint(cert) for cert in parse_pem_bundle(bundle)]
+    assert len(fingerprints) == 5
+
+    # Import the first three.
+    first_bundle: str = "".join(pems[:3])
+    result: CertificateImportResult = import_certificates(lxd, [first_bundle])
+    assert sorted(result.added) == sorted(fingerprints[:3])
+    assert result.skipped == []
+    assert result.failed == {}
+
+    # Importing everything again only adds the missing certificates.
+    result = import_certificates(lxd, [bundle, bundle])
+    assert sorted(result.added) == sorted(fingerprints[3:])
+    assert sorted(result.skipped) == sorted(fingerprints[:3])
+
+    certificates: List[Certificate] = get_all_certificates(lxd)
+    assert sorted(c.fingerprint for c in certificates) == sorted(fingerprints)
+    assert {c.name for c in certificates} == {f"import-{i}" for i in range(5)}
@@ -1,10 +1,94 @@
-from lxd_python.cluster import get_cluster
-from lxd_python.lxd import LXD
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from lxd_python.cluster import (
+    MemberResult,
+    async_fan_out,
+    async_get_cluster,
+    fan_out,
+    get_cluster,
+    get_cluster_members,
+)
+from lxd_python.lxd import LXD, AsyncLXD
 from lxd_python.models import Cluster, MemberConfig
 
 lxd: LXD = LXD()
 
 
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+
+class ClusterHandler(BaseHTTPRequestHandler):
+    """Fake cluster of three members. lxd02 is slow and lxd03 is broken."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def address_string(self) -> str:
+        return "unix"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        target: str = parse_qs(url.query).get("target", [""])[0]
+        metadata = None
+        error: str = ""
+        if url.path == "/1.0/cluster/members":
+            metadata = [f"/1.0/cluster/members/lxd0{i}" for i in range(1, 4)]
+        elif target == "lxd02":
+            time.sleep(1)
+        elif target == "lxd03":
+            error = "Failed to connect to cluster member"
+        else:
+            metadata = {"environment": {"server_name": target}}
+
+        body: bytes = json.dumps(
+            {
+                "type": "error" if error else "sync",
+                "status": "" if error else "Success",
+                "status_code": 0 if error else 200,
+                "operation": "",
+                "error_code": 500 if error else 0,
+                "error": error,
+                "metadata": metadata,
+            }
+        ).encode()
+        self.send_response(500 if error else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+
+@pytest.fixture()
+def cluster_socket() -> Iterator[str]:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "cluster.socket")
+        server = UnixHTTPServer(socket_path, ClusterHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            yield socket_path
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
 def test_get_cluster() -> None:  # sourcery skip: extract-method
     """cluster: Cluster = get_cluster(lxd)"""
     cluster: Cluster = get_cluster(lxd)
@@ -24,3 +108,49 @@ def test_get_cluster() -> None:  # sourcery skip: extract-method
 
     assert type(cluster.server_name) == str
     assert cluster.server_name == ""
+
+
+def test_async_get_cluster() -> None:
+    async def get() -> Cluster:
+        async with AsyncLXD() as async_lxd:
+            return await async_get_cluster(async_lxd)
+
+    cluster: Cluster = asyncio.run(get())
+    assert type(cluster) == Cluster
+    assert cluster.enabled is False
+
+
+def test_get_cluster_members(cluster_socket: str) -> None:
+    assert get_cluster_members(LXD(socket_path=cluster_socket)) == ["lxd01", "lxd02", "lxd03"]
+
+
+def test_fan_out(cluster_socket: str) -> None:
+    start: float = time.perf_counter()
+    results: Dict[str, MemberResult] = fan_out(LXD(socket_path=cluster_socket), "/1.0", timeout=0.3)
+    assert time.perf_counter() - start < 1
+
+    assert list(results) == ["lxd01", "lxd02", "lxd03"]
+    assert results["lxd01"].ok
+    assert results["lxd01"].metadata == {"environment": {"server_name": "lxd01"}}
+    assert results["lxd02"].error == "Timed out after 0.3 seconds"
+    assert results["lxd03"].error == "Failed to connect to cluster member"
+    assert results["lxd03"].metadata is None
+
+
+def test_fan_out_bugs_are_raised(cluster_socket: str) -> None:
+    with pytest.raises(TypeError):
+        fan_out(LXD(socket_path=cluster_socket), "/1.0", params=["recursion=1"], timeout=0.3)  # type: ignore[arg-type]
+
+
+def test_fan_out_not_clustered() -> None:
+    assert fan_out(LXD(), "/1.0", members=[]) == {}
+
+
+def test_async_fan_out(cluster_socket: str) -> None:
+    async def get() -> Dict[str, MemberResult]:
+        async with AsyncLXD(socket_path=cluster_socket) as async_lxd:
+            return await async_fan_out(async_lxd, "/1.0", timeout=0.3)
+
+    results: Dict[str, MemberResult] = asyncio.run(get())
+    assert [result.ok for result in results.values()] == [True, False, False]
+    assert results["lxd02"].error == "Timed out after 0.3 seconds"
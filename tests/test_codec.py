@@ -0,0 +1,59 @@
+from typing import Any, Dict
+
+import pytest
+
+from lxd_python.codec import JSONCodec, OrjsonCodec, StdlibJSONCodec, default_codec
+from lxd_python.lxd import LXD
+from lxd_python.server import get_supported_api_endpoints
+
+document: Dict[str, Any] = {"type": "sync", "metadata": [{"name": "c1", "config": {"limits.cpu": "2"}}, "ünïcode"]}
+
+
+def test_stdlib_codec_round_trip() -> None:
+    codec = StdlibJSONCodec()
+    encoded: bytes = codec.dumps(document)
+    assert type(encoded) == bytes
+    assert codec.loads(encoded) == document
+
+
+def test_orjson_codec_round_trip() -> None:
+    pytest.importorskip("orjson")
+    codec = OrjsonCodec()
+    assert codec.loads(codec.dumps(document)) == document
+    assert codec.loads(StdlibJSONCodec().dumps(document)) == document
+
+
+def test_default_codec() -> None:
+    try:
+        import orjson  # noqa: F401
+
+        assert default_codec().name == "orjson"
+    except ImportError:
+        assert default_codec().name == "json"
+
+
+def test_client_uses_codec() -> None:
+    class CountingCodec(StdlibJSONCodec):
+        decoded: int = 0
+
+        def loads(self, data: bytes) -> Any:
+            assert type(data) == bytes
+            self.decoded += 1
+            return super().loads(data)
+
+    codec = CountingCodec()
+    lxd: LXD = LXD(codec=codec)
+    assert isinstance(lxd.codec, JSONCodec)
+    assert get_supported_api_endpoints(lxd) == ["/1.0"]
+    assert codec.decoded == 1
+
+
+def test_incomplete_codec() -> None:
+    class EncodeOnlyCodec(JSONCodec):
+        def dumps(self, obj: Any) -> bytes:
+            return b"{}"
+
+    with pytest.raises(TypeError):
+        EncodeOnlyCodec()
+    with pytest.raises(TypeError):
+        JSONCodec()
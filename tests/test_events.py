@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+from itertools import islice
+from typing import Any, List
+
+import pytest
+
+from lxd_python.codec import StdlibJSONCodec
+from lxd_python.events import async_iter_events, events_path, iter_events
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Event
+from lxd_python.websocket import OPCODE_CLOSE, OPCODE_PING, OPCODE_TEXT, accept_key, encode_frame
+
+
+def lifecycle_event(action: str) -> bytes:
+    event = {
+        "type": "lifecycle",
+        "timestamp": "2023-01-01T00:00:00Z",
+        "metadata": {"action": action, "source": "/1.0/instances/c1"},
+        "location": "none",
+        "project": "default",
+    }
+    return encode_frame(OPCODE_TEXT, json.dumps(event).encode(), mask=False)
+
+
+def serve_events(socket_path: str, connections: List[List[bytes]], paths: List[str]) -> threading.Thread:
+    """Fake /1.0/events server. Each connection gets its frames, then the socket is closed."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+
+    def serve() -> None:
+        for frames in connections:
+            conn, _ = server.accept()
+            request: bytes = b""
+            while b"\r\n\r\n" not in request:
+                request += conn.recv(4096)
+            lines: List[str] = request.decode().split("\r\n")
+            paths.append(lines[0].split()[1])
+            key: str = next(line.split(":", 1)[1].strip() for line in lines if line.startswith("Sec-WebSocket-Key"))
+            conn.sendall(
+                b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                + f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n".encode()
+            )
+            try:
+                for frame in frames:
+                    conn.sendall(frame)
+            except OSError:
+                # The client stopped reading once it had the events it wanted.
+                pass
+            conn.close()
+        server.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+class CountingCodec(StdlibJSONCodec):
+    def __init__(self) -> None:
+        self.decoded: int = 0
+
+    def loads(self, data: bytes) -> Any:
+        self.decoded += 1
+        return super().loads(data)
+
+
+def test_events_path() -> None:
+    assert events_path() == "/1.0/events"
+    assert events_path(["lifecycle", "operation"], "web") == "/1.0/events?type=lifecycle%2Coperation&project=web"
+    with pytest.raises(ValueError):
+        events_path(["unknown"])
+
+
+def test_iter_events_reconnects() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "events.socket")
+        paths: List[str] = []
+        connections: List[List[bytes]] = [
+            # The first connection drops without a close frame, so the client has to reconnect.
+            [lifecycle_event("instance-created"), encode_frame(OPCODE_PING, b"ping", mask=False)],
+            [lifecycle_event("instance-started"), encode_frame(OPCODE_CLOSE, b"\x03\xe8", mask=False)],
+        ]
+        thread = serve_events(socket_path, connections, paths)
+
+        codec = CountingCodec()
+        lxd = LXD(socket_path=socket_path, codec=codec)
+        events: List[Event] = list(islice(iter_events(lxd, types=["lifecycle"], reconnect_delay=0.01), 2))
+        thread.join(timeout=5)
+
+    assert [event.metadata["action"] for event in events] == ["instance-created", "instance-started"]
+    assert all(type(event) == Event and event.event_type == "lifecycle" for event in events)
+    assert paths == ["/1.0/events?type=lifecycle", "/1.0/events?type=lifecycle"]
+    # Events are decoded with the codec of the client.
+    assert codec.decoded == 2
+
+
+def test_async_iter_events() -> None:
+    async def collect(socket_path: str) -> List[Event]:
+        async with AsyncLXD(socket_path=socket_path) as lxd:
+            return [event async for event in async_iter_events(lxd, project="default", reconnect=False)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "events.socket")
+        paths: List[str] = []
+        frames: List[bytes] = [lifecycle_event(f"instance-{i}") for i in range(3)]
+        thread = serve_events(socket_path, [frames + [encode_frame(OPCODE_CLOSE, mask=False)]], paths)
+
+        events: List[Event] = asyncio.run(collect(socket_path))
+        thread.join(timeout=5)
+
+    assert [event.metadata["action"] for event in events] == ["instance-0", "instance-1", "instance-2"]
+    assert paths == ["/1.0/events?project=default"]
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import List, Tuple
+
+import pytest
+
+from lxd_python import execute
+from lxd_python.exceptions import InstanceNotFoundError, LXDError, LXDTimeoutError
+from lxd_python.execute import (
+    STDERR,
+    STDOUT,
+    AsyncExecSession,
+    ExecResult,
+    ExecSession,
+    async_exec_command,
+    async_exec_many,
+    async_start_exec,
+    exec_command,
+    exec_many,
+    start_exec,
+)
+from lxd_python.instances import iter_instances
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Operation
+from lxd_python.operations import async_wait_operation, wait_operation, websocket_path
+
+lxd: LXD = LXD()
+
+
+def test_websocket_path() -> None:
+    assert websocket_path("/1.0/operations/abc", "s3cr3t") == "/1.0/operations/abc/websocket?secret=s3cr3t"
+
+
+def test_exec_command() -> None:
+    result: ExecResult = exec_command(lxd, "c1", ["sh", "-c", "echo out; echo err >&2; exit 3"])
+    assert (result.exit_code, result.stdout, result.stderr) == (3, b"out\n", b"err\n")
+    assert result.error is None
+    assert not result.ok
+
+    result = exec_command(lxd, "c1", "sh -c 'echo $GREETING; pwd'", environment={"GREETING": "hi"}, cwd="/tmp")
+    assert result.ok
+    assert result.stdout == b"hi\n/tmp\n"
+
+
+def test_stdin() -> None:
+    data: bytes = bytes(range(256)) * 8192
+    assert exec_command(lxd, "c1", "cat", stdin=data).stdout == data
+    assert exec_command(lxd, "c1", "cat", stdin=iter([b"a", b"b", b"c"])).stdout == b"abc"
+
+
+def test_output_is_streamed() -> None:
+    started: float = time.perf_counter()
+    arrived: List[Tuple[int, bytes, float]] = []
+    result: ExecResult = exec_command(
+        lxd,
+        "c1",
+        ["sh", "-c", "echo first; sleep 0.5; echo second >&2"],
+        output=lambda fd, chunk: arrived.append((fd, chunk, time.perf_counter() - started)),
+        capture=False,
+    )
+    assert result.ok
+    assert (result.stdout, result.stderr) == (b"", b"")
+    assert [(fd, chunk) for fd, chunk, _ in arrived] == [(STDOUT, b"first\n"), (STDERR, b"second\n")]
+    assert arrived[0][2] < 0.4
+
+
+def test_errors() -> None:
+    with pytest.raises(InstanceNotFoundError):
+        exec_command(lxd, "missing", "true")
+    with pytest.raises(LXDError, match="not running"):
+        exec_command(lxd, "c2", "true")
+
+    started: float = time.perf_counter()
+    with pytest.raises(LXDTimeoutError):
+        exec_command(lxd, "c1", "sleep 10", timeout=0.3)
+    assert time.perf_counter() - started < 2
+
+
+def test_timeout_kills_the_command(monkeypatch) -> None:
+    """A command that closed its output times out in wait(), and must still be killed."""
+    sessions: List[ExecSession] = []
+
+    def recording_start_exec(*args, **kwargs) -> ExecSession:
+        sessions.append(start_exec(*args, **kwargs))
+        return sessions[-1]
+
+    monkeypatch.setattr(execute, "start_exec", recording_start_exec)
+    with pytest.raises(LXDTimeoutError):
+        exec_command(lxd, "c1", ["sh", "-c", "exec >&- 2>&-; sleep 5"], timeout=0.5)
+    assert wait_operation(lxd, sessions[0].operation, timeout=2).done
+
+
+def test_async_timeout_kills_the_command(monkeypatch) -> None:
+    sessions: List[AsyncExecSession] = []
+
+    async def recording_start_exec(*args, **kwargs) -> AsyncExecSession:
+        sessions.append(await async_start_exec(*args, **kwargs))
+        return sessions[-1]
+
+    async def run() -> Operation:
+        async with AsyncLXD() as client:
+            with pytest.raises(LXDTimeoutError):
+                await async_exec_command(client, "c1", ["sh", "-c", "exec >&- 2>&-; sleep 5"], timeout=0.5)
+            return await async_wait_operation(client, sessions[0].operation, timeout=2)
+
+    monkeypatch.setattr(execute, "async_start_exec", recording_start_exec)
+    assert asyncio.run(run()).done
+
+
+def test_session() -> None:
+    with start_exec(lxd, "c1", "cat", interactive=True, width=80, height=24) as session:
+        session.write(b"hello")
+        session.resize(120, 40)
+        session.close_stdin()
+        assert b"".join(chunk for _, chunk in session.output(timeout=5)) == b"hello"
+        assert session.wait(timeout=5) == 0
+
+    with start_exec(lxd, "c1", "sleep 10") as session:
+        session.close_stdin()
+        session.signal(15)
+        assert list(session.output(timeout=5)) == []
+        assert session.wait(timeout=5) == -15
+
+
+def test_exec_many() -> None:
+    running = iter_instances(lxd, filter="status eq Running", all_projects=True)
+    results: List[ExecResult] = exec_many(lxd, [*running, "c2", "missing"], "echo ok", timeout=5)
+    assert [(result.project, result.instance) for result in results] == [
+        ("default", "c1"),
+        ("default", "c3"),
+        ("dev", "d1"),
+        ("default", "c2"),
+        ("default", "missing"),
+    ]
+    assert [result.stdout for result in results[:3]] == [b"ok\n"] * 3
+    assert "not running" in results[3].error
+    assert "not found" in results[4].error
+    assert exec_many(lxd, [], "true") == []
+
+
+def test_async_exec() -> None:
+    async def run() -> Tuple[ExecResult, List[ExecResult], bytes]:
+        async with AsyncLXD() as client:
+            result: ExecResult = await async_exec_command(
+                client, "c1", ["sh", "-c", "cat; echo done >&2"], stdin=[b"a", b"b"]
+            )
+            with pytest.raises(LXDTimeoutError):
+                await async_exec_command(client, "c1", "sleep 10", timeout=0.3)
+
+            session = await async_start_exec(client, "c1", "cat", interactive=True)
+            async with session:
+                await session.write(b"tty")
+                await session.close_stdin()
+                echoed: bytes = b"".join([chunk async for _, chunk in session.output(timeout=5)])
+                assert await session.wait(timeout=5) == 0
+
+            many: List[ExecResult] = await async_exec_many(
+                client, ["c1", "c3", "c2"] * 20, "echo ok", timeout=5, max_concurrency=8
+            )
+            return result, many, echoed
+
+    result, many, echoed = asyncio.run(run())
+    assert (result.exit_code, result.stdout, result.stderr) == (0, b"ab", b"done\n")
+    assert echoed == b"tty"
+    assert [result.ok for result in many[:3]] == [True, True, False]
+    assert sum(result.ok for result in many) == 40
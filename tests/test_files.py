@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import io
+import os
+import tracemalloc
+from pathlib import Path
+from typing import AsyncIterator, List
+
+import pytest
+
+from lxd_python.exceptions import LXDError
+from lxd_python.files import FileDownload, async_pull_file, async_push_file, pull_file, push_file
+from lxd_python.lxd import LXD, AsyncLXD
+
+lxd: LXD = LXD()
+
+
+def test_push_and_pull_bytes() -> None:
+    result = push_file(lxd, "web", "/etc/motd", b"hello\n", uid=1000, gid=1001, mode=0o640)
+    assert result["error_code"] == 0
+
+    with pull_file(lxd, "web", "/etc/motd") as download:
+        assert (download.info.uid, download.info.gid, download.info.mode) == (1000, 1001, 0o640)
+        assert download.info.file_type == "file"
+        assert b"".join(download) == b"hello\n"
+
+
+def test_push_iterator_and_file_object() -> None:
+    push_file(lxd, "web", "/tmp/chunks", iter([b"a" * 10, b"b" * 10, b"c"]))
+    assert b"".join(pull_file(lxd, "web", "/tmp/chunks")) == b"a" * 10 + b"b" * 10 + b"c"
+
+    # A pipe-like object without a size is sent with chunked encoding.
+    push_file(lxd, "web", "/tmp/stream", io.BytesIO(b"0123456789"), chunk_size=3)
+    chunks: List[bytes] = list(pull_file(lxd, "web", "/tmp/stream", chunk_size=4))
+    assert chunks == [b"0123", b"4567", b"89"]
+
+
+def test_push_and_pull_large_file_streams(tmp_path: Path) -> None:
+    source: Path = tmp_path / "artifact.bin"
+    with open(source, "wb") as f:
+        for i in range(32):
+            f.write(os.urandom(1024 * 1024))
+    digest: str = hashlib.sha256(source.read_bytes()).hexdigest()
+
+    tracemalloc.start()
+    try:
+        push_file(lxd, "web", "/srv/artifact.bin", source)
+        pushed_peak: int = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+
+        destination: Path = tmp_path / "pulled.bin"
+        assert pull_file(lxd, "web", "/srv/artifact.bin").save(destination) == 32 * 1024 * 1024
+        pulled_peak: int = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert hashlib.sha256(destination.read_bytes()).hexdigest() == digest
+    # 32 MiB went each way, but only a few chunks were ever in memory.
+    assert pushed_peak < 4 * 1024 * 1024
+    assert pulled_peak < 4 * 1024 * 1024
+
+
+def test_pull_missing_file() -> None:
+    with pytest.raises(LXDError, match="404"):
+        pull_file(lxd, "web", "/does/not/exist")
+
+
+def test_closing_a_download_early_releases_the_connection() -> None:
+    push_file(lxd, "web", "/tmp/big", b"x" * 100_000)
+    for _ in range(30):
+        download: FileDownload = pull_file(lxd, "web", "/tmp/big", chunk_size=10)
+        next(iter(download))
+        download.close()
+    assert lxd.get("/1.0")["error_code"] == 0
+
+
+def test_async_push_and_pull(tmp_path: Path) -> None:
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (b"async ", b"chunks"):
+            yield chunk
+
+    async def run() -> List[bytes]:
+        async with AsyncLXD() as client:
+            await async_push_file(client, "web", "/tmp/async", chunks(), mode=0o600)
+            async with await async_pull_file(client, "web", "/tmp/async") as download:
+                assert download.info.mode == 0o600
+                first: bytes = b"".join([chunk async for chunk in download])
+
+            source: Path = tmp_path / "local.txt"
+            source.write_bytes(b"from a local file")
+            await async_push_file(client, "web", "/tmp/local", source)
+            await (await async_pull_file(client, "web", "/tmp/local")).save(tmp_path / "copy.txt")
+            return [first, (tmp_path / "copy.txt").read_bytes()]
+
+    assert asyncio.run(run()) == [b"async chunks", b"from a local file"]
@@ -0,0 +1,32 @@
+import pytest
+
+from lxd_python.filters import compile_filter, lookup
+
+INSTANCE = {
+    "name": "c1",
+    "status": "Running",
+    "ephemeral": False,
+    "config": {"image.os": "ubuntu", "limits.cpu": "2"},
+}
+
+
+def test_lookup() -> None:
+    assert lookup(INSTANCE, "name") == "c1"
+    assert lookup(INSTANCE, "config.image.os") == "ubuntu"
+    assert lookup(INSTANCE, "config.missing") is None
+    assert lookup(INSTANCE, "name.nested") is None
+
+
+def test_compile_filter() -> None:
+    assert compile_filter("status eq Running")(INSTANCE)
+    assert compile_filter("config.image.os eq ubuntu and ephemeral eq false")(INSTANCE)
+    assert not compile_filter("status ne Running")(INSTANCE)
+    assert compile_filter("status eq Stopped or name eq c1")(INSTANCE)
+    assert compile_filter("not status eq Stopped and name eq c1")(INSTANCE)
+    assert not compile_filter("name eq 'c1 with spaces'")(INSTANCE)
+
+
+@pytest.mark.parametrize("expression", ["status", "status eq", "status gt 1", "status eq Running and"])
+def test_invalid_filter(expression: str) -> None:
+    with pytest.raises(ValueError):
+        compile_filter(expression)
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import httpx
+import pytest
+
+from lxd_python.exceptions import LXDError
+from lxd_python.images import (
+    ImageExport,
+    _MultipartParser,
+    async_export_image,
+    async_import_image,
+    export_image,
+    import_image,
+)
+from lxd_python.lxd import LXD, AsyncLXD
+
+lxd: LXD = LXD()
+
+
+def write_random(path: Path, size: int) -> bytes:
+    data: bytes = os.urandom(size)
+    path.write_bytes(data)
+    return data
+
+
+def test_import_and_export_unified_image(tmp_path: Path) -> None:
+    tarball: bytes = write_random(tmp_path / "alpine.tar.xz", 3 * 1024 * 1024 + 17)
+    progress: List[Tuple[int, Optional[int]]] = []
+
+    fingerprint: str = import_image(
+        lxd, tmp_path / "alpine.tar.xz", properties={"os": "Alpine"}, progress=lambda *args: progress.append(args)
+    )
+    assert fingerprint == hashlib.sha256(tarball).hexdigest()
+    assert progress[-1] == (len(tarball), len(tarball))
+    assert len(progress) == 4
+
+    exported: ImageExport = export_image(lxd, fingerprint[:12], tmp_path / "export.tar.xz")
+    assert exported.fingerprint == fingerprint
+    assert exported.paths == [str(tmp_path / "export.tar.xz")]
+    assert (tmp_path / "export.tar.xz").read_bytes() == tarball
+
+
+def test_import_and_export_split_image(tmp_path: Path) -> None:
+    metadata: bytes = write_random(tmp_path / "meta.tar.xz", 1000)
+    rootfs: bytes = write_random(tmp_path / "rootfs.squashfs", 2 * 1024 * 1024)
+
+    fingerprint: str = import_image(lxd, tmp_path / "meta.tar.xz", tmp_path / "rootfs.squashfs", chunk_size=64 * 1024)
+    assert fingerprint == hashlib.sha256(metadata + rootfs).hexdigest()
+
+    exported: ImageExport = export_image(lxd, fingerprint, tmp_path / "out.tar.xz", chunk_size=4096)
+    assert exported.paths == [str(tmp_path / "out.tar.xz"), str(tmp_path / "out.tar.xz.rootfs")]
+    assert exported.size == len(metadata) + len(rootfs)
+    assert (tmp_path / "out.tar.xz").read_bytes() == metadata
+    assert (tmp_path / "out.tar.xz.rootfs").read_bytes() == rootfs
+
+
+def test_export_missing_image(tmp_path: Path) -> None:
+    with pytest.raises(LXDError, match="404"):
+        export_image(lxd, "0" * 64, tmp_path / "missing.tar.xz")
+
+
+class CannedLXD(LXD):
+    """Answers every request with the same response."""
+
+    def __init__(self, response: httpx.Response) -> None:
+        super().__init__()
+        self.response: httpx.Response = response
+
+    def request(self, *args, **kwargs) -> httpx.Response:
+        return self.response
+
+
+def test_export_interrupted(tmp_path: Path) -> None:
+    def broken_stream() -> Iterator[bytes]:
+        yield b"x" * 1024
+        raise httpx.ReadError("Connection reset")
+
+    with pytest.raises(httpx.ReadError):
+        export_image(CannedLXD(httpx.Response(200, content=broken_stream())), "0" * 64, tmp_path / "cut.tar.xz")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_error_that_is_not_json(tmp_path: Path) -> None:
+    response: httpx.Response = httpx.Response(502, content=b"<html>Bad Gateway</html>")
+    with pytest.raises(LXDError, match="502 - Could not export image"):
+        export_image(CannedLXD(response), "0" * 64, tmp_path / "proxy.tar.xz")
+
+
+def test_multipart_parser_with_split_delimiters() -> None:
+    body: bytes = (
+        b'--b0\r\nContent-Disposition: form-data; name="metadata"\r\n\r\nfirst\r\n--b1-not-the-boundary'
+        b'\r\n--b0\r\nContent-Disposition: form-data; name="rootfs"\r\n\r\nsecond\r\n--b0--\r\n'
+    )
+    parts: List[List] = []
+    parser = _MultipartParser(
+        b"b0", lambda name: parts.append([name, b""]), lambda data: parts[-1].__setitem__(1, parts[-1][1] + data)
+    )
+    for i in range(len(body)):
+        parser.feed(body[i : i + 1])
+    assert parts == [["metadata", b"first\r\n--b1-not-the-boundary"], ["rootfs", b"second"]]
+
+
+def test_async_import_and_export(tmp_path: Path) -> None:
+    metadata: bytes = write_random(tmp_path / "meta.tar.xz", 500)
+    rootfs: bytes = write_random(tmp_path / "disk.qcow2", 300_000)
+
+    async def run() -> ImageExport:
+        async with AsyncLXD() as client:
+            fingerprint: str = await async_import_image(
+                client, tmp_path / "meta.tar.xz", tmp_path / "disk.qcow2", image_type="virtual-machine"
+            )
+            return await async_export_image(client, fingerprint, tmp_path / "vm.tar.xz", tmp_path / "vm.qcow2")
+
+    exported: ImageExport = asyncio.run(run())
+    assert exported.fingerprint == hashlib.sha256(metadata + rootfs).hexdigest()
+    assert (tmp_path / "vm.qcow2").read_bytes() == rootfs
@@ -0,0 +1,97 @@
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+import pytest
+
+from lxd_python.cache import ResponseCache
+from lxd_python.certificates import (
+    add_certificate,
+    delete_certificate,
+    get_all_certificates,
+    get_certificates,
+    import_certificates,
+)
+from lxd_python.exceptions import LXDError
+from lxd_python.informer import Informer
+from lxd_python.lxd import LXD
+from lxd_python.models import Certificate, CertificatesPost, Cluster, Server
+from lxd_python.websocket import WebSocket
+
+lxd: LXD = LXD()
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_informer_follows_certificate_changes() -> None:
+    # Remove all certificates from the LXD server.
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+
+    changes: List[Tuple[str, str, Any, Any]] = []
+    with Informer(lxd, on_change=lambda *change: changes.append(change)) as informer:
+        assert informer.certificates() == []
+        assert type(informer.server) == Server
+        assert type(informer.cluster) == Cluster
+
+        with open("tests/cert.pem", "r") as cert_from_file:
+            new_cert: CertificatesPost = CertificatesPost(
+                certificate=str(cert_from_file.read()),
+                name="informer",
+                projects=["default"],
+                restricted=False,
+                token=False,
+                cert_type="client",
+                password="",
+            )
+            add_certificate(lxd, new_cert)
+
+        assert wait_for(lambda: informer.get_certificate_by_name("informer") is not None)
+        certificate: Certificate = get_all_certificates(lxd)[0]
+        assert informer.get_certificate(certificate.fingerprint) == certificate
+        assert ("certificate", certificate.fingerprint, None, certificate) in changes
+
+        delete_certificate(lxd=lxd, fingerprint=f"/1.0/certificates/{certificate.fingerprint}")
+        assert wait_for(lambda: informer.get_certificate(certificate.fingerprint) is None)
+        assert informer.get_certificate_by_name("informer") is None
+        assert ("certificate", certificate.fingerprint, certificate, None) in changes
+
+
+def test_failed_start_closes_the_event_stream() -> None:
+    class FailingInformer(Informer):
+        websocket: Optional[WebSocket] = None
+
+        def _connect(self) -> WebSocket:
+            self.websocket = super()._connect()
+            return self.websocket
+
+        def resync(self) -> None:
+            raise LXDError("Could not load")
+
+    informer: FailingInformer = FailingInformer(lxd)
+    with pytest.raises(LXDError):
+        informer.start()
+    assert informer.websocket is not None and informer.websocket.closed
+    assert informer._websocket is None
+    assert informer._threads == []
+
+
+def test_informer_does_not_read_the_cache(make_pem: Callable[[str], str]) -> None:
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+    import_certificates(lxd, [make_pem("cached")])
+    path: str = get_certificates(lxd)[0]
+
+    cached_lxd: LXD = LXD(cache=ResponseCache(default_ttl=60))
+    cached_lxd.get(path)
+    with Informer(cached_lxd) as informer:
+        # Changed behind the back of the cache.
+        lxd.patch(path, data={"name": "renamed"})
+        assert wait_for(lambda: informer.get_certificate_by_name("renamed") is not None)
+        assert informer.get_certificate_by_name("cached") is None
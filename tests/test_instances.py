@@ -0,0 +1,157 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from lxd_python import instances
+from lxd_python.capabilities import Capabilities
+from lxd_python.exceptions import InstanceNotFoundError, LXDError
+from lxd_python.instances import (
+    async_get_instance,
+    async_get_instances,
+    get_instance,
+    get_instances,
+    iter_instances,
+)
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import InstanceView
+
+lxd: LXD = LXD()
+
+
+class RecordingLXD(LXD):
+    """Remembers the query parameters of every GET."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.params: List[Dict[str, Any]] = []
+
+    def get(self, path: str, *args, **kwargs):
+        self.params.append(dict(kwargs.get("params") or {}))
+        return super().get(path, *args, **kwargs)
+
+
+def names(views: List[InstanceView]) -> List[str]:
+    return [view.name for view in views]
+
+
+def test_get_instances() -> None:
+    views: List[InstanceView] = get_instances(lxd)
+    assert names(views) == ["c1", "c2", "c3"]
+    assert views[0].config["image.os"] == "ubuntu"
+    assert views[0].state is None
+
+
+def test_state_is_parsed_when_read() -> None:
+    view: InstanceView = next(iter_instances(lxd, recursion=2))
+    assert isinstance(view.raw["state"], dict)
+    assert view.state.status == "Running"
+    assert view.state is view.state
+
+
+def test_filter_is_sent_to_the_server() -> None:
+    client = RecordingLXD()
+    views: List[InstanceView] = get_instances(client, filter="status eq Running and config.image.os eq alpine")
+    assert names(views) == ["c3"]
+    assert client.params[-1]["filter"] == "status eq Running and config.image.os eq alpine"
+
+
+def test_old_server(monkeypatch) -> None:
+    """Filtering, recursion=2 and all-projects are done here on servers without them."""
+    old_server = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset({"instances"}))
+    monkeypatch.setattr(instances, "get_capabilities", lambda lxd: old_server)
+    client = RecordingLXD()
+
+    views: List[InstanceView] = get_instances(client, recursion=2, filter="status eq Running", all_projects=True)
+    assert [(view.project, view.name) for view in views] == [("default", "c1"), ("default", "c3"), ("dev", "d1")]
+    assert [view.state.status for view in views] == ["Running"] * 3
+    assert all("filter" not in params and params.get("recursion") != 2 for params in client.params)
+
+
+def test_projects() -> None:
+    assert names(get_instances(lxd, project="dev")) == ["d1"]
+    assert names(get_instances(lxd, all_projects=True)) == ["c1", "c2", "c3", "d1"]
+
+
+def test_paging() -> None:
+    views: List[InstanceView] = list(iter_instances(lxd, recursion=2, all_projects=True, page_size=3))
+    assert names(views) == ["c1", "c2", "c3", "d1"]
+    assert views[3].project == "dev"
+    assert views[3].state.pid == 100
+
+
+def test_failed_states(monkeypatch) -> None:
+    """States that could not be fetched are raised, states of deleted instances are skipped."""
+
+    class FailingStateLXD(LXD):
+        def __init__(self, error_code: int) -> None:
+            super().__init__()
+            self.error_code: int = error_code
+
+        def get(self, path: str, *args, **kwargs):
+            if path == "/1.0/instances/c1/state":
+                return {"type": "error", "error_code": self.error_code, "error": "Failed", "metadata": None}
+            return super().get(path, *args, **kwargs)
+
+    with pytest.raises(LXDError, match="/1.0/instances/c1/state"):
+        list(iter_instances(FailingStateLXD(500), recursion=2, page_size=2))
+    assert names(list(iter_instances(FailingStateLXD(404), recursion=2, page_size=2))) == ["c2", "c3"]
+
+    # Old servers without recursion=2.
+    old_server = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset({"instances"}))
+    monkeypatch.setattr(instances, "get_capabilities", lambda lxd: old_server)
+    with pytest.raises(LXDError, match="/1.0/instances/c1/state"):
+        get_instances(FailingStateLXD(500), recursion=2)
+    assert names(get_instances(FailingStateLXD(404), recursion=2)) == ["c2", "c3"]
+
+
+def test_get_instance() -> None:
+    assert get_instance(lxd, "d1", project="dev", state=True).state.status == "Running"
+    with pytest.raises(InstanceNotFoundError):
+        get_instance(lxd, "missing")
+    with pytest.raises(ValueError):
+        get_instances(lxd, recursion=3)
+
+
+def test_get_instance_errors() -> None:
+    class FailingLXD(LXD):
+        def __init__(self, failing: str) -> None:
+            super().__init__()
+            self.failing: str = failing
+
+        def get(self, path: str, *args, **kwargs):
+            if path == self.failing:
+                return {"type": "error", "error_code": 500, "error": "Failed", "metadata": None}
+            return super().get(path, *args, **kwargs)
+
+    with pytest.raises(LXDError, match="500 - Could not get instance c1"):
+        get_instance(FailingLXD("/1.0/instances/c1"), "c1")
+    with pytest.raises(LXDError, match="500 - Could not get the state of c1"):
+        get_instance(FailingLXD("/1.0/instances/c1/state"), "c1", state=True)
+
+
+def test_async_get_instance_errors() -> None:
+    class FailingAsyncLXD(AsyncLXD):
+        async def get(self, path: str, *args, **kwargs):
+            if path == "/1.0/instances/c1/state":
+                return {"type": "error", "error_code": 500, "error": "Failed", "metadata": None}
+            return await super().get(path, *args, **kwargs)
+
+    async def run() -> None:
+        async with FailingAsyncLXD() as client:
+            await async_get_instance(client, "c1", state=True)
+
+    with pytest.raises(LXDError, match="500 - Could not get the state of c1"):
+        asyncio.run(run())
+
+
+def test_async_instances() -> None:
+    async def run() -> List[InstanceView]:
+        async with AsyncLXD() as client:
+            with pytest.raises(InstanceNotFoundError):
+                await async_get_instance(client, "missing")
+            return await async_get_instances(client, recursion=2, filter="config.image.os eq ubuntu", all_projects=True)
+
+    views: List[InstanceView] = asyncio.run(run())
+    assert names(views) == ["c1", "d1"]
+    assert views[1].state.status == "Running"
@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+from lxd_python.certificates import get_certificate, get_certificates
+from lxd_python.exceptions import CertNotFoundError
+from lxd_python.instrumentation import EndpointStats, MetricsCollector, RequestHook, RequestInfo, normalize_path
+from lxd_python.lxd import LXD
+from lxd_python.server import get_supported_api_endpoints
+
+
+def test_normalize_path() -> None:
+    assert normalize_path("/") == "/"
+    assert normalize_path("/1.0") == "/1.0"
+    assert normalize_path("/1.0/certificates") == "/1.0/certificates"
+    assert normalize_path("/1.0/certificates/abc123") == "/1.0/certificates/{fingerprint}"
+    assert normalize_path("/1.0/instances/c1/files?path=/etc/hosts") == "/1.0/instances/{name}/files"
+    assert normalize_path("/1.0/instances/c1/snapshots/snap0") == "/1.0/instances/{name}/snapshots/{name}"
+    assert normalize_path("/1.0/operations/1234/wait") == "/1.0/operations/{id}/wait"
+    assert normalize_path("/1.0/cluster/members/lxd01") == "/1.0/cluster/members/{name}"
+    assert normalize_path("/1.0/images/aliases/ubuntu") == "/1.0/images/aliases/{name}"
+    assert (
+        normalize_path("/1.0/storage-pools/default/volumes/custom/data")
+        == "/1.0/storage-pools/{name}/volumes/{type}/{name}"
+    )
+
+
+def test_metrics_collector() -> None:
+    calls: List[str] = []
+
+    class Recorder(RequestHook):
+        def before_request(self, method: str, path: str) -> None:
+            calls.append(f"before {method} {path}")
+
+        def after_request(self, info: RequestInfo) -> None:
+            calls.append(f"after {info.method} {info.path} {info.status_code}")
+
+    metrics = MetricsCollector()
+    lxd: LXD = LXD(hooks=[metrics, Recorder()])
+    for _ in range(3):
+        get_supported_api_endpoints(lxd)
+    try:
+        get_certificate(lxd, "does-not-exist")
+    except CertNotFoundError:
+        pass
+    get_certificates(lxd)
+
+    assert calls[:2] == ["before GET /", "after GET / 200"]
+
+    stats: Dict[str, EndpointStats] = {s.template: s for s in metrics.snapshot()}
+    assert stats["/"].count == 3
+    assert stats["/"].errors == 0
+    assert stats["/"].response_bytes > 0
+    assert sum(stats["/"].buckets) == 3
+    assert 0 < stats["/"].quantile(0.99) <= 10
+    assert stats["/1.0/certificates/{fingerprint}"].errors == 1
+
+    exported: str = metrics.to_prometheus()
+    assert 'lxd_client_requests_total{method="GET",path="/"} 3' in exported
+    assert 'lxd_client_request_duration_seconds_bucket{method="GET",path="/",le="+Inf"} 3' in exported
+
+    metrics.reset()
+    assert metrics.snapshot() == []
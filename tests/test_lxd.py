@@ -1,4 +1,12 @@
-from lxd_python.lxd import get_socket_location
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+from loguru import logger
+
+from lxd_python.lxd import LXD, get_socket_location
 
 
 def test_get_socket_location() -> None:
@@ -9,3 +17,70 @@ def test_get_socket_location() -> None:
         "/var/snap/lxd/common/lxd/unix.socket",
         "/var/lib/lxd/unix.socket",
     }
+
+
+def test_logging_does_not_touch_global_state() -> None:
+    messages: List[str] = []
+    handler_id: int = logger.add(messages.append, level="DEBUG", format="{message}")
+    try:
+        # Creating a client used to remove every loguru handler.
+        quiet_lxd: LXD = LXD()
+        quiet_lxd.get("/")
+        assert not any("GET /" in message for message in messages)
+
+        summary_lxd: LXD = LXD(log_mode="summary")
+        summary_lxd.get("/")
+        assert any(message.startswith("GET / 200") and "/1.0" not in message for message in messages)
+
+        full_lxd: LXD = LXD(log_mode="full")
+        full_lxd.get("/")
+        assert any(message.startswith("GET / 200") and "/1.0" in message for message in messages)
+
+        messages.clear()
+        quiet_lxd.close()
+        assert messages == []
+    finally:
+        logger.remove(handler_id)
+
+
+def test_client_is_built_on_first_use() -> None:
+    lxd: LXD = LXD()
+    assert lxd._client is None
+    assert lxd.get("/")["metadata"] == ["/1.0"]
+    assert lxd.client is lxd._client
+    lxd.close()
+
+
+def test_close_drops_the_client() -> None:
+    lxd: LXD = LXD()
+    client = lxd.client
+    lxd.close()
+    assert client.is_closed
+    assert lxd._client is None
+    assert lxd.get("/")["metadata"] == ["/1.0"]
+    assert not lxd.client.is_closed
+    lxd.close()
+
+
+def test_close_with_a_worker_building_the_client() -> None:
+    lxd: LXD = LXD()
+    go: threading.Event = threading.Event()
+
+    def work() -> dict:
+        go.wait(5)
+        return lxd.get("/")
+
+    future = lxd.executor.submit(work)
+    closer: threading.Thread = threading.Thread(target=lxd.close)
+    closer.start()
+    time.sleep(0.1)  # close() is waiting for the worker by now.
+    go.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert future.result()["metadata"] == ["/1.0"]
+    assert lxd._client is None
+
+
+def test_import_does_not_load_cryptography() -> None:
+    code: str = "import sys, lxd_python.certificates, lxd_python.reconcile; print('cryptography' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout.strip() == "False"
@@ -0,0 +1,105 @@
+import asyncio
+import math
+import time
+from typing import Dict
+
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.metrics import (
+    MetricFamily,
+    MetricsParser,
+    MetricsScrape,
+    async_scrape_metrics,
+    parse_metrics,
+    rate,
+    rates,
+    scrape_metrics,
+)
+
+lxd: LXD = LXD()
+
+TEXT: str = """# HELP lxd_cpu_seconds_total The total number of CPU time used in seconds.
+# TYPE lxd_cpu_seconds_total counter
+lxd_cpu_seconds_total{cpu="0",mode="user",name="c1",project="default",type="container"} 8.65
+lxd_cpu_seconds_total{cpu="0",mode="system",name="c1",project="default",type="container"} 1.5
+lxd_cpu_seconds_total{cpu="0",mode="user",name="c2",project="default",type="container"} 3
+# HELP lxd_memory_MemFree_bytes The amount of free memory.
+# TYPE lxd_memory_MemFree_bytes gauge
+lxd_memory_MemFree_bytes{name="c1",project="default",type="container"} 1.0e+09
+lxd_memory_MemFree_bytes{name="we\\"ird\\\\",project="default",type="container"} 2
+lxd_procs_total 42
+# EOF
+"""
+
+
+def test_parse_metrics() -> None:
+    families: Dict[str, MetricFamily] = parse_metrics(TEXT)
+    assert sorted(families) == ["lxd_cpu_seconds_total", "lxd_memory_MemFree_bytes", "lxd_procs_total"]
+
+    cpu: MetricFamily = families["lxd_cpu_seconds_total"]
+    assert (cpu.metric_type, cpu.help) == ("counter", "The total number of CPU time used in seconds.")
+    assert cpu.label_names == ["cpu", "mode", "name", "project", "type"]
+    assert list(cpu.values) == [8.65, 1.5, 3.0]
+    assert cpu.label_values["name"] == ["c1", "c2"]
+    assert list(cpu.label_codes["name"]) == [0, 0, 1]
+    assert cpu.labels(2)["name"] == "c2"
+
+    assert list(cpu.rows(name="c1")) == [0, 1]
+    assert list(cpu.rows(name="c1", mode="user")) == [0]
+    assert list(cpu.rows(name="nope")) == []
+    assert cpu.get(cpu="0", mode="system", name="c1", project="default", type="container") == 1.5
+
+    memory: MetricFamily = families["lxd_memory_MemFree_bytes"]
+    assert memory.label_values["name"] == ["c1", 'we"ird\\']
+    assert list(memory.values) == [1e9, 2.0]
+
+    assert families["lxd_procs_total"].label_names == []
+    assert families["lxd_procs_total"].metric_type == "unknown"
+
+
+def test_samples_with_different_labels() -> None:
+    family: MetricFamily = parse_metrics('m{a="1"} 1\nm{a="2",b="x"} 2\nm{b="y"} 3\n')["m"]
+    assert family.label_names == ["a", "b"]
+    assert family.keys == [("1", ""), ("2", "x"), ("", "y")]
+    assert list(family.rows(b="")) == [0]
+
+
+def test_rate() -> None:
+    previous: MetricFamily = parse_metrics('c_total{n="a"} 10\nc_total{n="b"} 50\n')["c_total"]
+    same_order: MetricFamily = parse_metrics('c_total{n="a"} 30\nc_total{n="b"} 70\n')["c_total"]
+    assert list(rate(previous, same_order, 2.0).values) == [10.0, 10.0]
+
+    # A new series, another order and a counter that was reset.
+    changed: MetricFamily = parse_metrics('c_total{n="new"} 5\nc_total{n="b"} 4\nc_total{n="a"} 14\n')["c_total"]
+    result: MetricFamily = rate(previous, changed, 2.0)
+    assert math.isnan(result.values[0])
+    assert list(result.values[1:]) == [2.0, 2.0]
+    assert result.label_values == changed.label_values
+
+
+def test_parser_reuses_labels() -> None:
+    parser = MetricsParser()
+    first: Dict[str, MetricFamily] = parser.parse(TEXT.splitlines())
+    second: Dict[str, MetricFamily] = parser.parse(TEXT.splitlines())
+    assert first["lxd_cpu_seconds_total"].keys[0] is second["lxd_cpu_seconds_total"].keys[0]
+
+
+def test_scrape_metrics() -> None:
+    parser = MetricsParser()
+    previous: MetricsScrape = scrape_metrics(lxd, parser)
+    time.sleep(0.05)
+    current: MetricsScrape = scrape_metrics(lxd, parser)
+    assert "lxd_memory_MemFree_bytes" in current
+    assert len(current["lxd_cpu_seconds_total"]) == len(previous["lxd_cpu_seconds_total"]) > 0
+
+    per_second: Dict[str, MetricFamily] = rates(previous, current)
+    assert list(per_second) == ["lxd_cpu_seconds_total"]
+    assert all(value > 0 for value in per_second["lxd_cpu_seconds_total"].values)
+
+
+def test_async_scrape_metrics() -> None:
+    async def run() -> MetricsScrape:
+        async with AsyncLXD() as client:
+            return await async_scrape_metrics(client)
+
+    scrape: MetricsScrape = asyncio.run(run())
+    assert scrape["lxd_cpu_seconds_total"].metric_type == "counter"
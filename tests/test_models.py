@@ -0,0 +1,57 @@
+import sys
+from typing import Any, Dict
+
+import pytest
+
+from lxd_python.models import Certificate, CertificateView, Cluster, ClusterView, MemberConfigView, SyncResponseView
+
+certificate_metadata: Dict[str, Any] = {
+    "certificate": "MIIB...",
+    "fingerprint": "abc123",
+    "name": "test",
+    "projects": ["default"],
+    "restricted": False,
+    "type": "client",
+}
+
+cluster_metadata: Dict[str, Any] = {
+    "enabled": False,
+    "member_config": [
+        {"description": "source", "entity": "storage-pool", "key": "source", "name": "default", "value": ""},
+    ],
+    "server_name": "",
+}
+
+
+def test_certificate_view_matches_certificate() -> None:
+    view = CertificateView(certificate_metadata)
+    certificate = Certificate({"metadata": certificate_metadata})
+    assert view.fields() == certificate.__dict__
+    assert view["cert_type"] == "client"
+    assert view.get("missing", "default") == "default"
+    assert CertificateView({"name": "x"}).get("fingerprint", "default") == "default"
+    assert view == CertificateView(dict(certificate_metadata))
+
+
+def test_views_are_slotted() -> None:
+    view = CertificateView(certificate_metadata)
+    assert not hasattr(view, "__dict__")
+    assert sys.getsizeof(view) < sys.getsizeof(Certificate({"metadata": certificate_metadata}).__dict__)
+    with pytest.raises(AttributeError):
+        view.unknown = 1  # type: ignore[attr-defined]
+
+
+def test_fields_are_parsed_once() -> None:
+    view = ClusterView(cluster_metadata)
+    member_config = view.member_config
+    assert view.member_config is member_config
+    assert type(member_config[0]) == MemberConfigView
+    assert member_config[0].entity == "storage-pool"
+    assert view.fields()["enabled"] == Cluster({"metadata": cluster_metadata}).enabled
+
+
+def test_missing_required_field() -> None:
+    response = SyncResponseView({"type": "sync"})
+    assert response.response_type == "sync"
+    with pytest.raises(KeyError):
+        response.metadata
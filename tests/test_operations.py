@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from lxd_python.exceptions import LXDError, LXDTimeoutError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Operation
+from lxd_python.operations import async_wait_operation, get_operation, operation_id, wait_operation
+
+lxd: LXD = LXD()
+
+
+def start_operation() -> str:
+    """Uploading an image starts an operation that takes the fake server a moment."""
+    return lxd.codec.loads(lxd.request("POST", "/1.0/images", content=b"image").content)["operation"]
+
+
+def test_operation_id() -> None:
+    assert operation_id("/1.0/operations/6916c8a6") == "6916c8a6"
+    assert operation_id("6916c8a6") == "6916c8a6"
+
+
+def test_wait_operation() -> None:
+    operation: str = start_operation()
+    assert not get_operation(lxd, operation).done
+
+    started: float = time.perf_counter()
+    finished: Operation = wait_operation(lxd, operation)
+    assert finished.done
+    assert finished.status == "Success"
+    assert finished.metadata["size"] == 5
+    # The server answers when the operation is done, not after some polling interval.
+    assert time.perf_counter() - started < 1
+
+
+def test_wait_operation_timeout() -> None:
+    with pytest.raises(LXDTimeoutError):
+        wait_operation(lxd, start_operation(), timeout=0)
+
+
+def test_wait_missing_operation() -> None:
+    with pytest.raises(LXDError, match="404"):
+        wait_operation(lxd, "/1.0/operations/does-not-exist")
+
+
+def test_async_wait_operation() -> None:
+    async def run() -> Operation:
+        async with AsyncLXD() as client:
+            return await async_wait_operation(client, start_operation())
+
+    assert asyncio.run(run()).status_code == 200
+
+
+def test_long_poll_outlasts_the_client_deadline() -> None:
+    """The fake server takes longer than the deadline to finish the operation, /wait must still get the result."""
+    short: LXD = LXD(deadline=0.1)
+    assert wait_operation(short, start_operation()).status_code == 200
+
+    async def run() -> Operation:
+        async with AsyncLXD(deadline=0.1) as client:
+            return await async_wait_operation(client, start_operation())
+
+    assert asyncio.run(run()).status_code == 200
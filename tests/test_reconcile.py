@@ -0,0 +1,95 @@
+from typing import Callable, Dict, List
+
+from lxd_python import reconcile
+from lxd_python.capabilities import Capabilities
+from lxd_python.certificates import (
+    certificate_fingerprint,
+    delete_certificate,
+    get_all_certificates,
+    get_certificates,
+    parse_pem_bundle,
+)
+from lxd_python.lxd import LXD
+from lxd_python.models import Certificate
+from lxd_python.reconcile import (
+    CertificateUpdate,
+    DesiredCertificate,
+    ReconcilePlan,
+    ReconcileResult,
+    apply_plan,
+    plan_certificates,
+    reconcile_certificates,
+)
+
+lxd: LXD = LXD()
+
+
+def test_reconcile_certificates(make_pem: Callable[[str], str]) -> None:
+    # Remove all certificates from the LXD server.
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+
+    pems: List[str] = [make_pem(f"reconcile-{i}") for i in range(4)]
+    fingerprints: List[str] = [certificate_fingerprint(parse_pem_bundle(pem)[0]) for pem in pems]
+    desired: List[DesiredCertificate] = [
+        DesiredCertificate(certificate=pem, name=f"cert-{i}") for i, pem in enumerate(pems[:3])
+    ]
+
+    # Start with an empty trust store: everything is added.
+    plan: ReconcilePlan = plan_certificates(lxd, desired)
+    assert sorted(plan.add) == sorted(fingerprints[:3])
+    assert plan.update == []
+    assert plan.delete == []
+    results: List[ReconcileResult] = apply_plan(lxd, plan)
+    assert [result.action for result in results] == ["add", "add", "add"]
+    assert all(result.ok for result in results)
+    assert plan_certificates(lxd, desired).is_empty()
+
+    # Rename one, restrict another, drop the third and add the fourth.
+    desired = [
+        DesiredCertificate(certificate=pems[0], name="renamed"),
+        DesiredCertificate(certificate=pems[1], name="cert-1", restricted=True, projects=["default"]),
+        DesiredCertificate(certificate=pems[3], name="cert-3"),
+    ]
+    plan = plan_certificates(lxd, desired)
+    assert list(plan.add) == [fingerprints[3]]
+    assert {update.fingerprint: update.changes for update in plan.update} == {
+        fingerprints[0]: {"name": "renamed"},
+        fingerprints[1]: {"restricted": True, "projects": ["default"]},
+    }
+    assert plan.delete == [fingerprints[2]]
+
+    results = reconcile_certificates(lxd, desired)
+    assert sorted(result.action for result in results) == ["add", "delete", "update", "update"]
+    assert all(result.ok for result in results)
+
+    trusted: Dict[str, Certificate] = {c.fingerprint: c for c in get_all_certificates(lxd)}
+    assert sorted(trusted) == sorted([fingerprints[0], fingerprints[1], fingerprints[3]])
+    assert trusted[fingerprints[0]].name == "renamed"
+    assert trusted[fingerprints[1]].restricted is True
+    assert plan_certificates(lxd, desired).is_empty()
+
+    # Without pruning, certificates that are not desired are kept.
+    assert plan_certificates(lxd, desired[:1], prune=False).is_empty()
+
+
+def test_update_without_patch(monkeypatch, make_pem: Callable[[str], str]) -> None:
+    """Servers without PATCH get the whole certificate with PUT."""
+    for certificate in get_certificates(lxd):
+        delete_certificate(lxd=lxd, fingerprint=certificate)
+    pems: List[str] = [make_pem(f"put-{i}") for i in range(2)]
+    assert all(result.ok for result in reconcile_certificates(lxd, [DesiredCertificate(pems[0], "before")]))
+
+    old_server = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset())
+    monkeypatch.setattr(reconcile, "get_capabilities", lambda lxd: old_server)
+    plan: ReconcilePlan = plan_certificates(lxd, [DesiredCertificate(pems[0], "after", restricted=True)])
+    fingerprint: str = plan.update[0].fingerprint
+    # One that was deleted since it was planned.
+    gone: str = certificate_fingerprint(parse_pem_bundle(pems[1])[0])
+    plan.update.append(CertificateUpdate(fingerprint=gone, changes={"name": "gone"}))
+
+    results: List[ReconcileResult] = apply_plan(lxd, plan)
+    assert [(result.action, result.ok) for result in results] == [("update", True), ("update", False)]
+    updated: Certificate = get_all_certificates(lxd)[0]
+    assert updated.fingerprint == fingerprint
+    assert (updated.name, updated.restricted) == ("after", True)
@@ -0,0 +1,94 @@
+import os
+import signal
+import threading
+from typing import List
+
+from lxd_python.cache import ResponseCache
+from lxd_python.instrumentation import MetricsCollector
+from lxd_python.lxd import LXD
+from lxd_python.registry import close_clients, get_client
+from lxd_python.retry import CircuitBreaker
+
+
+def test_get_client_is_shared() -> None:
+    lxd: LXD = get_client()
+    assert get_client() is lxd
+    assert get_client(socket_path=lxd.socket_path) is lxd
+    assert get_client(socket_path="/tmp/other.socket") is not lxd
+    assert get_client(endpoint="https://lxd01:8443") is get_client(endpoint="https://lxd01:8443/")
+
+
+def test_get_client_from_threads() -> None:
+    close_clients()
+    clients: List[LXD] = []
+    threads: List[threading.Thread] = [threading.Thread(target=lambda: clients.append(get_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_close_clients() -> None:
+    lxd: LXD = get_client()
+    lxd.get("/")
+    client = lxd.client
+    close_clients()
+    assert client.is_closed
+    assert lxd.client is not client
+    assert get_client() is not lxd
+
+
+def test_fork() -> None:
+    lxd: LXD = get_client()
+    parent_client = lxd.client
+    assert lxd.get("/")["metadata"] == ["/1.0"]
+
+    read_fd, write_fd = os.pipe()
+    pid: int = os.fork()
+    if pid == 0:
+        # Child: the inherited client has to make its own connections, and get_client() a new client.
+        try:
+            ok: bool = (
+                lxd._client is None
+                and lxd.get("/")["metadata"] == ["/1.0"]
+                and lxd.client is not parent_client
+                and get_client() is not lxd
+                and get_client().get("/")["metadata"] == ["/1.0"]
+            )
+            os.write(write_fd, b"ok" if ok else b"fail")
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    _, status = os.waitpid(pid, 0)
+    assert os.read(read_fd, 10) == b"ok"
+    os.close(read_fd)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    # The parent still uses its own connections.
+    assert lxd.client is parent_client
+    assert lxd.get("/")["metadata"] == ["/1.0"]
+
+
+def test_fork_while_locks_are_held() -> None:
+    """Another thread of the parent may hold a lock during the fork, the child must not wait for it forever."""
+    metrics = MetricsCollector()
+    lxd = LXD(cache=ResponseCache(), circuit_breaker=CircuitBreaker(), hooks=[metrics])
+    locks: List[threading.Lock] = [lxd.retry_budget._lock, lxd.circuit_breaker._lock, lxd.cache._lock, metrics._lock]
+    for lock in locks:
+        lock.acquire()
+
+    pid: int = os.fork()
+    if pid == 0:
+        # Child: killed by the alarm if a request waits for one of the inherited locks.
+        signal.alarm(5)
+        try:
+            os._exit(0 if lxd.get("/")["metadata"] == ["/1.0"] else 1)
+        finally:
+            os._exit(1)
+
+    for lock in locks:
+        lock.release()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,150 @@
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from lxd_python.events import iter_events
+from lxd_python.exceptions import LXDConnectionError
+from lxd_python.lxd import LXD
+from lxd_python.models import Event
+from lxd_python.server import get_supported_api_endpoints
+from lxd_python.websocket import OPCODE_CLOSE, OPCODE_TEXT, accept_key, encode_frame
+
+
+def write_certificate(directory: str, name: str, common_name: str) -> Tuple[str, str]:
+    """Write a self-signed certificate valid for 127.0.0.1 and its key. Returns their paths."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path: str = os.path.join(directory, f"{name}.crt")
+    key_path: str = os.path.join(directory, f"{name}.key")
+    with open(cert_path, "wb") as cert_file:
+        cert_file.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as key_file:
+        key_file.write(
+            key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+    return cert_path, key_path
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers GET / and streams one event on /1.0/events. Only trusted clients get past the TLS handshake."""
+
+    protocol_version = "HTTP/1.1"
+    connections: List[str] = []
+
+    def setup(self) -> None:
+        super().setup()
+        Handler.connections.append(self.client_address[0])
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/1.0/events"):
+            self.send_response(101)
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept_key(self.headers["Sec-WebSocket-Key"]))
+            self.end_headers()
+            event = {"type": "lifecycle", "metadata": {"action": "instance-started"}}
+            self.wfile.write(encode_frame(OPCODE_TEXT, json.dumps(event).encode(), mask=False))
+            self.wfile.write(encode_frame(OPCODE_CLOSE, mask=False))
+            self.close_connection = True
+            return
+
+        body: bytes = json.dumps(
+            {
+                "type": "sync",
+                "status": "Success",
+                "status_code": 200,
+                "operation": "",
+                "error_code": 0,
+                "error": "",
+                "metadata": ["/1.0"],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def tls_server() -> Iterator[Tuple[str, str, Tuple[str, str]]]:
+    """A HTTPS server that requires a client certificate. Yields its URL, its certificate and the client's."""
+    with tempfile.TemporaryDirectory() as directory:
+        server_cert, server_key = write_certificate(directory, "server", "lxd01")
+        client_cert, client_key = write_certificate(directory, "client", "client")
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(server_cert, server_key)
+        context.load_verify_locations(client_cert)
+        context.verify_mode = ssl.CERT_REQUIRED
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        Handler.connections = []
+        try:
+            yield f"https://127.0.0.1:{server.server_address[1]}", server_cert, (client_cert, client_key)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_remote_client_reuses_connection(tls_server: Tuple[str, str, Tuple[str, str]]) -> None:
+    endpoint, server_cert, client_cert = tls_server
+    lxd: LXD = LXD(endpoint=endpoint, cert=client_cert, verify=server_cert)
+    assert lxd.socket_path is None
+
+    for _ in range(10):
+        assert get_supported_api_endpoints(lxd) == ["/1.0"]
+    lxd.close()
+
+    # All ten requests went over one kept-alive TLS connection.
+    assert len(Handler.connections) == 1
+
+
+def test_remote_client_without_certificate_is_rejected(tls_server: Tuple[str, str, Tuple[str, str]]) -> None:
+    endpoint, server_cert, _ = tls_server
+    lxd: LXD = LXD(endpoint=endpoint, verify=server_cert)
+    with pytest.raises(LXDConnectionError):
+        lxd.get("/")
+
+
+def test_remote_events(tls_server: Tuple[str, str, Tuple[str, str]]) -> None:
+    endpoint, server_cert, client_cert = tls_server
+    lxd: LXD = LXD(endpoint=endpoint, cert=client_cert, verify=server_cert)
+
+    events: List[Event] = list(islice(iter_events(lxd, types=["lifecycle"], reconnect=False), 1))
+    assert events[0].metadata["action"] == "instance-started"
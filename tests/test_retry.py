@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+import pytest
+
+from lxd_python.exceptions import CircuitOpenError, LXDConnectionError, LXDTimeoutError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.retry import CircuitBreaker, RetryBudget, RetryPolicy
+
+FAST_RETRY = RetryPolicy(max_attempts=3, backoff=0.001, max_backoff=0.001)
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers the first `failures` requests with 503. /slow takes a second."""
+
+    protocol_version = "HTTP/1.1"
+    failures: int = 0
+    requests: List[str] = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def address_string(self) -> str:
+        return "unix"
+
+    def _answer(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        FlakyHandler.requests.append(f"{self.command} {self.path}")
+        if self.path == "/slow":
+            time.sleep(1)
+
+        status: int = 200
+        if FlakyHandler.failures > 0:
+            FlakyHandler.failures -= 1
+            status = 503
+        body: bytes = json.dumps(
+            {
+                "type": "sync" if status == 200 else "error",
+                "status": "Success" if status == 200 else "",
+                "status_code": status if status == 200 else 0,
+                "operation": "",
+                "error_code": 0 if status == 200 else status,
+                "error": "" if status == 200 else "Service Unavailable",
+                "metadata": ["/1.0"] if status == 200 else None,
+            }
+        ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    do_GET = do_POST = _answer
+
+
+@pytest.fixture()
+def flaky_socket() -> Iterator[str]:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path: str = os.path.join(directory, "flaky.socket")
+        server = UnixHTTPServer(socket_path, FlakyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        FlakyHandler.failures = 0
+        FlakyHandler.requests = []
+        try:
+            yield socket_path
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_retry_policy_delay() -> None:
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3)
+    for retry in range(10):
+        assert 0 <= policy.delay(retry) <= min(0.3, 0.1 * 2**retry)
+
+
+def test_retry_budget() -> None:
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    assert budget.try_spend()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_circuit_breaker() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure("GET", "/1.0")
+    assert breaker.allow("GET", "/1.0")
+    breaker.record_failure("GET", "/1.0")
+    assert breaker.is_open("GET", "/1.0")
+    assert not breaker.allow("GET", "/1.0")
+    assert breaker.allow("POST", "/1.0")
+
+    time.sleep(0.06)
+    # One trial request is let through, the rest wait for its outcome.
+    assert breaker.allow("GET", "/1.0")
+    assert not breaker.allow("GET", "/1.0")
+    breaker.record_success("GET", "/1.0")
+    assert not breaker.is_open("GET", "/1.0")
+
+
+def test_get_is_retried(flaky_socket: str) -> None:
+    FlakyHandler.failures = 2
+    lxd = LXD(socket_path=flaky_socket, retry=FAST_RETRY)
+    assert lxd.get("/")["metadata"] == ["/1.0"]
+    assert FlakyHandler.requests == ["GET /"] * 3
+
+
+def test_post_is_not_retried(flaky_socket: str) -> None:
+    FlakyHandler.failures = 1
+    lxd = LXD(socket_path=flaky_socket, retry=FAST_RETRY)
+    assert lxd.post("/1.0/certificates", data={})["error_code"] == 503
+    assert FlakyHandler.requests == ["POST /1.0/certificates"]
+
+
+def test_retry_budget_runs_out(flaky_socket: str) -> None:
+    FlakyHandler.failures = 10
+    lxd = LXD(socket_path=flaky_socket, retry=FAST_RETRY, retry_budget=RetryBudget(ratio=0, max_tokens=1))
+    assert lxd.get("/")["error_code"] == 503
+    assert len(FlakyHandler.requests) == 2
+
+
+def test_deadline(flaky_socket: str) -> None:
+    lxd = LXD(socket_path=flaky_socket, retry=FAST_RETRY)
+    start: float = time.perf_counter()
+    with pytest.raises(LXDTimeoutError):
+        lxd.get("/slow", deadline=0.2)
+    assert time.perf_counter() - start < 0.9
+
+
+def test_connection_error() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        lxd = LXD(socket_path=os.path.join(directory, "missing.socket"), retry=FAST_RETRY)
+        with pytest.raises(LXDConnectionError):
+            lxd.get("/")
+
+
+def test_circuit_breaker_fails_fast(flaky_socket: str) -> None:
+    FlakyHandler.failures = 10
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    lxd = LXD(socket_path=flaky_socket, retry=RetryPolicy(max_attempts=1), circuit_breaker=breaker)
+    lxd.get("/1.0/certificates/abc")
+    lxd.get("/1.0/certificates/def")
+    with pytest.raises(CircuitOpenError):
+        lxd.get("/1.0/certificates/ghi")
+    assert len(FlakyHandler.requests) == 2
+
+
+def test_async_get_is_retried(flaky_socket: str) -> None:
+    FlakyHandler.failures = 2
+
+    async def get():
+        async with AsyncLXD(socket_path=flaky_socket, retry=FAST_RETRY) as async_lxd:
+            return await async_lxd.get("/")
+
+    assert asyncio.run(get())["metadata"] == ["/1.0"]
+    assert len(FlakyHandler.requests) == 3
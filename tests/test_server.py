@@ -1,7 +1,8 @@
+import asyncio
 from typing import List
 
-from lxd_python.lxd import LXD
-from lxd_python.server import get_supported_api_endpoints
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.server import async_get_supported_api_endpoints, get_supported_api_endpoints
 
 lxd: LXD = LXD()
 
@@ -12,6 +13,15 @@ def test_get_api_endpoints() -> None:
     assert api_endpoints == ["/1.0"]
 
 
+def test_async_get_api_endpoints() -> None:
+    async def get_many() -> List[List[str]]:
+        async with AsyncLXD() as async_lxd:
+            return await asyncio.gather(*[async_get_supported_api_endpoints(async_lxd) for _ in range(50)])
+
+    for api_endpoints in asyncio.run(get_many()):
+        assert api_endpoints == ["/1.0"]
+
+
 def test_get_server_environment_and_configuration() -> None:
     # TODO: Implement me.
     """server = get_server_environment_and_configuration(lxd, cluster_member_name="lxd01", project_name="default")
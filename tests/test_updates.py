@@ -0,0 +1,158 @@
+import asyncio
+from typing import Callable, List
+
+import httpx
+import pytest
+
+from lxd_python import updates
+from lxd_python.capabilities import Capabilities
+from lxd_python.certificates import delete_certificate, get_certificate, get_certificates
+from lxd_python.exceptions import LXDError, PreconditionFailedError
+from lxd_python.lxd import LXD, AsyncLXD
+from lxd_python.models import Certificate, Server
+from lxd_python.reconcile import DesiredCertificate, reconcile_certificates
+from lxd_python.updates import (
+    Tracked,
+    async_get_certificate_for_update,
+    async_save,
+    get_certificate_for_update,
+    get_server_for_update,
+    save,
+)
+
+lxd: LXD = LXD()
+
+
+class RecordingLXD(LXD):
+    """Remembers the method, data and headers of every write."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: List[tuple] = []
+
+    def request(self, method, path, params=None, data=None, headers=None, timeout=None, deadline=None):
+        if method != "GET":
+            self.writes.append((method, path, data, headers))
+        return super().request(method, path, params, data, headers, timeout, deadline)
+
+
+@pytest.fixture
+def trust_one(make_pem: Callable[[str], str]) -> Callable[[str], str]:
+    """Replaces the trust store with one new certificate, and returns its fingerprint."""
+
+    def trust(name: str) -> str:
+        for certificate in get_certificates(lxd):
+            delete_certificate(lxd=lxd, fingerprint=certificate)
+        reconcile_certificates(lxd, [DesiredCertificate(certificate=make_pem(name), name=name)])
+        return get_certificates(lxd)[0].replace("/1.0/certificates/", "")
+
+    return trust
+
+
+def test_changes() -> None:
+    server = Server({"config": {"core.https_address": ":8443", "images.auto_update_interval": "6"}})
+    tracked: Tracked[Server] = Tracked(path="/1.0", value=server)
+    assert tracked.changes() == {}
+
+    server.config["core.https_address"] = ":9443"
+    server.config["core.proxy_http"] = "http://proxy"
+    del server.config["images.auto_update_interval"]
+    assert tracked.changes() == {
+        "config": {"core.https_address": ":9443", "core.proxy_http": "http://proxy", "images.auto_update_interval": ""}
+    }
+
+
+def test_save_certificate_sends_only_changes(trust_one: Callable[[str], str]) -> None:
+    fingerprint: str = trust_one("tracked")
+    client = RecordingLXD()
+
+    tracked: Tracked[Certificate] = get_certificate_for_update(client, fingerprint)
+    assert tracked.etag
+    assert save(client, tracked) is None
+
+    etag: str = tracked.etag
+    tracked.value.restricted = True
+    tracked.value.projects.append("default")
+    result = save(client, tracked)
+    assert result["error_code"] == 0
+    assert client.writes == [
+        (
+            "PATCH",
+            f"/1.0/certificates/{fingerprint}",
+            {"restricted": True, "projects": ["default"]},
+            {"If-Match": etag},
+        )
+    ]
+
+    certificate: Certificate = get_certificate(lxd, fingerprint)
+    assert (certificate.name, certificate.restricted, certificate.projects) == ("tracked", True, ["default"])
+    assert tracked.changes() == {}
+
+
+def test_save_conflict(trust_one: Callable[[str], str]) -> None:
+    fingerprint: str = trust_one("conflict")
+    first: Tracked[Certificate] = get_certificate_for_update(lxd, fingerprint)
+    second: Tracked[Certificate] = get_certificate_for_update(lxd, fingerprint)
+
+    first.value.name = "first"
+    save(lxd, first)
+
+    second.value.name = "second"
+    with pytest.raises(PreconditionFailedError) as error:
+        save(lxd, second)
+    assert error.value.path == f"/1.0/certificates/{fingerprint}"
+    assert get_certificate(lxd, fingerprint).name == "first"
+
+
+def test_save_without_patch(monkeypatch, trust_one: Callable[[str], str]) -> None:
+    fingerprint: str = trust_one("no-patch-update")
+    old_server = Capabilities(api_version="1.0", api_status="stable", extensions=frozenset())
+    monkeypatch.setattr(updates, "get_capabilities", lambda lxd: old_server)
+    client = RecordingLXD()
+
+    tracked: Tracked[Certificate] = get_certificate_for_update(client, fingerprint)
+    tracked.value.name = "put"
+    save(client, tracked)
+    assert [(method, data) for method, _, data, _ in client.writes] == [
+        ("PUT", {"name": "put", "type": "client", "restricted": False, "projects": []})
+    ]
+    assert get_certificate(lxd, fingerprint).name == "put"
+
+
+def test_save_server_config() -> None:
+    client = RecordingLXD()
+    tracked: Tracked[Server] = get_server_for_update(client)
+    tracked.value.config["core.proxy_http"] = "http://proxy:3128"
+    save(client, tracked)
+    assert client.writes[0][:3] == ("PATCH", "/1.0", {"config": {"core.proxy_http": "http://proxy:3128"}})
+
+    tracked = get_server_for_update(client)
+    assert tracked.value.config["core.proxy_http"] == "http://proxy:3128"
+    del tracked.value.config["core.proxy_http"]
+    save(client, tracked)
+    assert "core.proxy_http" not in get_server_for_update(lxd).value.config
+
+
+def test_get_for_update_errors() -> None:
+    class FailingLXD(LXD):
+        def request(self, method, path, params=None, data=None, headers=None, timeout=None, deadline=None):
+            body: dict = {"type": "error", "error_code": 403, "error": "Not authorized", "metadata": None}
+            return httpx.Response(403, json=body)
+
+    with pytest.raises(LXDError, match="403 - Could not get /1.0"):
+        get_server_for_update(FailingLXD())
+    with pytest.raises(LXDError, match="403 - Could not get /1.0/certificates/abc123"):
+        get_certificate_for_update(FailingLXD(), "abc123")
+
+
+def test_async_save(trust_one: Callable[[str], str]) -> None:
+    fingerprint: str = trust_one("async-tracked")
+
+    async def run() -> None:
+        async with AsyncLXD() as client:
+            tracked: Tracked[Certificate] = await async_get_certificate_for_update(client, fingerprint)
+            tracked.value.name = "async"
+            await async_save(client, tracked)
+
+    asyncio.run(run())
+    assert get_certificate(lxd, fingerprint).name == "async"